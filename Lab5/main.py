@@ -14,7 +14,10 @@ from Lab5.parser import Parser
 # Імпортуємо генератор CIL-коду
 from cil_generator import CILGenerator
 # Імпортуємо утиліти для роботи з постфікс-кодом
-from postfix_translator import save_postfix_to_file, print_postfix_code, PostfixMachine
+from postfix_translator import (save_postfix_to_file, save_postfix_binary,
+                                print_postfix_code, PostfixMachine)
+# Імпортуємо менеджер проходів оптимізації
+from optimizer.pass_manager import optimize, parse_opt_flags, DEFAULT_PASS_BUDGET
 
 
 # Стандартний шлях до асемблера CIL (ilasm.exe) для 64-бітної системи
@@ -132,7 +135,8 @@ def run_ilasm(il_file):
 
 
 def compile_to_cil(source_file, output_file=None, save_postfix=True,
-                   execute_postfix=False, run_ilasm_flag=True):
+                   execute_postfix=False, run_ilasm_flag=True, opt_level=0,
+                   fixpoint=False, pass_budget=DEFAULT_PASS_BUDGET, opt_options=None):
     """
     Компілює програму на RSimple у CIL-код
 
@@ -148,6 +152,10 @@ def compile_to_cil(source_file, output_file=None, save_postfix=True,
         save_postfix: чи зберігати проміжний постфікс-код у файл
         execute_postfix: чи виконувати постфікс-код (для тестування/демонстрації)
         run_ilasm_flag: чи запускати ilasm для створення .exe
+        opt_level: рівень оптимізації постфікс-коду (0, 1 або 2)
+        fixpoint: повторювати проходи оптимізації до нерухомої точки
+        pass_budget: бюджет часу одного проходу оптимізації (секунди)
+        opt_options: параметри окремих проходів оптимізації {ім'я: значення}
 
     Returns:
         bool: True якщо компіляція успішна, False якщо є помилки
@@ -232,6 +240,18 @@ def compile_to_cil(source_file, output_file=None, save_postfix=True,
     # Виводимо постфікс-код на екран (для налагодження)
     print_postfix_code(postfix_code)
 
+    # ========== ОПТИМІЗАЦІЯ ПОСТФІКС-КОДУ ==========
+    # Оптимізований код отримують і постфікс-машина, і генератор CIL
+    if opt_level > 0:
+        print('\n' + '='*70)
+        print('ОПТИМІЗАЦІЯ ПОСТФІКС-КОДУ')
+        print('='*70)
+        postfix_code = optimize(postfix_code, opt_level, fixpoint, pass_budget, opt_options)
+        # Проходи можуть змінювати набір змінних
+        variable_table = postfix_code.variable_table
+        print(f'\nІнструкцій після оптимізації: {len(postfix_code)}')
+        print_postfix_code(postfix_code)
+
     # ========== ЗБЕРЕЖЕННЯ ПОСТФІКС-КОДУ У ФАЙЛ (опціонально) ==========
     if save_postfix:
         # Отримуємо ім'я файлу без розширення
@@ -240,6 +260,8 @@ def compile_to_cil(source_file, output_file=None, save_postfix=True,
         postfix_file = f"{base_name}.postfix"
         # Зберігаємо у форматі PSM (Postfix Stack Machine)
         save_postfix_to_file(postfix_code, variable_table, postfix_file)
+        # Та у бінарному форматі PSMB (для запуску без повторної компіляції)
+        save_postfix_binary(postfix_code, variable_table, f"{base_name}.psmb")
 
     # ========== ВИКОНАННЯ ПОСТФІКС-КОДУ (опціонально, для тестування) ==========
     # Це НЕ частина компіляції, а додаткова можливість для демонстрації результату
@@ -345,19 +367,24 @@ def main():
     # sys.argv[0] - ім'я скрипта (main.py)
     # sys.argv[1] - вхідний файл
     # sys.argv[2] - вихідний файл (опціонально)
-    if len(sys.argv) < 2:
+    # Прапорці оптимізації (-O0/-O1/-O2, --fixpoint, --pass-budget=N,
+    # --opt-ПАРАМЕТР=ЗНАЧЕННЯ) - в будь-якому місці
+    args, opt_level, fixpoint, pass_budget, opt_options = parse_opt_flags(sys.argv[1:])
+    if len(args) < 1:
         # Якщо не вказано вхідний файл, виводимо довідку
-        print('Використання: python main.py <input_file.my_lang> [output_file.il]')
+        print('Використання: python main.py [-O0|-O1|-O2] [--fixpoint] '
+              '[--pass-budget=СЕКУНДИ] [--opt-ПАРАМЕТР=ЗНАЧЕННЯ] '
+              '<input_file.my_lang> [output_file.il]')
         print('\nПриклади:')
         print('  python main.py test1.my_lang')
         print('  python main.py test1.my_lang output.il')
-        print('  python main.py examples/test2.my_lang')
+        print('  python main.py -O2 examples/test2.my_lang')
         sys.exit(1)
 
     # Отримуємо вхідний файл з аргументів
-    source_file = sys.argv[1]
+    source_file = args[0]
     # Отримуємо вихідний файл (якщо вказано), інакше None
-    output_file = sys.argv[2] if len(sys.argv) > 2 else None
+    output_file = args[1] if len(args) > 1 else None
 
     # ========== ЗАПУСК КОМПІЛЯЦІЇ ==========
     success = compile_to_cil(
@@ -365,7 +392,11 @@ def main():
         output_file,
         save_postfix=True,      # Зберігати постфікс-код у файл
         execute_postfix=True,   # УВІМКНЕНО: виконувати постфікс-код для демонстрації
-        run_ilasm_flag=True     # УВІМКНЕНО: автоматично запускати ilasm
+        run_ilasm_flag=True,    # УВІМКНЕНО: автоматично запускати ilasm
+        opt_level=opt_level,
+        fixpoint=fixpoint,
+        pass_budget=pass_budget,
+        opt_options=opt_options
     )
 
     # Повертаємо код виходу:
@@ -2,6 +2,8 @@
 Синтаксичний та семантичний аналізатор + генератор постфікс-коду
 """
 
+from postfix_ir import PostfixProgram, Op, OPERATOR_OPS
+
 
 class Parser:
     """Синтаксичний аналізатор з генерацією постфікс-коду"""
@@ -11,21 +13,27 @@ class Parser:
         self.len_tableOfSymb = len(table_of_symbols)  # Кількість токенів
         self.numRow = 1                           # Номер поточного рядка в таблиці
         self.tableOfVar = {}                      # Таблиця змінних {ім'я: (індекс, тип, ініціалізована)}
-        self.postfixCode = []                     # Постфікс-код (результат)
-        self.labelCounter = 0                     # Лічильник міток для JMP/JF
+        self.postfixCode = PostfixProgram(self.tableOfVar)  # Постфікс-код (результат)
         self.success = False                      # Прапорець успішності розбору
 
     # ============= ДОПОМІЖНІ МЕТОДИ =============
 
     def generateLabel(self):
-        """Генерує унікальну мітку для переходів"""
-        self.labelCounter += 1
-        return f"m{self.labelCounter}"
+        """Генерує унікальну мітку для переходів (повертає її номер)"""
+        return self.postfixCode.new_label()
+
+    def addToPostfix(self, op, arg=0):
+        """Додає інструкцію до постфікс-коду"""
+        self.postfixCode.emit(op, arg)
+        print(f"  POSTFIX: {self.postfixCode.format_instr(op, arg)}")
+
+    def addConstToPostfix(self, value):
+        """Додає завантаження константи до постфікс-коду"""
+        self.addToPostfix(Op.CONST, self.postfixCode.add_const(value))
 
-    def addToPostfix(self, item):
-        """Додає елемент до постфікс-коду"""
-        self.postfixCode.append(item)
-        print(f"  POSTFIX: {item}")
+    def varSlot(self, ident):
+        """Повертає слот змінної (індекс у таблиці змінних, починаючи з 0)"""
+        return self.tableOfVar[ident][0] - 1
 
     def getSymb(self):
         """Отримує поточний символ з таблиці"""
@@ -139,6 +147,8 @@ class Parser:
         try:
             print('parseProgram()')
             self.parseStatementList()
+            # Мітки переходів → абсолютні адреси (один раз після генерації коду)
+            self.postfixCode.resolve_labels()
             print('\n✓ Parser: Синтаксичний аналіз завершився успішно')
             print('\nТАБЛИЦЯ ЗМІННИХ:')
             for ident, (index, varType, initialized) in self.tableOfVar.items():
@@ -215,7 +225,7 @@ class Parser:
                            (numLine, ident, varType, exprType))
 
         self.setVarInitialized(ident)
-        self.addToPostfix(f'={ident}')
+        self.addToPostfix(Op.STORE, self.varSlot(ident))
         return True
 
     # ============= ВВЕДЕННЯ-ВИВЕДЕННЯ =============
@@ -229,7 +239,7 @@ class Parser:
         # Розбір списку виразів через кому
         while True:
             exprType = self.parseExpression()
-            self.addToPostfix('print')
+            self.addToPostfix(Op.PRINT)
 
             numLine, lex, tok = self.getSymb()
             if lex == ',':
@@ -254,8 +264,7 @@ class Parser:
 
         # Мітка для else або кінця if
         label_else = self.generateLabel()
-        self.addToPostfix(label_else)
-        self.addToPostfix('JF')  # Перехід на else, якщо умова хибна
+        self.addToPostfix(Op.JF, label_else)  # Перехід на else, якщо умова хибна
 
         # Then-блок
         self.parseStatementBlock()
@@ -266,13 +275,12 @@ class Parser:
             self.numRow += 1
             # Мітка для кінця всього if-else
             label_end = self.generateLabel()
-            self.addToPostfix(label_end)
-            self.addToPostfix('JMP')  # Пропустити else
-            self.addToPostfix(f"{label_else}:")  # Початок else
+            self.addToPostfix(Op.JMP, label_end)  # Пропустити else
+            self.addToPostfix(Op.LABEL, label_else)  # Початок else
             self.parseStatementBlock()
-            self.addToPostfix(f"{label_end}:")  # Кінець if-else
+            self.addToPostfix(Op.LABEL, label_end)  # Кінець if-else
         else:
-            self.addToPostfix(f"{label_else}:")  # Кінець if
+            self.addToPostfix(Op.LABEL, label_else)  # Кінець if
 
         return True
 
@@ -286,7 +294,7 @@ class Parser:
 
         # Мітка початку циклу
         label_start = self.generateLabel()
-        self.addToPostfix(f"{label_start}:")
+        self.addToPostfix(Op.LABEL, label_start)
 
         # Умова
         condType = self.parseExpression()
@@ -294,16 +302,14 @@ class Parser:
 
         # Мітка виходу з циклу
         label_end = self.generateLabel()
-        self.addToPostfix(label_end)
-        self.addToPostfix('JF')  # Вихід з циклу, якщо умова хибна
+        self.addToPostfix(Op.JF, label_end)  # Вихід з циклу, якщо умова хибна
 
         # Тіло циклу
         self.parseStatementBlock()
 
         # Повернення на початок циклу
-        self.addToPostfix(label_start)
-        self.addToPostfix('JMP')
-        self.addToPostfix(f"{label_end}:")  # Кінець циклу
+        self.addToPostfix(Op.JMP, label_start)
+        self.addToPostfix(Op.LABEL, label_end)  # Кінець циклу
 
         return True
 
@@ -337,7 +343,7 @@ class Parser:
         # Булева константа (TRUE/FALSE)
         if lex in ('TRUE', 'FALSE'):
             self.numRow += 1
-            self.addToPostfix(lex)
+            self.addConstToPostfix(lex == 'TRUE')
             return 'logical'
 
         # Арифметичний вираз (можливо з порівнянням)
@@ -355,7 +361,7 @@ class Parser:
                 self.failSem('невідповідність типів',
                            (numLine, leftType, relOp, rightType))
 
-            self.addToPostfix(relOp)
+            self.addToPostfix(OPERATOR_OPS[relOp])
             return 'logical'
 
         return leftType
@@ -378,7 +384,7 @@ class Parser:
                     self.failSem('невідповідність типів',
                                (numLine, leftType, op, rightType))
 
-                self.addToPostfix(op)
+                self.addToPostfix(OPERATOR_OPS[op])
             else:
                 break
 
@@ -402,7 +408,7 @@ class Parser:
                     self.failSem('невідповідність типів',
                                (numLine, leftType, op, rightType))
 
-                self.addToPostfix(op)
+                self.addToPostfix(OPERATOR_OPS[op])
             else:
                 break
 
@@ -424,7 +430,7 @@ class Parser:
                 self.failSem('невідповідність типів',
                            (numLine, leftType, '^', rightType))
 
-            self.addToPostfix('^')
+            self.addToPostfix(Op.POW)
 
         return leftType
 
@@ -443,15 +449,15 @@ class Parser:
         # Primary (базовий елемент)
         if tok in ('intnum', 'realnum'):
             # Числова константа
-            self.addToPostfix(lex)
+            self.addConstToPostfix(int(lex) if tok == 'intnum' else float(lex))
             self.numRow += 1
             if hasUnaryMinus:
-                self.addToPostfix('unary-')
+                self.addToPostfix(Op.NEG)
             return 'numeric'
 
         elif tok == 'boolval':
             # Булева константа
-            self.addToPostfix(lex)
+            self.addConstToPostfix(lex == 'TRUE')
             self.numRow += 1
             return 'logical'
 
@@ -463,11 +469,11 @@ class Parser:
                 self.failSem('використання неініціалізованої змінної', (numLine, lex))
 
             varType = self.getVarType(lex)
-            self.addToPostfix(lex)
+            self.addToPostfix(Op.LOAD, self.varSlot(lex))
             self.numRow += 1
 
             if hasUnaryMinus:
-                self.addToPostfix('unary-')
+                self.addToPostfix(Op.NEG)
 
             return varType
 
@@ -476,7 +482,7 @@ class Parser:
             self.numRow += 1
             self.parseToken('(', 'brackets_op')
             self.parseToken(')', 'brackets_op')
-            self.addToPostfix('scan')
+            self.addToPostfix(Op.SCAN)
             return 'numeric'
 
         elif lex == '(':
@@ -486,7 +492,7 @@ class Parser:
             self.parseToken(')', 'brackets_op')
 
             if hasUnaryMinus:
-                self.addToPostfix('unary-')
+                self.addToPostfix(Op.NEG)
 
             return exprType
 
@@ -507,6 +513,5 @@ class Parser:
         """Скидає стан парсера до початкового"""
         self.numRow = 1
         self.tableOfVar = {}
-        self.postfixCode = []
-        self.labelCounter = 0
+        self.postfixCode = PostfixProgram(self.tableOfVar)
         self.success = False
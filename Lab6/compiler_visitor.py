@@ -5,25 +5,32 @@ Visitor для генерації постфікс-коду з AST (Abstract Syn
 
 from RSimpleVisitor import RSimpleVisitor
 from RSimpleParser import RSimpleParser
+from postfix_ir import PostfixProgram, Op, OPERATOR_OPS
 
 
 class RSimpleCompilerVisitor(RSimpleVisitor):
     """Visitor для генерації постфікс-коду з AST"""
 
     def __init__(self):
-        self.postfix_code = []        # Згенерований постфікс-код
         self.variable_table = {}      # Таблиця змінних {ім'я: (індекс, тип, ініціалізована)}
-        self.label_counter = 0        # Лічильник міток для JMP/JF
+        self.postfix_code = PostfixProgram(self.variable_table)  # Згенерований постфікс-код
 
     def generate_label(self):
-        """Генерує унікальну мітку для переходів"""
-        self.label_counter += 1
-        return f"m{self.label_counter}"
+        """Генерує унікальну мітку для переходів (повертає її номер)"""
+        return self.postfix_code.new_label()
 
-    def add_to_postfix(self, item):
-        """Додає елемент до постфікс-коду"""
-        self.postfix_code.append(item)
-        print(f"  POSTFIX: {item}")
+    def add_to_postfix(self, op, arg=0):
+        """Додає інструкцію до постфікс-коду"""
+        self.postfix_code.emit(op, arg)
+        print(f"  POSTFIX: {self.postfix_code.format_instr(op, arg)}")
+
+    def add_const_to_postfix(self, value):
+        """Додає завантаження константи до постфікс-коду"""
+        self.add_to_postfix(Op.CONST, self.postfix_code.add_const(value))
+
+    def var_slot(self, name):
+        """Повертає слот змінної (індекс у таблиці змінних, починаючи з 0)"""
+        return self.variable_table[name][0] - 1
 
     def add_variable(self, name, var_type='numeric'):
         """Додає змінну до таблиці"""
@@ -31,6 +38,15 @@ class RSimpleCompilerVisitor(RSimpleVisitor):
             index = len(self.variable_table) + 1
             self.variable_table[name] = (index, var_type, True)
 
+    # ========== ПРОГРАМА ==========
+
+    def visitProgram(self, ctx: RSimpleParser.ProgramContext):
+        """Обробляє всю програму і розв'язує мітки переходів"""
+        self.visitChildren(ctx)
+        # Мітки переходів → абсолютні адреси (один раз після генерації коду)
+        self.postfix_code.resolve_labels()
+        return None
+
     # ========== ОПЕРАТОРИ (STATEMENTS) ==========
 
     def visitAssignment(self, ctx: RSimpleParser.AssignmentContext):
@@ -41,7 +57,7 @@ class RSimpleCompilerVisitor(RSimpleVisitor):
         # Додаємо змінну до таблиці
         self.add_variable(ident, expr_type)
         # Генеруємо інструкцію присвоювання
-        self.add_to_postfix(f'={ident}')
+        self.add_to_postfix(Op.STORE, self.var_slot(ident))
         return None
 
     def visitOutputStatement(self, ctx: RSimpleParser.OutputStatementContext):
@@ -50,7 +66,7 @@ class RSimpleCompilerVisitor(RSimpleVisitor):
         # Обробляємо кожен вираз у списку
         for expr in expr_list.expression():
             self.visit(expr)
-            self.add_to_postfix('print')
+            self.add_to_postfix(Op.PRINT)
         return None
 
     def visitIfStatement(self, ctx: RSimpleParser.IfStatementContext):
@@ -60,8 +76,7 @@ class RSimpleCompilerVisitor(RSimpleVisitor):
 
         # Мітка для else або кінця if
         label_else = self.generate_label()
-        self.add_to_postfix(label_else)
-        self.add_to_postfix('JF')  # Jump if False (перехід якщо умова хибна)
+        self.add_to_postfix(Op.JF, label_else)  # Jump if False (перехід якщо умова хибна)
 
         # Then-блок (перший блок)
         self.visit(ctx.statementBlock(0))
@@ -70,14 +85,13 @@ class RSimpleCompilerVisitor(RSimpleVisitor):
         if ctx.statementBlock(1):
             # Є else блок
             label_end = self.generate_label()
-            self.add_to_postfix(label_end)
-            self.add_to_postfix('JMP')  # Безумовний перехід (пропустити else)
-            self.add_to_postfix(f"{label_else}:")  # Мітка початку else
+            self.add_to_postfix(Op.JMP, label_end)  # Безумовний перехід (пропустити else)
+            self.add_to_postfix(Op.LABEL, label_else)  # Мітка початку else
             self.visit(ctx.statementBlock(1))
-            self.add_to_postfix(f"{label_end}:")  # Мітка кінця if-else
+            self.add_to_postfix(Op.LABEL, label_end)  # Мітка кінця if-else
         else:
             # Немає else
-            self.add_to_postfix(f"{label_else}:")  # Мітка кінця if
+            self.add_to_postfix(Op.LABEL, label_else)  # Мітка кінця if
 
         return None
 
@@ -85,23 +99,21 @@ class RSimpleCompilerVisitor(RSimpleVisitor):
         """Обробляє цикл while"""
         # Мітка початку циклу (для повернення назад)
         label_start = self.generate_label()
-        self.add_to_postfix(f"{label_start}:")
+        self.add_to_postfix(Op.LABEL, label_start)
 
         # Обробка умови
         self.visit(ctx.expression())
 
         # Мітка виходу з циклу
         label_end = self.generate_label()
-        self.add_to_postfix(label_end)
-        self.add_to_postfix('JF')  # Вихід з циклу, якщо умова хибна
+        self.add_to_postfix(Op.JF, label_end)  # Вихід з циклу, якщо умова хибна
 
         # Тіло циклу
         self.visit(ctx.statementBlock())
 
         # Повернення на початок циклу
-        self.add_to_postfix(label_start)
-        self.add_to_postfix('JMP')  # Безумовний перехід на початок
-        self.add_to_postfix(f"{label_end}:")  # Мітка кінця циклу
+        self.add_to_postfix(Op.JMP, label_start)  # Безумовний перехід на початок
+        self.add_to_postfix(Op.LABEL, label_end)  # Мітка кінця циклу
 
         return None
 
@@ -112,7 +124,7 @@ class RSimpleCompilerVisitor(RSimpleVisitor):
         # Перевірка на булеву константу (TRUE/FALSE)
         if ctx.boolConst():
             value = ctx.boolConst().getText()
-            self.add_to_postfix(value)
+            self.add_const_to_postfix(value == 'TRUE')
             return 'logical'
 
         # Арифметичний вираз (можливо з оператором відношення)
@@ -122,7 +134,7 @@ class RSimpleCompilerVisitor(RSimpleVisitor):
         if ctx.relOp():
             op = ctx.relOp().getText()
             self.visit(ctx.arithmExpression(1))
-            self.add_to_postfix(op)
+            self.add_to_postfix(OPERATOR_OPS[op])
             return 'logical'
 
         return left_type
@@ -136,7 +148,7 @@ class RSimpleCompilerVisitor(RSimpleVisitor):
         for i in range(1, len(ctx.term())):
             op = ctx.getChild(2*i - 1).getText()  # Оператор + або -
             self.visit(ctx.term(i))
-            self.add_to_postfix(op)
+            self.add_to_postfix(OPERATOR_OPS[op])
 
         return 'numeric'
 
@@ -149,7 +161,7 @@ class RSimpleCompilerVisitor(RSimpleVisitor):
         for i in range(1, len(ctx.power())):
             op = ctx.getChild(2*i - 1).getText()  # Оператор * або /
             self.visit(ctx.power(i))
-            self.add_to_postfix(op)
+            self.add_to_postfix(OPERATOR_OPS[op])
 
         return 'numeric'
 
@@ -162,7 +174,7 @@ class RSimpleCompilerVisitor(RSimpleVisitor):
         if ctx.power():
             # Рекурсивний виклик для правої асоціативності
             self.visit(ctx.power())
-            self.add_to_postfix('^')
+            self.add_to_postfix(Op.POW)
 
         return 'numeric'
 
@@ -176,7 +188,7 @@ class RSimpleCompilerVisitor(RSimpleVisitor):
 
         # Якщо був унарний мінус, додаємо відповідну операцію
         if has_minus:
-            self.add_to_postfix('unary-')
+            self.add_to_postfix(Op.NEG)
 
         return 'numeric'
 
@@ -184,16 +196,20 @@ class RSimpleCompilerVisitor(RSimpleVisitor):
         """Обробляє базові елементи: змінні, числа, scan(), вирази в дужках"""
         if ctx.ID():
             # Ідентифікатор (змінна)
-            self.add_to_postfix(ctx.ID().getText())
+            name = ctx.ID().getText()
+            # Змінна без присвоювання все одно отримує слот
+            # (помилку неініціалізованої змінної покаже постфікс-машина)
+            self.add_variable(name)
+            self.add_to_postfix(Op.LOAD, self.var_slot(name))
         elif ctx.INT():
             # Ціле число
-            self.add_to_postfix(ctx.INT().getText())
+            self.add_const_to_postfix(int(ctx.INT().getText()))
         elif ctx.FLOAT():
             # Дробове число
-            self.add_to_postfix(ctx.FLOAT().getText())
+            self.add_const_to_postfix(float(ctx.FLOAT().getText()))
         elif ctx.getText().startswith('scan'):
             # Введення з клавіатури
-            self.add_to_postfix('scan')
+            self.add_to_postfix(Op.SCAN)
         elif ctx.arithmExpression():
             # Вираз у дужках
             self.visit(ctx.arithmExpression())
@@ -6,8 +6,10 @@ from RSimpleParser import RSimpleParser
 from Lab6.compiler_visitor import RSimpleCompilerVisitor
 from cil_generator import CILGenerator
 from Lab5.main import run_ilasm
+from optimizer.pass_manager import optimize, parse_opt_flags, DEFAULT_PASS_BUDGET
 
-def compile_with_antlr(source_file):
+def compile_with_antlr(source_file, opt_level=0, fixpoint=False,
+                       pass_budget=DEFAULT_PASS_BUDGET, opt_options=None):
     """Компілює RSimple програму використовуючи ANTLR4"""
 
     print('='*70)
@@ -50,9 +52,19 @@ def compile_with_antlr(source_file):
     print(f'\n✓ Згенеровано {len(visitor.postfix_code)} інструкцій постфікс-коду')
 
     print('\nПОСТФІКС-КОД:')
-    for item in visitor.postfix_code:
+    for item in visitor.postfix_code.format_code():
         print(f"  {item}")
 
+    postfix_code = visitor.postfix_code
+    if opt_level > 0:
+        print('\n' + '='*70)
+        print('ОПТИМІЗАЦІЯ ПОСТФІКС-КОДУ')
+        print('='*70)
+        postfix_code = optimize(postfix_code, opt_level, fixpoint, pass_budget, opt_options)
+        print(f'\n✓ Інструкцій після оптимізації: {len(postfix_code)}')
+        for item in postfix_code.format_code():
+            print(f"  {item}")
+
     # ========== КРОК 4: ГЕНЕРАЦІЯ CIL-КОДУ ==========
     print('\n' + '='*70)
     print('КРОК 4: ГЕНЕРАЦІЯ CIL-КОДУ')
@@ -63,8 +75,8 @@ def compile_with_antlr(source_file):
     output_file = f'{assembly_name}.il'
 
     cil_gen = CILGenerator(
-        visitor.postfix_code,
-        visitor.variable_table,
+        postfix_code,
+        postfix_code.variable_table,
         assembly_name
     )
     cil_gen.save_to_file(output_file)
@@ -97,10 +109,11 @@ def compile_with_antlr(source_file):
 
 
 if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        print('Використання: python main_antlr.py <файл.my_lang>')
-        print('Приклад: python main_antlr.py test1.my_lang')
+    args, opt_level, fixpoint, pass_budget, opt_options = parse_opt_flags(sys.argv[1:])
+    if len(args) < 1:
+        print('Використання: python main_antlr.py [-O0|-O1|-O2] [--fixpoint] <файл.my_lang>')
+        print('Приклад: python main_antlr.py -O2 test1.my_lang')
         sys.exit(1)
 
-    success = compile_with_antlr(sys.argv[1])
+    success = compile_with_antlr(args[0], opt_level, fixpoint, pass_budget, opt_options)
     sys.exit(0 if success else 1)
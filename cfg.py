@@ -0,0 +1,517 @@
+"""
+Граф потоку керування (CFG) для постфікс-коду
+
+Скомпонована постфікс-програма розбивається на базові блоки - максимальні
+лінійні ділянки коду з одним входом (перша інструкція) та одним виходом
+(остання інструкція). Межі блоків: адреси переходів та інструкції після переходів.
+
+Крім самого графа модуль обчислює домінатори та природні цикли
+(цикли while дають зворотні дуги JMP → початок умови), а також збирає
+граф назад у лінійну програму (linearize) після перетворень.
+Усі побудови працюють за лінійний (майже лінійний для домінаторів) час
+і без рекурсії, тож підходять для програм з мільйонами інструкцій.
+"""
+
+from postfix_ir import Op
+
+_JMP = int(Op.JMP)
+_JF = int(Op.JF)
+_JT = int(Op.JT)
+_BRANCHES = (_JMP, _JF, _JT)
+
+
+class BasicBlock:
+    """
+    Базовий блок
+
+    Атрибути:
+        id: номер блоку (індекс у ControlFlowGraph.blocks)
+        instrs: список інструкцій - кортежів (код операції, операнд),
+                сумісних з Instr; якщо остання - JF/JT/JMP, її операнд -
+                номер цільового блоку (а не адреса)
+        fallthrough: номер блоку, в який потрапляємо без переходу
+                     (None для блоку, що закінчується JMP, і для виходу)
+        labels: імена міток, що вказували на початок блоку
+        preds, succs: попередники та наступники (заповнює compute_edges)
+    """
+
+    __slots__ = ('id', 'instrs', 'fallthrough', 'labels', 'preds', 'succs')
+
+    def __init__(self, block_id, instrs=None, fallthrough=None, labels=None):
+        self.id = block_id
+        self.instrs = instrs if instrs is not None else []
+        self.fallthrough = fallthrough
+        self.labels = labels if labels is not None else []
+        self.preds = []
+        self.succs = []
+
+    @property
+    def terminator(self):
+        """Остання інструкція, якщо це перехід, інакше None"""
+        if self.instrs and self.instrs[-1][0] in _BRANCHES:
+            return self.instrs[-1]
+        return None
+
+    def successors(self):
+        """Обчислює наступників блоку з його інструкцій та fallthrough"""
+        if self.instrs:
+            op, arg = self.instrs[-1]
+            if op == _JMP:
+                return [arg]
+            if op == _JF or op == _JT:
+                if self.fallthrough is None or self.fallthrough == arg:
+                    return [arg]
+                return [self.fallthrough, arg]
+        return [] if self.fallthrough is None else [self.fallthrough]
+
+    def __repr__(self):
+        return f"BasicBlock({self.id}, {len(self.instrs)} instrs, succs={self.succs})"
+
+
+class Loop:
+    """
+    Природний цикл
+
+    Атрибути:
+        header: номер блоку-заголовка (вхід у цикл, для while - умова)
+        blocks: множина номерів блоків циклу (включно із заголовком)
+        latches: блоки, з яких іде зворотна дуга на заголовок
+        exits: дуги виходу з циклу [(блок циклу, блок поза циклом)]
+        parent: найменший охоплюючий цикл або None
+    """
+
+    def __init__(self, header, blocks, latches):
+        self.header = header
+        self.blocks = blocks
+        self.latches = latches
+        self.exits = []
+        self.parent = None
+
+    def __repr__(self):
+        return f"Loop(header={self.header}, blocks={sorted(self.blocks)})"
+
+
+class ControlFlowGraph:
+    """
+    Граф потоку керування постфікс-програми
+
+    Атрибути:
+        program: вихідна програма (джерело констант і таблиці змінних)
+        blocks: список блоків, індекс = номер блоку
+        layout: порядок розміщення блоків у коді (номери блоків)
+        entry: номер вхідного блоку
+        exit: номер порожнього блоку виходу (завжди останній у layout)
+    """
+
+    def __init__(self, program):
+        """
+        Будує граф зі скомпонованої програми
+
+        Args:
+            program: PostfixProgram з розв'язаними мітками
+        """
+        if not program.linked:
+            raise ValueError("CFG будується лише для скомпонованої програми")
+        self.program = program
+        self.blocks = []
+        self._layout = []
+        # Відкладені вставки в layout: {блок: [блоки, що стають перед ним]}
+        self._placed_before = {}
+        self._dom_cache = None
+        self._build(program)
+        self.compute_edges()
+
+    # ========== ПОБУДОВА ==========
+
+    def _build(self, program):
+        """Розбиває код на базові блоки (два лінійні проходи)"""
+        ops = program.ops
+        args = program.args
+        n = len(ops)
+
+        # ========== ПОЧАТКИ БЛОКІВ (LEADERS) ==========
+        leader = bytearray(n + 1)
+        leader[0] = 1
+        leader[n] = 1  # Блок виходу
+        for pc, op in enumerate(ops):
+            if op in _BRANCHES:
+                leader[args[pc]] = 1
+                leader[pc + 1] = 1
+
+        # Адреси початків блоків (останній - блок виходу)
+        starts = [pc for pc in range(n + 1) if leader[pc]]
+        block_at = {pc: block_id for block_id, pc in enumerate(starts)}
+
+        labels = program.labels_by_address()
+
+        # ========== ЗАПОВНЕННЯ БЛОКІВ ==========
+        for block_id, start in enumerate(starts):
+            end = starts[block_id + 1] if block_id + 1 < len(starts) else n
+            # Звичайні кортежі будуються значно швидше за namedtuple
+            instrs = list(zip(ops[start:end], args[start:end]))
+            block = BasicBlock(block_id, instrs, labels=list(labels.get(start, ())))
+            if instrs:
+                op, arg = instrs[-1]
+                if op in _BRANCHES:
+                    instrs[-1] = (op, block_at[arg])
+            if start < n and not _ends_with_jump(block):
+                block.fallthrough = block_id + 1
+            self.blocks.append(block)
+            self.layout.append(block_id)
+
+        self.entry = 0
+        self.exit = len(starts) - 1
+
+    @property
+    def layout(self):
+        """
+        Порядок розміщення блоків
+
+        Вставки place_before() застосовуються тут, одним лінійним проходом
+        при першому читанні: серія вставок (preheader кожного циклу)
+        не перебудовує список на кожній.
+        """
+        if self._placed_before:
+            placed = self._placed_before
+            self._placed_before = {}
+            layout = []
+            for block_id in self._layout:
+                # Вставлені блоки теж можуть мати вставки перед собою
+                stack = [(block_id, False)]
+                while stack:
+                    current, expanded = stack.pop()
+                    before = None if expanded else placed.pop(current, None)
+                    if before is None:
+                        layout.append(current)
+                        continue
+                    stack.append((current, True))
+                    stack.extend((new_id, False) for new_id in reversed(before))
+            self._layout = layout
+        return self._layout
+
+    @layout.setter
+    def layout(self, layout):
+        self._layout = layout
+
+    def place_before(self, block_id, new_ids):
+        """
+        Розміщує нові блоки безпосередньо перед блоком block_id
+
+        Вставка відкладається до наступного читання layout; пізніше
+        вставлені перед тим самим блоком стоять ближче до нього.
+
+        Args:
+            block_id: блок, що вже є в layout (або вставлений раніше)
+            new_ids: номери нових блоків у порядку розміщення
+        """
+        self._placed_before.setdefault(block_id, []).extend(new_ids)
+
+    def compute_edges(self):
+        """Перераховує списки попередників і наступників усіх блоків"""
+        for block_id in self.layout:
+            self.blocks[block_id].preds = []
+        for block_id in self.layout:
+            block = self.blocks[block_id]
+            block.succs = block.successors()
+            for succ in block.succs:
+                self.blocks[succ].preds.append(block_id)
+        self._dom_cache = None
+
+    def update_edges(self, block_ids):
+        """
+        Перераховує вихідні дуги лише заданих блоків (після локальних змін)
+
+        Дешевша за compute_edges, коли змінено кілька блоків великого графа.
+        """
+        for block_id in block_ids:
+            block = self.blocks[block_id]
+            for succ in block.succs:
+                self.blocks[succ].preds.remove(block_id)
+            block.succs = block.successors()
+            for succ in block.succs:
+                self.blocks[succ].preds.append(block_id)
+        self._dom_cache = None
+
+    def new_block(self, instrs=None, fallthrough=None):
+        """Створює новий блок (не додає його в layout)"""
+        block = BasicBlock(len(self.blocks), instrs, fallthrough)
+        self.blocks.append(block)
+        return block
+
+    def insert_preheader(self, loop, instrs=None):
+        """
+        Вставляє перед заголовком циклу новий блок (preheader)
+
+        Усі дуги в заголовок ззовні циклу перенаправляються в preheader,
+        а сам preheader переходить у заголовок. Блок розміщується
+        безпосередньо перед заголовком і додається до охоплюючих циклів.
+
+        Args:
+            loop: цикл Loop
+            instrs: початкові інструкції блоку
+
+        Returns:
+            BasicBlock: новий блок
+        """
+        header = self.blocks[loop.header]
+        block = self.new_block(instrs, fallthrough=loop.header)
+        outside = [pred for pred in header.preds if pred not in loop.blocks]
+        for pred_id in outside:
+            pred = self.blocks[pred_id]
+            if pred.fallthrough == loop.header:
+                pred.fallthrough = block.id
+            terminator = pred.terminator
+            if terminator is not None and terminator[1] == loop.header:
+                pred.instrs[-1] = (terminator[0], block.id)
+            pred.succs = pred.successors()
+        block.preds = outside
+        block.succs = [loop.header]
+        header.preds = [pred for pred in header.preds if pred in loop.blocks]
+        header.preds.append(block.id)
+        if loop.header == self.entry:
+            self.entry = block.id
+        self.place_before(loop.header, [block.id])
+        outer = loop.parent
+        while outer is not None:
+            outer.blocks.add(block.id)
+            outer = outer.parent
+        self._dom_cache = None
+        return block
+
+    # ========== ОБХОДИ ==========
+
+    def reverse_postorder(self):
+        """
+        Повертає досяжні з входу блоки у зворотному post-order
+
+        Обхід у глибину реалізований з явним стеком (без рекурсії)
+        """
+        visited = bytearray(len(self.blocks))
+        order = []
+        stack = [(self.entry, 0)]
+        visited[self.entry] = 1
+        while stack:
+            block_id, index = stack[-1]
+            succs = self.blocks[block_id].succs
+            if index < len(succs):
+                stack[-1] = (block_id, index + 1)
+                succ = succs[index]
+                if not visited[succ]:
+                    visited[succ] = 1
+                    stack.append((succ, 0))
+            else:
+                stack.pop()
+                order.append(block_id)
+        order.reverse()
+        return order
+
+    def reachable(self):
+        """Множина блоків, досяжних з входу"""
+        return set(self.reverse_postorder())
+
+    # ========== ДОМІНАТОРИ ==========
+
+    def dominators(self):
+        """
+        Обчислює безпосередні домінатори (алгоритм Cooper-Harvey-Kennedy)
+
+        Returns:
+            dict: {блок: безпосередній домінатор}; для входу - сам вхід.
+                  Недосяжні блоки відсутні у словнику.
+        """
+        if self._dom_cache is not None:
+            return self._dom_cache[0]
+
+        rpo = self.reverse_postorder()
+        number = {block_id: i for i, block_id in enumerate(rpo)}
+        idom = {self.entry: self.entry}
+
+        def intersect(a, b):
+            while a != b:
+                while number[a] > number[b]:
+                    a = idom[a]
+                while number[b] > number[a]:
+                    b = idom[b]
+            return a
+
+        # Для структурованого коду (if/while) достатньо двох ітерацій
+        changed = True
+        while changed:
+            changed = False
+            for block_id in rpo[1:]:
+                new_idom = None
+                for pred in self.blocks[block_id].preds:
+                    if pred in idom:
+                        new_idom = pred if new_idom is None else intersect(pred, new_idom)
+                if idom.get(block_id) != new_idom:
+                    idom[block_id] = new_idom
+                    changed = True
+
+        # ========== НУМЕРАЦІЯ ДЕРЕВА ДОМІНАТОРІВ ==========
+        # pre/post номери дають перевірку dominates() за O(1)
+        children = {block_id: [] for block_id in rpo}
+        for block_id in rpo[1:]:
+            children[idom[block_id]].append(block_id)
+        pre, post = {}, {}
+        counter = 0
+        stack = [(self.entry, False)]
+        while stack:
+            block_id, done = stack.pop()
+            if done:
+                post[block_id] = counter
+                counter += 1
+                continue
+            pre[block_id] = counter
+            counter += 1
+            stack.append((block_id, True))
+            for child in reversed(children[block_id]):
+                stack.append((child, False))
+
+        self._dom_cache = (idom, children, pre, post)
+        return idom
+
+    def dominator_tree(self):
+        """Повертає {блок: [діти в дереві домінаторів]}"""
+        self.dominators()
+        return self._dom_cache[1]
+
+    def dominates(self, a, b):
+        """True якщо блок a домінує над блоком b (кожен шлях до b проходить через a)"""
+        self.dominators()
+        _, _, pre, post = self._dom_cache
+        if a not in pre or b not in pre:
+            return False
+        return pre[a] <= pre[b] and post[b] <= post[a]
+
+    # ========== ЦИКЛИ ==========
+
+    def loops(self):
+        """
+        Знаходить природні цикли за зворотними дугами (u → h, де h домінує над u)
+
+        Returns:
+            list: цикли Loop, від внутрішніх до зовнішніх
+        """
+        self.dominators()
+        by_header = {}
+        for block_id in self.reverse_postorder():
+            for succ in self.blocks[block_id].succs:
+                if self.dominates(succ, block_id):
+                    by_header.setdefault(succ, []).append(block_id)
+
+        loops = []
+        for header, latches in by_header.items():
+            # Тіло циклу: все, звідки можна дійти до latch, не проходячи header
+            body = {header}
+            stack = [latch for latch in latches if latch != header]
+            body.update(stack)
+            while stack:
+                block_id = stack.pop()
+                for pred in self.blocks[block_id].preds:
+                    if pred not in body:
+                        body.add(pred)
+                        stack.append(pred)
+            loop = Loop(header, body, latches)
+            for block_id in body:
+                for succ in self.blocks[block_id].succs:
+                    if succ not in body:
+                        loop.exits.append((block_id, succ))
+            loops.append(loop)
+
+        # ========== ВКЛАДЕНІСТЬ ==========
+        # Цикли з різними заголовками або не перетинаються, або вкладені.
+        # Від менших до більших: кожен блок пам'ятає найбільший з уже
+        # розглянутих циклів, що його містить; цей цикл ще без батька, і
+        # перший більший цикл, що містить блок, і є його батьком. Загальний
+        # час - сума розмірів тіл, як і побудова самих тіл.
+        loops.sort(key=lambda loop: len(loop.blocks))
+        outermost = {}
+        for loop in loops:
+            for block_id in loop.blocks:
+                inner = outermost.get(block_id)
+                if inner is not None and inner.parent is None:
+                    inner.parent = loop
+                outermost[block_id] = loop
+        return loops
+
+    # ========== ЗБИРАННЯ ПРОГРАМИ ==========
+
+    def linearize(self):
+        """
+        Збирає граф назад у скомпоновану програму
+
+        Блоки розміщуються в порядку layout; якщо fallthrough блоку не є
+        наступним у layout, додається JMP. Мітки отримують лише блоки,
+        на які є переходи (перевага - їх попереднім іменам).
+
+        Returns:
+            PostfixProgram: нова програма зі спільними константами та змінними
+        """
+        layout = [block_id for block_id in self.layout if block_id != self.exit]
+        layout.append(self.exit)
+
+        # ========== ПЕРШИЙ ПРОХІД: АДРЕСИ БЛОКІВ ==========
+        address = {}
+        extra_jump = {}
+        pc = 0
+        for i, block_id in enumerate(layout):
+            block = self.blocks[block_id]
+            address[block_id] = pc
+            pc += len(block.instrs)
+            next_id = layout[i + 1] if i + 1 < len(layout) else None
+            if (block.fallthrough is not None and block.fallthrough != next_id
+                    and not _ends_with_jump(block)):
+                extra_jump[block_id] = block.fallthrough
+                pc += 1
+
+        # ========== ДРУГИЙ ПРОХІД: КОД ==========
+        program = self.program.derive()
+        targets = set()
+        for block_id in layout:
+            block = self.blocks[block_id]
+            for op, arg in block.instrs:
+                if op in _BRANCHES:
+                    targets.add(arg)
+                    arg = address[arg]
+                program.emit(op, arg)
+            if block_id in extra_jump:
+                targets.add(extra_jump[block_id])
+                program.emit(Op.JMP, address[extra_jump[block_id]])
+
+        # ========== МІТКИ ==========
+        # Нові імена не повинні збігатися з жодним існуючим
+        reserved = {name for block in self.blocks for name in block.labels}
+        for block_id in layout:
+            if block_id not in targets:
+                continue
+            labels = self.blocks[block_id].labels
+            if labels and labels[0] not in program.labels:
+                name = labels[0]
+            else:
+                name = program.label_name(program.new_label())
+                while name in reserved or name in program.labels:
+                    name = program.label_name(program.new_label())
+            program.labels[name] = address[block_id]
+
+        program.linked = True
+        return program
+
+    def dump(self):
+        """Текстове представлення графа (для налагодження)"""
+        var_names = self.program.var_names()
+        lines = []
+        for block_id in self.layout:
+            block = self.blocks[block_id]
+            names = f" ({', '.join(block.labels)})" if block.labels else ''
+            lines.append(f"B{block_id}{names}: preds={block.preds} succs={block.succs}")
+            for op, arg in block.instrs:
+                if op in _BRANCHES:
+                    lines.append(f"    {Op(op).name} B{arg}")
+                else:
+                    lines.append(f"    {self.program.format_instr(op, arg, var_names)}")
+        return lines
+
+
+def _ends_with_jump(block):
+    """True якщо блок закінчується безумовним переходом"""
+    return bool(block.instrs) and block.instrs[-1][0] == _JMP
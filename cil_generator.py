@@ -3,6 +3,44 @@
 CIL = Common Intermediate Language (проміжна мова .NET)
 """
 
+from definite_assignment import definite_assignment
+from postfix_ir import Op
+from type_inference import infer_types
+
+# Перехід, що виконується, коли порівняння хибне (для пари "порівняння JF").
+# Форми .un переходять і для невпорядкованих операндів (NaN) - так само,
+# як хибне порівняння в постфікс-машині
+_BRANCH_IF_FALSE = {
+    Op.LT: 'bge.un',
+    Op.LE: 'bgt.un',
+    Op.GT: 'ble.un',
+    Op.GE: 'blt.un',
+    Op.EQ: 'bne.un',
+    Op.NE: 'beq',
+}
+
+# Перехід, що виконується, коли порівняння істинне (для пари "порівняння JT").
+# Упорядковані форми не переходять для NaN, а bne.un переходить - як і
+# результат порівняння в постфікс-машині
+_BRANCH_IF_TRUE = {
+    Op.LT: 'blt',
+    Op.LE: 'ble',
+    Op.GT: 'bgt',
+    Op.GE: 'bge',
+    Op.EQ: 'beq',
+    Op.NE: 'bne.un',
+}
+
+# Перехід за хибним порівнянням цілих (int32): знакові форми
+_BRANCH_IF_FALSE_INT = {
+    Op.LT: 'bge',
+    Op.LE: 'bgt',
+    Op.GT: 'ble',
+    Op.GE: 'blt',
+    Op.EQ: 'bne.un',
+    Op.NE: 'beq',
+}
+
 class CILGenerator:
     """Генератор CIL-коду з постфіксної нотації"""
 
@@ -11,7 +49,7 @@ class CILGenerator:
         Ініціалізація генератора
 
         Args:
-            postfix_code: список інструкцій у постфіксній нотації
+            postfix_code: постфікс-програма (PostfixProgram)
             variable_table: таблиця змінних {ім'я: (індекс, тип, ініціалізована)}
             assembly_name: ім'я збірки (без розширення .exe)
         """
@@ -23,8 +61,21 @@ class CILGenerator:
         self.assembly_name = assembly_name
         # Масив для збору згенерованих рядків CIL-коду
         self.cil_code = []
-        # Відображення міток постфіксу на позиції в CIL (для переходів)
-        self.label_mapping = {}
+        # Допоміжна локальна змінна float64 для powi (основа степеня)
+        self.scratch_slot = None
+        if Op.POWI in postfix_code.ops:
+            self.scratch_slot = len(variable_table)
+        # Лічильник власних міток sqrt (-inf обробляється окремою гілкою)
+        self.sqrt_count = 0
+        # Змінні, які можуть читатися до присвоєння: лише їх обнуляємо явно,
+        # решта .locals не ініціалізується
+        _, self.unassigned = definite_assignment(postfix_code)
+        # Типи значень, якщо в програмі є цілі змінні (прохід integer-types):
+        # де потрібні conv.r4 і які операції виконуються над int32
+        # (обчислені проходом або, для завантаженої з файлу програми, тут)
+        self.types = None
+        if any(var_type == 'int' for _, var_type, _ in variable_table.values()):
+            self.types = postfix_code.value_types or infer_types(postfix_code)
 
     def generate(self):
         """
@@ -110,6 +161,9 @@ class CILGenerator:
             ""  # Порожній рядок перед інструкціями
         ])
 
+        # Обнулення змінних, присвоєння яких не доведене
+        self._generate_zero_init()
+
         # Генерація CIL-інструкцій з постфікс-коду
         self._generate_instructions()
 
@@ -124,36 +178,49 @@ class CILGenerator:
     def _generate_locals(self):
         """Генерує оголошення локальних змінних"""
         # Якщо немає змінних, не генеруємо секцію .locals
-        if not self.variable_table:
+        if not self.variable_table and self.scratch_slot is None:
             return
 
         # Початок секції локальних змінних
-        # .locals init - ініціалізує змінні нулями
-        self.cil_code.append("    .locals init (")
+        # Без init: кожну змінну присвоєно до читання на всіх шляхах
+        # (аналіз визначеного присвоєння), решту обнуляє _generate_zero_init
+        self.cil_code.append("    .locals (")
 
         # Сортуємо змінні за індексом для правильного порядку
         sorted_vars = sorted(self.variable_table.items(),
                            key=lambda x: x[1][0])
 
         # Генеруємо оголошення кожної змінної
-        for i, (ident, (index, var_type, _)) in enumerate(sorted_vars):
+        lines = []
+        for ident, (index, var_type, _) in sorted_vars:
             # Конвертуємо тип RSimple в тип CIL
             cil_type = self._convert_type_to_cil(var_type)
             # Робимо ім'я безпечним (якщо це ключове слово CIL)
             safe_ident = self._make_safe_identifier(ident)
             # Формуємо рядок оголошення: [індекс] тип ім'я
-            line = f"      [{index-1}] {cil_type} {safe_ident}"
-
-            # Додаємо кому після всіх змінних крім останньої
-            if i < len(sorted_vars) - 1:
-                line += ","
+            lines.append(f"      [{index-1}] {cil_type} {safe_ident}")
+        # Службова змінна для powi - після змінних програми
+        if self.scratch_slot is not None:
+            lines.append(f"      [{self.scratch_slot}] float64 powi$base")
 
-            # Додаємо рядок до коду
-            self.cil_code.append(line)
+        # Кома після всіх змінних крім останньої
+        self.cil_code.append(",\n".join(lines))
 
         # Закриваємо секцію .locals
         self.cil_code.append("    )")
 
+    def _generate_zero_init(self):
+        """Обнуляє змінні, які можуть читатися до присвоєння (як .locals init)"""
+        for index, var_type, _ in sorted(self.variable_table.values()):
+            slot = index - 1
+            if not self.unassigned >> slot & 1:
+                continue
+            if self._convert_type_to_cil(var_type) == 'float32':
+                self.cil_code.append("    ldc.r4 0.0")
+            else:
+                self.cil_code.append("    ldc.i4.0")
+            self.cil_code.append(f"    stloc.{slot}" if slot <= 3 else f"    stloc {slot}")
+
     def _make_safe_identifier(self, ident):
         """
         Робить ідентифікатор безпечним для CIL (уникає ключових слів)
@@ -213,147 +280,105 @@ class CILGenerator:
 
     def _generate_instructions(self):
         """Генерує CIL-інструкції з постфікс-коду"""
-        # Перший прохід: збираємо інформацію про мітки
-        self._collect_labels()
-
-        # Другий прохід: генерація інструкцій
-        # Лічильник для проходу по постфікс-коду
-        i = 0
-        while i < len(self.postfix_code):
-            # Беремо поточний елемент
-            item = self.postfix_code[i]
-
-            # Перевіряємо чи це рядок
-            if isinstance(item, str):
-                # Перевіряємо чи це мітка (закінчується на ':')
-                if item.endswith(':'):
-                    # Видаляємо ':' щоб отримати ім'я мітки
-                    label_name = item[:-1]
-                    # Додаємо мітку в CIL-код
-                    self.cil_code.append(f"    {label_name}:")
+        code = self.postfix_code
+        # Мітки зберігаються окремо від коду: {адреса: [імена міток]}
+        self.labels_by_address = code.labels_by_address()
+        n = len(code)
+        types = self.types
+        fused = False
+        # Прохід по інструкціям: код операції та операнд
+        for pc, (op, arg) in enumerate(zip(code.ops, code.args)):
+            # Додаємо в CIL-код мітки, що вказують на цю інструкцію
+            self._generate_labels(pc)
+            if fused:
+                # JF вже згенеровано разом з порівнянням
+                fused = False
+                continue
+            int_op = types is not None and types.int_op[pc]
+            # Ціле значення на вершині стеку, яке операція бере як float32
+            if types is not None and types.convert_before[pc]:
+                self.cil_code.append("    conv.r4")
+            # Порівняння + JF/JT → одна інструкція умовного переходу
+            # (якщо на JF/JT немає власної мітки)
+            if (op in _BRANCH_IF_FALSE and pc + 1 < n and code.ops[pc + 1] in (Op.JF, Op.JT)
+                    and pc + 1 not in self.labels_by_address):
+                target = self.labels_by_address[code.args[pc + 1]][0]
+                if code.ops[pc + 1] == Op.JT:
+                    branch = _BRANCH_IF_TRUE[op]
+                elif int_op:
+                    branch = _BRANCH_IF_FALSE_INT[op]
                 else:
-                    # Це інструкція - генеруємо відповідний CIL-код
-                    # Передаємо індекс для обробки JF/JMP
-                    self._generate_instruction(item, i)
-
-            # Переходимо до наступного елемента
-            i += 1
-
-    def _collect_labels(self):
-        """Збирає інформацію про мітки (перший прохід)"""
-        # Лічильник інструкцій (не міток)
-        instruction_count = 0
-        # Проходимо по всьому постфікс-коду
-        for item in self.postfix_code:
-            # Перевіряємо чи це мітка
-            if isinstance(item, str) and item.endswith(':'):
-                # Видаляємо ':' щоб отримати ім'я мітки
-                label_name = item[:-1]
-                # Зберігаємо позицію мітки
-                self.label_mapping[label_name] = instruction_count
+                    branch = _BRANCH_IF_FALSE[op]
+                self.cil_code.append(f"    {branch} {target}")
+                fused = True
+                continue
+            # Генеруємо відповідний CIL-код
+            if op == Op.CONST and int_op:
+                # Стала цілої операції - без conv.r4
+                self._generate_int_const(code.consts[arg])
             else:
-                # Це інструкція, збільшуємо лічильник
-                instruction_count += 1
-
-    def _generate_instruction(self, instr, index=0):
+                self._generate_instruction(op, arg)
+            # Ціле значення, яке далі використовується як float32
+            if types is not None and types.convert_after[pc]:
+                self.cil_code.append("    conv.r4")
+        # Мітки в кінці програми (перед ret)
+        self._generate_labels(len(code))
+
+    def _generate_labels(self, pc):
+        """Генерує мітки, що вказують на адресу pc"""
+        for name in self.labels_by_address.get(pc, ()):
+            self.cil_code.append(f"    {name}:")
+
+    def _generate_instruction(self, op, arg):
         """
         Генерує одну CIL-інструкцію з постфікс-інструкції
 
         Args:
-            instr: постфікс-інструкція (число, змінна, оператор тощо)
-            index: індекс інструкції в постфікс-коді (для JF/JMP)
+            op: код операції (Op)
+            arg: операнд (індекс константи, слот змінної або адреса переходу)
         """
 
-        # ========== ЧИСЛОВІ КОНСТАНТИ ==========
-        if self._is_number(instr):
-            # Перевіряємо чи це дробове число
-            if '.' in instr:
-                # Завантажити дробову константу на стек
-                # ldc.r4 = load constant real 4-byte (float32)
-                self.cil_code.append(f"    ldc.r4 {instr}")
-            else:
-                # Це ціле число
-                value = int(instr)
-                # Оптимізація для малих чисел
-                if -1 <= value <= 8:
-                    # ldc.i4.0, ldc.i4.1, ... ldc.i4.8, ldc.i4.m1 (-1)
-                    # Коротша форма для чисел від -1 до 8
-                    self.cil_code.append(f"    ldc.i4.{value}" if value >= 0 else f"    ldc.i4.m1")
-                elif -128 <= value <= 127:
-                    # ldc.i4.s = load constant int32 short form (1 байт)
-                    # Для чисел від -128 до 127
-                    self.cil_code.append(f"    ldc.i4.s {value}")
-                else:
-                    # ldc.i4 = load constant int32 (повна форма, 4 байти)
-                    self.cil_code.append(f"    ldc.i4 {value}")
-                # ВАЖЛИВО: конвертуємо int32 → float32
-                # conv.r4 = convert to float32
-                # Потрібно бо всі числа в RSimple - float
-                self.cil_code.append(f"    conv.r4")
-
-        # ========== БУЛЕВІ КОНСТАНТИ ==========
-        elif instr in ('TRUE', 'FALSE'):
-            # TRUE → 1, FALSE → 0
-            value = '1' if instr == 'TRUE' else '0'
-            # Завантажити 0 або 1 на стек
-            self.cil_code.append(f"    ldc.i4.{value}")
+        # ========== КОНСТАНТИ ==========
+        if op == Op.CONST:
+            self._generate_const(self.postfix_code.consts[arg])
 
         # ========== ЗМІННІ (завантаження значення) ==========
-        elif instr in self.variable_table:
-            # Отримуємо індекс змінної (віднімаємо 1, бо індекси в CIL з 0)
-            var_index = self.variable_table[instr][0] - 1
-            # Отримуємо тип змінної
-            var_type = self.variable_table[instr][1]
-            # Робимо ім'я безпечним
-            safe_ident = self._make_safe_identifier(instr)
-
+        elif op == Op.LOAD:
+            # Слот змінної = індекс у таблиці змінних - 1 (індекси в CIL з 0)
             # ldloc = load local variable (завантажити локальну змінну)
             # Використовуємо короткі форми для перших 4 змінних
-            if var_index <= 3:
+            if arg <= 3:
                 # ldloc.0, ldloc.1, ldloc.2, ldloc.3 (коротша форма)
-                self.cil_code.append(f"    ldloc.{var_index}")
+                self.cil_code.append(f"    ldloc.{arg}")
             else:
                 # ldloc N (повна форма для індексів >= 4)
-                self.cil_code.append(f"    ldloc {var_index}")
-
-        # ========== МІТКИ ДЛЯ ПЕРЕХОДІВ ==========
-        elif instr.startswith('m') and instr[1:].isdigit():
-            # Це мітка для JMP/JF (наприклад, "m1", "m2")
-            # Не генеруємо код, мітки обробляються окремо
-            pass
+                self.cil_code.append(f"    ldloc {arg}")
 
         # ========== ПРИСВОЮВАННЯ ==========
-        elif instr.startswith('='):
-            # Видаляємо '=' щоб отримати ім'я змінної
-            var_name = instr[1:]
-            # Отримуємо індекс змінної
-            var_index = self.variable_table[var_name][0] - 1
-            # Отримуємо тип змінної
-            var_type = self.variable_table[var_name][1]
-
+        elif op == Op.STORE:
             # stloc = store local variable (зберегти в локальну змінну)
             # Береже верхній елемент стеку в змінну
-            if var_index <= 3:
+            if arg <= 3:
                 # stloc.0, stloc.1, stloc.2, stloc.3 (коротша форма)
-                self.cil_code.append(f"    stloc.{var_index}")
+                self.cil_code.append(f"    stloc.{arg}")
             else:
                 # stloc N (повна форма)
-                self.cil_code.append(f"    stloc {var_index}")
+                self.cil_code.append(f"    stloc {arg}")
 
         # ========== АРИФМЕТИЧНІ ОПЕРАЦІЇ ==========
-        elif instr == '+':
+        elif op == Op.ADD:
             # add = додавання (бере 2 значення зі стеку, кладе результат)
             self.cil_code.append("    add")
-        elif instr == '-':
+        elif op == Op.SUB:
             # sub = віднімання
             self.cil_code.append("    sub")
-        elif instr == '*':
+        elif op == Op.MUL:
             # mul = множення
             self.cil_code.append("    mul")
-        elif instr == '/':
+        elif op == Op.DIV:
             # div = ділення
             self.cil_code.append("    div")
-        elif instr == '^':
+        elif op == Op.POW:
             # Для степеня використовуємо Math.Pow(base, exponent)
             # На стеку: [основа(float32), показник(float32)]
             # Math.Pow приймає: (float64, float64)
@@ -364,35 +389,48 @@ class CILGenerator:
                 # conv.r4 = конвертуємо результат float64 назад у float32
                 "    conv.r4"
             ])
-        elif instr == 'unary-':
+        elif op == Op.NEG:
             # neg = унарний мінус (змінює знак числа на стеку)
             self.cil_code.append("    neg")
+        elif op == Op.SQRT:
+            self._generate_sqrt()
+        elif op == Op.FLOOR:
+            # Округлення вниз через Math.Floor (float32 → float64 → float32)
+            self.cil_code.extend([
+                "    call float64 [mscorlib]System.Math::Floor(float64)",
+                "    conv.r4"
+            ])
+        elif op == Op.POWI:
+            self._generate_powi(arg)
+        elif op == Op.DUP:
+            # dup = дублювати вершину стеку (повторне використання значення)
+            self.cil_code.append("    dup")
 
         # ========== ОПЕРАТОРИ ПОРІВНЯННЯ ==========
-        elif instr == '<':
+        elif op == Op.LT:
             # clt = compare less than (a < b → 1, інакше → 0)
             self.cil_code.append("    clt")
-        elif instr == '>':
+        elif op == Op.GT:
             # cgt = compare greater than (a > b → 1, інакше → 0)
             self.cil_code.append("    cgt")
-        elif instr == '<=':
+        elif op == Op.LE:
             # a <= b еквівалентно !(a > b)
             self.cil_code.extend([
                 "    cgt",      # a > b
                 "    ldc.i4.0", # завантажити 0
                 "    ceq"       # (a > b) == 0, тобто a <= b
             ])
-        elif instr == '>=':
+        elif op == Op.GE:
             # a >= b еквівалентно !(a < b)
             self.cil_code.extend([
                 "    clt",      # a < b
                 "    ldc.i4.0", # завантажити 0
                 "    ceq"       # (a < b) == 0, тобто a >= b
             ])
-        elif instr == '==':
+        elif op == Op.EQ:
             # ceq = compare equal (a == b → 1, інакше → 0)
             self.cil_code.append("    ceq")
-        elif instr == '!=':
+        elif op == Op.NE:
             # a != b еквівалентно !(a == b)
             self.cil_code.extend([
                 "    ceq",      # a == b
@@ -401,26 +439,27 @@ class CILGenerator:
             ])
 
         # ========== ПЕРЕХОДИ (JUMP) ==========
-        elif instr == 'JF':
+        elif op == Op.JF:
             # JF = Jump if False (перехід якщо умова хибна)
-            # Отримуємо мітку перед JF
-            label = self._get_label_before(index)
             # brfalse = branch if false (перехід якщо 0 на стеку)
-            self.cil_code.append(f"    brfalse {label}")
+            self.cil_code.append(f"    brfalse {self.labels_by_address[arg][0]}")
+
+        elif op == Op.JT:
+            # JT = Jump if True (перехід якщо умова істинна)
+            # brtrue = branch if true (перехід якщо не 0 на стеку)
+            self.cil_code.append(f"    brtrue {self.labels_by_address[arg][0]}")
 
-        elif instr == 'JMP':
+        elif op == Op.JMP:
             # JMP = Jump (безумовний перехід)
-            # Отримуємо мітку перед JMP
-            label = self._get_label_before(index)
             # br = branch (безумовний перехід)
-            self.cil_code.append(f"    br {label}")
+            self.cil_code.append(f"    br {self.labels_by_address[arg][0]}")
 
         # ========== ВВЕДЕННЯ-ВИВЕДЕННЯ ==========
-        elif instr == 'print':
+        elif op == Op.PRINT:
             # Виведення значення зі стеку
             self._generate_print_instruction()
 
-        elif instr == 'scan':
+        elif op == Op.SCAN:
             # Введення з клавіатури
             self.cil_code.extend([
                 # Console.ReadLine() - читає рядок з консолі
@@ -429,25 +468,96 @@ class CILGenerator:
                 "    call float32 [mscorlib]System.Convert::ToSingle(string)"
             ])
 
-    def _get_label_before(self, index):
+    def _generate_const(self, value):
         """
-        Отримує мітку, що знаходиться перед поточною інструкцією
+        Генерує завантаження константи з пулу констант
 
         Args:
-            index: індекс поточної інструкції в постфікс-коді
+            value: int, float або bool
+        """
+        # ========== БУЛЕВІ КОНСТАНТИ ==========
+        if isinstance(value, bool):
+            # TRUE → 1, FALSE → 0
+            self.cil_code.append(f"    ldc.i4.{int(value)}")
+
+        # ========== ЦІЛІ КОНСТАНТИ ==========
+        elif isinstance(value, int):
+            self._generate_int_const(value)
+            # ВАЖЛИВО: конвертуємо int32 → float32
+            # conv.r4 = convert to float32
+            # Потрібно бо всі числа в RSimple - float
+            self.cil_code.append(f"    conv.r4")
+
+        # ========== ДРОБОВІ КОНСТАНТИ ==========
+        else:
+            # Завантажити дробову константу на стек
+            # ldc.r4 = load constant real 4-byte (float32)
+            self.cil_code.append(f"    ldc.r4 {value!r}")
+
+    def _generate_int_const(self, value):
+        """Генерує завантаження цілої сталої як int32"""
+        # Оптимізація для малих чисел
+        if -1 <= value <= 8:
+            # ldc.i4.0, ldc.i4.1, ... ldc.i4.8, ldc.i4.m1 (-1)
+            # Коротша форма для чисел від -1 до 8
+            self.cil_code.append(f"    ldc.i4.{value}" if value >= 0 else f"    ldc.i4.m1")
+        elif -128 <= value <= 127:
+            # ldc.i4.s = load constant int32 short form (1 байт)
+            # Для чисел від -128 до 127
+            self.cil_code.append(f"    ldc.i4.s {value}")
+        else:
+            # ldc.i4 = load constant int32 (повна форма, 4 байти)
+            self.cil_code.append(f"    ldc.i4 {value}")
+
+    def _generate_sqrt(self):
+        """
+        Генерує a ^ 0.5 через Math.Sqrt з результатами Math.Pow(a, 0.5)
 
-        Returns:
-            str: ім'я мітки або "unknown_label"
+        Sqrt(-0.0) = -0.0 і Sqrt(-inf) = NaN, а Pow дає +0.0 і +inf:
+        додавання +0.0 перетворює -0.0 на +0.0, а -inf обробляється
+        окремою гілкою (neg дає +inf).
+        """
+        self.sqrt_count += 1
+        inf_label = f"sqrt{self.sqrt_count}_inf"
+        end_label = f"sqrt{self.sqrt_count}_end"
+        self.cil_code.extend([
+            "    conv.r8",
+            "    ldc.r8 0.0",
+            "    add",
+            "    dup",
+            "    call bool [mscorlib]System.Double::IsNegativeInfinity(float64)",
+            f"    brtrue {inf_label}",
+            "    call float64 [mscorlib]System.Math::Sqrt(float64)",
+            f"    br {end_label}",
+            f"    {inf_label}:",
+            "    neg",
+            f"    {end_label}:",
+            "    conv.r4",
+        ])
+
+    def _generate_powi(self, exponent):
+        """
+        Генерує a ^ exponent множенням (зліва направо за бітами показника)
+
+        Множення виконуються у float64 з одним округленням до float32
+        в кінці; проміжні округлення double можуть зрідка дати інший
+        float32, ніж Math.Pow + conv.r4.
+
+        Args:
+            exponent: цілий показник степеня (>= 2)
         """
-        # Перевіряємо чи є попередній елемент
-        if index > 0:
-            # Беремо попередній елемент з постфікс-коду
-            prev_item = self.postfix_code[index - 1]
-            # Перевіряємо чи це мітка (починається з 'm' і містить цифри)
-            if isinstance(prev_item, str) and prev_item.startswith('m') and prev_item[1:].isdigit():
-                return prev_item
-        # Якщо мітки не знайдено, повертаємо заглушку
-        return "unknown_label"
+        self.cil_code.extend([
+            "    conv.r8",
+            f"    stloc {self.scratch_slot}",
+            f"    ldloc {self.scratch_slot}",
+        ])
+        for bit in bin(exponent)[3:]:
+            # r = r * r
+            self.cil_code.extend(["    dup", "    mul"])
+            if bit == '1':
+                # r = r * a
+                self.cil_code.extend([f"    ldloc {self.scratch_slot}", "    mul"])
+        self.cil_code.append("    conv.r4")
 
     def _generate_print_instruction(self):
         """Генерує інструкції для виведення значення на екран"""
@@ -460,24 +570,6 @@ class CILGenerator:
             "    call void [mscorlib]System.Console::WriteLine(object)"
         ])
 
-    def _is_number(self, s):
-        """
-        Перевіряє чи є рядок числом
-
-        Args:
-            s: рядок для перевірки
-
-        Returns:
-            bool: True якщо s - число, False інакше
-        """
-        try:
-            # Спроба конвертувати в float
-            float(s)
-            return True
-        except:
-            # Якщо конвертація не вдалася - це не число
-            return False
-
     def save_to_file(self, filename):
         """
         Зберігає згенерований CIL-код у файл
@@ -505,7 +597,7 @@ def postfix_to_cil(postfix_code, variable_table, assembly_name="test1", output_f
     Конвертує постфікс-код у CIL
 
     Args:
-        postfix_code: список інструкцій у постфіксній нотації
+        postfix_code: постфікс-програма (PostfixProgram)
         variable_table: таблиця змінних
         assembly_name: ім'я збірки
         output_file: файл для збереження (якщо None, використовується assembly_name.il)
@@ -0,0 +1,88 @@
+"""
+Аналіз визначеного присвоєння (definite assignment)
+
+Прямий аналіз потоку даних над CFG: змінна визначено присвоєна в точці
+програми, якщо на кожному шляху від входу до цієї точки є її присвоєння.
+
+    IN[вхід] = ∅
+    IN[b]    = ∩ OUT[p] по всіх попередниках p
+    OUT[b]   = IN[b] ∪ {змінні, присвоєні в b}
+
+Множини - бітові маски за слотами змінних. Завантаження змінної, присвоєння
+якої доведено, не потребує перевірки під час виконання (постфікс-машина)
+і не читає нуль з .locals init (генератор CIL).
+"""
+
+from cfg import ControlFlowGraph
+from postfix_ir import Op
+
+_LOAD = int(Op.LOAD)
+_STORE = int(Op.STORE)
+
+
+def definite_assignment(program):
+    """
+    Знаходить завантаження змінних, присвоєних на всіх шляхах до них
+
+    Args:
+        program: скомпонована постфікс-програма
+
+    Returns:
+        tuple: (bytearray з 1 для кожної адреси LOAD з доведеним присвоєнням,
+                бітова маска змінних, які можуть читатися до присвоєння)
+    """
+    proven = bytearray(len(program))
+    if not len(program):
+        return proven, 0
+    graph = ControlFlowGraph(program)
+
+    # Адреси початків блоків (щойно побудований граф - у порядку коду)
+    starts = {}
+    pc = 0
+    for block_id in graph.layout:
+        starts[block_id] = pc
+        pc += len(graph.blocks[block_id].instrs)
+
+    gen = {}
+    for block_id in graph.layout:
+        mask = 0
+        for op, arg in graph.blocks[block_id].instrs:
+            if op == _STORE:
+                mask |= 1 << arg
+        gen[block_id] = mask
+
+    # ========== НЕРУХОМА ТОЧКА ==========
+    # Недосяжні попередники не обмежують перетин (OUT = усі змінні)
+    order = graph.reverse_postorder()
+    out = dict.fromkeys(order, -1)
+    changed = True
+    while changed:
+        changed = False
+        for block_id in order:
+            mask = 0 if block_id == graph.entry else _meet(graph, block_id, out)
+            mask |= gen[block_id]
+            if mask != out[block_id]:
+                out[block_id] = mask
+                changed = True
+
+    # ========== ЗАВАНТАЖЕННЯ ==========
+    unassigned = 0
+    for block_id in order:
+        mask = 0 if block_id == graph.entry else _meet(graph, block_id, out)
+        for pc, (op, arg) in enumerate(graph.blocks[block_id].instrs, starts[block_id]):
+            if op == _LOAD:
+                if mask >> arg & 1:
+                    proven[pc] = 1
+                else:
+                    unassigned |= 1 << arg
+            elif op == _STORE:
+                mask |= 1 << arg
+    return proven, unassigned
+
+
+def _meet(graph, block_id, out):
+    """Перетин OUT досяжних попередників"""
+    mask = -1
+    for pred in graph.blocks[block_id].preds:
+        mask &= out.get(pred, -1)
+    return mask
@@ -0,0 +1,296 @@
+"""
+Розміщення базових блоків (block layout)
+
+Блоки переставляються так, щоб імовірний наступник кожного блоку йшов
+у коді одразу за ним: перехід на нього стає проходом без переходу
+(fallthrough), JMP на наступний блок зникає, а умовний перехід за
+потреби обертається (JF ↔ JT).
+
+    1. Вага дуги u → v = частота u * імовірність переходу u → v.
+       Частота блоку - LOOP_WEIGHT^глибина вкладеності в цикли.
+       Імовірності - статичні евристики (Ball-Larus):
+         - дуга, що лишається в циклі, імовірніша за вихід з нього;
+         - a == b частіше хибне, a != b - істинне;
+         - інакше 50/50 (перевага - поточному порядку).
+       Якщо задано профіль виконання, імовірності умовних переходів
+       беруться з нього.
+    2. Ланцюжки (Pettis-Hansen): дуги від найважчої; дуга u → v зливає
+       ланцюжок, що закінчується на u, з ланцюжком, що починається з v.
+    3. Ланцюжок входу йде першим, блок виходу - останнім, решта - за
+       найважчою дугою з кінця попереднього ланцюжка або в порядку
+       початкового коду.
+
+Для циклу while це дає обертання (loop rotation):
+
+    m1: cond JF m2 body JMP m1 m2:   →   JMP m1 m3: body m1: cond JT m3 m2:
+
+замість двох переходів на ітерацію (JF, що не виконується, і JMP назад)
+лишається один JT; JMP на перевірку виконується один раз при вході.
+Граф потоку керування при цьому не змінюється.
+
+Профіль (параметр 'layout-profile') - файл, записаний постфікс-машиною
+(python -m postfix_translator run prog.psmb --profile=FILE), з лічильниками
+умовних переходів за адресами коду, зібраного з тими самими параметрами
+без профілю. Прохід спершу повторює статичне розміщення, щоб зіставити
+адреси з блоками; записи, що не вказують на умовний перехід, ігноруються.
+"""
+
+from cfg import ControlFlowGraph
+from postfix_ir import Op
+from postfix_translator import load_branch_profile
+
+_JMP = int(Op.JMP)
+_JF = int(Op.JF)
+_JT = int(Op.JT)
+_EQ = int(Op.EQ)
+_NE = int(Op.NE)
+
+# Параметри статичних евристик
+LOOP_WEIGHT = 10            # Відносна частота блоку на кожен рівень вкладеності
+LOOP_PROBABILITY = 0.88     # Імовірність лишитися в циклі
+EQUAL_PROBABILITY = 0.34    # Імовірність того, що a == b істинне
+
+
+def _conditional(block):
+    """True якщо блок закінчується умовним переходом з двома різними дугами"""
+    terminator = block.terminator
+    return (terminator is not None and terminator[0] != _JMP
+            and block.fallthrough is not None and block.fallthrough != terminator[1])
+
+
+def _static_probability(block, enclosing):
+    """
+    Імовірність переходу блоку за статичними евристиками
+
+    Args:
+        block: блок з умовним переходом
+        enclosing: цикли, що містять блок, від внутрішнього до зовнішнього
+
+    Returns:
+        float: імовірність того, що перехід виконається (дуга на ціль)
+    """
+    op, target = block.terminator
+    fall = block.fallthrough
+    # Дуга, що лишається в найближчому циклі, який одна з дуг покидає
+    for loop in enclosing:
+        stays_target = target in loop.blocks
+        if stays_target != (fall in loop.blocks):
+            return LOOP_PROBABILITY if stays_target else 1 - LOOP_PROBABILITY
+    if len(block.instrs) >= 2 and block.instrs[-2][0] in (_EQ, _NE):
+        true_probability = EQUAL_PROBABILITY if block.instrs[-2][0] == _EQ else 1 - EQUAL_PROBABILITY
+        return true_probability if op == _JT else 1 - true_probability
+    return 0.5
+
+
+def _edges(graph, loops, profile):
+    """
+    Зважені дуги графа
+
+    Args:
+        graph: граф потоку керування
+        loops: цикли графа
+        profile: {(блок, наступник): кількість переходів} або None
+
+    Returns:
+        list: [(вага, u, v)], від найважчої дуги
+    """
+    enclosing = {block_id: [] for block_id in graph.layout}
+    for loop in sorted(loops, key=lambda loop: len(loop.blocks)):
+        for block_id in loop.blocks:
+            enclosing[block_id].append(loop)
+    position = {block_id: i for i, block_id in enumerate(graph.layout)}
+
+    edges = []
+    for block_id in graph.layout:
+        block = graph.blocks[block_id]
+        frequency = LOOP_WEIGHT ** len(enclosing[block_id])
+        if not _conditional(block):
+            for succ in block.succs:
+                edges.append((frequency, block_id, succ))
+            continue
+        target = block.terminator[1]
+        taken = _static_probability(block, enclosing[block_id])
+        if profile is not None:
+            counts = (profile.get((block_id, target), 0),
+                      profile.get((block_id, block.fallthrough), 0))
+            if sum(counts):
+                taken = counts[0] / sum(counts)
+        edges.append((frequency * taken, block_id, target))
+        edges.append((frequency * (1 - taken), block_id, block.fallthrough))
+
+    # Рівні ваги: спершу поточний fallthrough, далі - порядок коду
+    edges.sort(key=lambda edge: (-edge[0], graph.blocks[edge[1]].fallthrough != edge[2],
+                                 position[edge[1]]))
+    return edges
+
+
+def _weights(edges):
+    """{(u, v): вага} зі списку дуг"""
+    return {(u, v): weight for weight, u, v in edges}
+
+
+def _order(graph, edges):
+    """
+    Порядок блоків: ланцюжки найважчих дуг
+
+    Returns:
+        list: новий layout (вхід першим, вихід останнім)
+    """
+    chain_of = {block_id: [block_id] for block_id in graph.layout}
+    for _, u, v in edges:
+        first, second = chain_of[u], chain_of[v]
+        # Вхід лишається першим, вихід - окремо в кінці (linearize
+        # розміщує його останнім; дуги у вихід виконуються один раз)
+        if (first is second or first[-1] != u or second[0] != v
+                or v == graph.entry or v == graph.exit):
+            continue
+        first.extend(second)
+        for block_id in second:
+            chain_of[block_id] = first
+
+    # Найважча дуга з кожного блоку - куди продовжувати розміщення
+    best = {}
+    for _, u, v in edges:
+        best.setdefault(u, v)
+
+    layout = []
+    placed = set()
+    last = chain_of[graph.exit]
+    pending = [chain_of[block_id] for block_id in graph.layout]
+    chain = chain_of[graph.entry]
+    index = 0
+    while chain is not None:
+        if chain is not last:
+            layout.extend(chain)
+            placed.add(id(chain))
+        chain = None
+        follow = best.get(layout[-1]) if layout else None
+        if follow is not None and chain_of[follow][0] == follow:
+            candidate = chain_of[follow]
+            if id(candidate) not in placed and candidate is not last:
+                chain = candidate
+        while chain is None and index < len(pending):
+            candidate = pending[index]
+            index += 1
+            if id(candidate) not in placed and candidate is not last:
+                chain = candidate
+    layout.extend(last)
+    return layout
+
+
+def _apply(graph, layout, weight):
+    """
+    Розміщує блоки в заданому порядку та обертає переходи
+
+    Умовний перехід обертається, якщо його ціль - наступний блок, або якщо
+    жодна дуга не веде в наступний блок, а fallthrough (для якого linearize
+    додасть JMP) важчий за ціль: важча дуга має коштувати один перехід.
+
+    Args:
+        graph: граф потоку керування
+        layout: новий порядок блоків
+        weight: {(u, v): вага дуги}
+
+    Returns:
+        bool: True якщо код змінився
+    """
+    changed = layout != graph.layout
+    graph.layout = layout
+    for i, block_id in enumerate(layout[:-1]):
+        block = graph.blocks[block_id]
+        next_id = layout[i + 1]
+        terminator = block.terminator
+        if terminator is None:
+            continue
+        op, target = terminator
+        if op == _JMP:
+            if target == next_id:
+                block.instrs = block.instrs[:-1]
+                block.fallthrough = next_id
+                changed = True
+            continue
+        if not _conditional(block) or block.fallthrough == next_id:
+            continue
+        fall = block.fallthrough
+        if target == next_id or weight[(block_id, fall)] > weight[(block_id, target)]:
+            op = _JT if op == _JF else _JF
+            block.instrs = block.instrs[:-1] + [(op, fall)]
+            block.fallthrough = target
+            changed = True
+    graph.compute_edges()
+    return changed
+
+
+def _branch_addresses(graph):
+    """
+    Адреси умовних переходів у коді, який дасть linearize()
+
+    Returns:
+        dict: {адреса: номер блоку}
+    """
+    layout = graph.layout
+    addresses = {}
+    pc = 0
+    for i, block_id in enumerate(layout):
+        block = graph.blocks[block_id]
+        pc += len(block.instrs)
+        if _conditional(block):
+            addresses[pc - 1] = block_id
+        next_id = layout[i + 1] if i + 1 < len(layout) else None
+        terminator = block.terminator
+        if (block.fallthrough is not None and block.fallthrough != next_id
+                and (terminator is None or terminator[0] != _JMP)):
+            pc += 1
+    return addresses
+
+
+def _edge_profile(program, counts):
+    """
+    Переводить лічильники за адресами статичного розміщення в лічильники дуг
+
+    Args:
+        program: вхідна програма проходу
+        counts: {адреса: (виконано переходів, не виконано)}
+
+    Returns:
+        dict: {(блок, наступник): кількість}
+    """
+    graph = ControlFlowGraph(program)
+    edges = _edges(graph, graph.loops(), None)
+    _apply(graph, _order(graph, edges), _weights(edges))
+    profile = {}
+    for address, block_id in _branch_addresses(graph).items():
+        if address not in counts:
+            continue
+        block = graph.blocks[block_id]
+        taken, not_taken = counts[address]
+        profile[(block_id, block.terminator[1])] = taken
+        profile[(block_id, block.fallthrough)] = not_taken
+    return profile
+
+
+def block_layout(program, ctx):
+    """
+    Прохід розміщення блоків
+
+    Args:
+        program: скомпонована постфікс-програма
+        ctx: контекст проходу (PassContext)
+
+    Returns:
+        PostfixProgram: програма з новим порядком блоків (або та сама)
+    """
+    profile = None
+    profile_file = ctx.option('layout-profile', None)
+    if profile_file:
+        profile = _edge_profile(program, load_branch_profile(profile_file))
+        ctx.check()
+
+    graph = ControlFlowGraph(program)
+    if len(graph.layout) <= 2:
+        return program
+    edges = _edges(graph, graph.loops(), profile)
+    ctx.check()
+    if not _apply(graph, _order(graph, edges), _weights(edges)):
+        return program
+    return graph.linearize()
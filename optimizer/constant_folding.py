@@ -0,0 +1,201 @@
+"""
+Згортання констант (constant folding)
+
+Вирази над літералами (наприклад, 2 10 ^ або 3 4 + 2 *) обчислюються
+під час компіляції і замінюються одним завантаженням константи.
+
+Обчислення повторює семантику CIL: операнди - float32, кожна арифметична
+операція округлюється до float32 (^ - через Math::Pow у double + conv.r4).
+Для +, -, *, / обчислення в double з подальшим округленням до float32
+дає той самий результат, що й арифметика float32.
+Не згортаються: ділення на нуль, результати inf/NaN та комплексні степені.
+"""
+
+import math
+import struct
+
+from cfg import ControlFlowGraph
+from postfix_ir import Op, BINARY_OPS, UNARY_OPS
+
+_CONST = int(Op.CONST)
+
+# Межа цілих чисел, точно представимих у float32
+_FLOAT32_INT_LIMIT = 2 ** 24
+
+_float32 = struct.Struct('f')
+
+
+def to_float32(value):
+    """Округлює число до найближчого float32 (як conv.r4 / ldc.r4)"""
+    return _float32.unpack(_float32.pack(value))[0]
+
+
+def _arithmetic(op, a, b):
+    """Арифметика float32; None якщо результат не можна згорнути"""
+    if op == Op.ADD:
+        return a + b
+    if op == Op.SUB:
+        return a - b
+    if op == Op.MUL:
+        return a * b
+    if op == Op.DIV:
+        return None if b == 0 else a / b
+    # Op.POW: Math::Pow не дає комплексних результатів, Python - дає
+    if a < 0 and not b.is_integer():
+        return None
+    if a == 0 and b < 0:
+        return None
+    try:
+        return math.pow(a, b)
+    except (OverflowError, ValueError):
+        return None
+
+
+_COMPARE = {
+    Op.LT: lambda a, b: a < b,
+    Op.LE: lambda a, b: a <= b,
+    Op.GT: lambda a, b: a > b,
+    Op.GE: lambda a, b: a >= b,
+    Op.EQ: lambda a, b: a == b,
+    Op.NE: lambda a, b: a != b,
+}
+
+
+def _result(value, exact_int):
+    """
+    Нормалізує результат арифметики
+
+    Args:
+        value: результат обчислення в double
+        exact_int: чи були всі операнди цілими літералами
+
+    Returns:
+        int, float або None (для inf/NaN)
+    """
+    if value is None:
+        return None
+    try:
+        value = to_float32(value)
+    except OverflowError:
+        return None
+    if math.isinf(value) or math.isnan(value):
+        return None
+    # Цілий результат цілих операндів лишається цілою константою
+    # (крім -0.0, знак якого цілим числом не передати)
+    if (exact_int and value.is_integer() and abs(value) <= _FLOAT32_INT_LIMIT
+            and not (value == 0 and math.copysign(1.0, value) < 0)):
+        return int(value)
+    return value
+
+
+def fold_binary(op, a, b):
+    """
+    Обчислює бінарну операцію над константами
+
+    Args:
+        op: код операції (арифметична або порівняння)
+        a, b: значення констант (int, float або bool)
+
+    Returns:
+        значення результату або None, якщо вираз не згортається
+    """
+    if op in _COMPARE:
+        # Логічні значення порівнюються лише між собою (у CIL - як int32)
+        if isinstance(a, bool) != isinstance(b, bool):
+            return None
+        if isinstance(a, bool):
+            return _COMPARE[op](a, b)
+        return _COMPARE[op](to_float32(a), to_float32(b))
+    # Арифметика над TRUE/FALSE у CIL - це арифметика int32, не згортаємо
+    if isinstance(a, bool) or isinstance(b, bool):
+        return None
+    exact_int = isinstance(a, int) and isinstance(b, int)
+    return _result(_arithmetic(op, to_float32(a), to_float32(b)), exact_int)
+
+
+def fold_unary(op, a, arg=0):
+    """
+    Обчислює унарну операцію над константою
+
+    Args:
+        op: код операції (NEG, SQRT, POWI або FLOOR)
+        a: значення константи
+        arg: операнд інструкції (показник степеня для POWI)
+
+    Returns:
+        значення результату або None, якщо вираз не згортається
+    """
+    if isinstance(a, bool):
+        return None
+    if op == Op.NEG:
+        if isinstance(a, int) and a == 0:
+            return -0.0
+        return _result(-to_float32(a), isinstance(a, int))
+    if op == Op.SQRT:
+        value = to_float32(a)
+        # -0.0, від'ємні числа та NaN лишаємо виконавцю
+        return _result(math.sqrt(value), False) if value > 0 else None
+    if op == Op.FLOOR:
+        value = to_float32(a)
+        # Дробові ±0.0, нескінченність і NaN лишаємо виконавцю (знак нуля)
+        if not math.isfinite(value) or (value == 0 and not isinstance(a, int)):
+            return None
+        return _result(float(math.floor(value)), isinstance(a, int))
+    return _result(_arithmetic(Op.POW, to_float32(a), float(arg)), isinstance(a, int))
+
+
+def fold_block(instrs, program):
+    """
+    Згортає константні вирази в списку інструкцій одного блоку
+
+    Args:
+        instrs: інструкції блоку (кортежі (код операції, операнд))
+        program: програма (пул констант)
+
+    Returns:
+        list: нові інструкції (або той самий список, якщо змін немає)
+    """
+    consts = program.consts
+    out = []
+    changed = False
+    for op, arg in instrs:
+        value = None
+        if op in UNARY_OPS:
+            if out and out[-1][0] == _CONST:
+                value = fold_unary(op, consts[out[-1][1]], arg)
+                if value is not None:
+                    out.pop()
+        elif op in BINARY_OPS:
+            if len(out) >= 2 and out[-1][0] == _CONST and out[-2][0] == _CONST:
+                value = fold_binary(op, consts[out[-2][1]], consts[out[-1][1]])
+                if value is not None:
+                    del out[-2:]
+        if value is None:
+            out.append((op, arg))
+        else:
+            out.append((_CONST, program.add_const(value)))
+            changed = True
+    return out if changed else instrs
+
+
+def constant_folding(program, ctx):
+    """
+    Прохід згортання констант
+
+    Args:
+        program: скомпонована постфікс-програма
+        ctx: контекст проходу (PassContext)
+
+    Returns:
+        PostfixProgram: програма зі згорнутими виразами (або та сама програма)
+    """
+    graph = ControlFlowGraph(program)
+    changed = False
+    for block_id in graph.layout:
+        ctx.check()
+        block = graph.blocks[block_id]
+        instrs = fold_block(block.instrs, program)
+        if instrs is not block.instrs:
+            block.instrs = instrs
+            changed = True
+    return graph.linearize() if changed else program
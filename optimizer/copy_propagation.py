@@ -0,0 +1,151 @@
+"""
+Поширення копій та видалення зайвих пар збереження/завантаження
+
+Після присвоєння-копії t <- x (x =t, або dup =x =t) завантаження t
+замінюються завантаженнями x, доки жодна з двох змінних не змінилась.
+Доступні копії поширюються між блоками (перетин по всіх попередниках),
+а саме присвоєння, якщо t більше не читається, видаляє DCE.
+
+Наприкінці виконується віконна оптимізація: пара =x x (stloc x; ldloc x)
+замінюється на dup =x (dup; stloc x) - без зайвого читання змінної.
+"""
+
+from cfg import ControlFlowGraph
+from postfix_ir import Op, STACK_EFFECT
+
+_LOAD = int(Op.LOAD)
+_STORE = int(Op.STORE)
+_DUP = int(Op.DUP)
+
+
+def _kill(copies, slot):
+    """Видаляє копії, в яких бере участь змінна slot"""
+    copies.pop(slot, None)
+    for target in [target for target, source in copies.items() if source == slot]:
+        del copies[target]
+
+
+def _propagate_block(instrs, copies, var_types):
+    """
+    Поширює копії в межах блоку
+
+    Args:
+        instrs: інструкції блоку
+        copies: доступні на вході копії {змінна: джерело} (змінюється на місці)
+        var_types: типи змінних за слотами (копіюються лише однотипні)
+
+    Returns:
+        list: нові інструкції (завантаження копій замінено джерелами)
+    """
+    out = []
+    stack = []          # Маркери значень на стеку
+    var_token = {}      # Слот → маркер поточного значення змінної
+    holder = {}         # Маркер → змінна, що містить це значення
+    for op, arg in instrs:
+        if op == _LOAD:
+            arg = copies.get(arg, arg)
+            token = var_token.get(arg)
+            if token is None:
+                token = var_token[arg] = object()
+                holder[token] = arg
+            stack.append(token)
+        elif op == _DUP:
+            stack.append(stack[-1] if stack else object())
+        elif op == _STORE:
+            token = stack.pop() if stack else object()
+            _kill(copies, arg)
+            source = holder.get(token)
+            if (source is not None and source != arg and var_token.get(source) is token
+                    and var_types[source] == var_types[arg]):
+                copies[arg] = source
+            var_token[arg] = token
+            holder.setdefault(token, arg)
+            if holder[token] != arg and var_token.get(holder[token]) is not token:
+                holder[token] = arg
+        else:
+            pops, pushes = STACK_EFFECT[op]
+            del stack[max(0, len(stack) - pops):]
+            for _ in range(pushes):
+                stack.append(object())
+        out.append((op, arg))
+    return out
+
+
+def _store_load_peephole(instrs):
+    """Замінює =x x на dup =x (і =x x x на dup dup =x)"""
+    out = []
+    i = 0
+    n = len(instrs)
+    while i < n:
+        op, arg = instrs[i]
+        if op == _STORE:
+            j = i + 1
+            while j < n and instrs[j] == (_LOAD, arg):
+                j += 1
+            if j > i + 1:
+                out.extend([(_DUP, 0)] * (j - i - 1))
+                out.append((op, arg))
+                i = j
+                continue
+        out.append((op, arg))
+        i += 1
+    return out
+
+
+def _meet(states):
+    """Копії, доступні на всіх шляхах (перетин словників)"""
+    result = None
+    for state in states:
+        if state is None:
+            continue
+        if result is None:
+            result = dict(state)
+        else:
+            result = {target: source for target, source in result.items()
+                      if state.get(target) == source}
+    return result if result is not None else {}
+
+
+def copy_propagation(program, ctx):
+    """
+    Прохід поширення копій
+
+    Args:
+        program: скомпонована постфікс-програма
+        ctx: контекст проходу (PassContext)
+
+    Returns:
+        PostfixProgram: програма з поширеними копіями (або та сама програма)
+    """
+    graph = ControlFlowGraph(program)
+    var_types = [None] * len(program.variable_table)
+    for index, var_type, _ in program.variable_table.values():
+        var_types[index - 1] = var_type
+
+    # ========== АНАЛІЗ: ДОСТУПНІ КОПІЇ ==========
+    order = graph.reverse_postorder()
+    out_states = dict.fromkeys(order)
+    changed = True
+    while changed:
+        ctx.check()
+        changed = False
+        for block_id in order:
+            block = graph.blocks[block_id]
+            copies = {} if block_id == graph.entry else _meet(
+                out_states.get(pred) for pred in block.preds)
+            _propagate_block(block.instrs, copies, var_types)
+            if copies != out_states[block_id]:
+                out_states[block_id] = copies
+                changed = True
+
+    # ========== ПЕРЕПИСУВАННЯ ==========
+    changed = False
+    for block_id in order:
+        block = graph.blocks[block_id]
+        copies = {} if block_id == graph.entry else _meet(
+            out_states.get(pred) for pred in block.preds)
+        instrs = _store_load_peephole(_propagate_block(block.instrs, copies, var_types))
+        if instrs != block.instrs:
+            block.instrs = instrs
+            changed = True
+    return graph.linearize() if changed else program
@@ -0,0 +1,229 @@
+"""
+Видалення спільних підвиразів (CSE) нумерацією значень
+
+Кожному значенню на стеку присвоюється номер (value number): однакові
+операції над однаковими номерами операндів дають той самий номер.
+Присвоєння змінній дає їй номер збереженого значення, тож після зміни
+операнда вирази з ним отримують нові номери - закешоване значення
+автоматично перестає бути доступним.
+
+Повторне обчислення виразу замінюється:
+    - на dup, якщо таке саме значення щойно залишилось на вершині стеку
+      ((a + b) * (a + b) → a b + dup *);
+    - на завантаження змінної, що вже містить це значення;
+    - на завантаження службової змінної cse$N, в яку значення зберігається
+      (dup =cse$N) одразу після першого обчислення.
+
+Нумерація ведеться в межах розширених базових блоків: блок з єдиним
+попередником продовжує таблиці цього попередника (за деревом домінаторів),
+але між блоками значення передаються лише через змінні.
+"""
+
+from cfg import ControlFlowGraph
+from postfix_ir import Op, BINARY_OPS, UNARY_OPS, RELATIONAL_OPS, STACK_EFFECT
+
+_CONST = int(Op.CONST)
+_LOAD = int(Op.LOAD)
+_STORE = int(Op.STORE)
+_DUP = int(Op.DUP)
+
+# Операції, для яких порядок операндів не важливий (точно і для float)
+_COMMUTATIVE = frozenset((Op.ADD, Op.MUL, Op.EQ, Op.NE))
+
+
+class _Numbering:
+    """Таблиці нумерації значень, що діють у точці програми"""
+
+    def __init__(self, counter):
+        self.counter = counter      # Спільний лічильник номерів [n]
+        self.exprs = {}             # Ключ виразу → номер значення
+        self.var_vn = {}            # Слот змінної → номер її значення
+        self.holder = {}            # Номер значення → слот змінної, що його містить
+
+    def copy(self):
+        numbering = _Numbering(self.counter)
+        numbering.exprs = dict(self.exprs)
+        numbering.var_vn = dict(self.var_vn)
+        numbering.holder = dict(self.holder)
+        return numbering
+
+    def fresh(self):
+        self.counter[0] += 1
+        return self.counter[0]
+
+    def lookup(self, key):
+        vn = self.exprs.get(key)
+        if vn is None:
+            vn = self.exprs[key] = self.fresh()
+        return vn
+
+    def load(self, slot):
+        vn = self.var_vn.get(slot)
+        if vn is None:
+            vn = self.var_vn[slot] = self.fresh()
+        self.holder.setdefault(vn, slot)
+        return vn
+
+    def store(self, slot, vn):
+        old = self.var_vn.get(slot)
+        if old is not None and self.holder.get(old) == slot:
+            del self.holder[old]
+        self.var_vn[slot] = vn
+        self.holder.setdefault(vn, slot)
+
+
+class _Occurrence:
+    """Обчислення виразу instrs[start:end] зі значенням vn"""
+
+    __slots__ = ('start', 'end', 'vn', 'holder', 'logical')
+
+    def __init__(self, start, end, vn, holder, logical):
+        self.start = start
+        self.end = end
+        self.vn = vn
+        self.holder = holder
+        self.logical = logical
+
+
+def _number_block(instrs, numbering, consts):
+    """
+    Нумерує значення в блоці
+
+    Returns:
+        list: обчислення виразів (_Occurrence) у порядку завершення
+    """
+    occurrences = []
+    stack = []      # (номер значення, початок виразу)
+    for i, (op, arg) in enumerate(instrs):
+        if op == _CONST:
+            value = consts[arg]
+            stack.append((numbering.lookup(('c', type(value), repr(value))), i))
+        elif op == _LOAD:
+            stack.append((numbering.load(arg), i))
+        elif op in BINARY_OPS or op in UNARY_OPS:
+            count = 1 if op in UNARY_OPS else 2
+            if len(stack) < count:
+                stack.clear()
+                stack.append((numbering.fresh(), i))
+                continue
+            operands = stack[-count:]
+            del stack[-count:]
+            vns = [vn for vn, _ in operands]
+            if op in _COMMUTATIVE:
+                vns.sort()
+            # Операнд інструкції (показник powi) теж входить у ключ
+            vn = numbering.lookup((op, arg) + tuple(vns))
+            start = operands[0][1]
+            occurrences.append(_Occurrence(start, i + 1, vn, numbering.holder.get(vn),
+                                           op in RELATIONAL_OPS))
+            stack.append((vn, start))
+        elif op == _STORE:
+            vn = stack.pop()[0] if stack else numbering.fresh()
+            numbering.store(arg, vn)
+        elif op == _DUP:
+            if stack:
+                stack.append((stack[-1][0], i))
+        else:
+            pops, pushes = STACK_EFFECT[op]
+            del stack[max(0, len(stack) - pops):]
+            for _ in range(pushes):
+                stack.append((numbering.fresh(), i))
+    return occurrences
+
+
+def _rewrite_block(instrs, occurrences, owner):
+    """
+    Замінює повторні обчислення виразів
+
+    Returns:
+        list: нові інструкції (або той самий список, якщо змін немає)
+    """
+    replaced = {}       # Початок обчислення → (кінець, заміна)
+    inserts = {}        # Позиція → інструкції, що вставляються перед нею
+    first = {}          # Номер значення → перше обчислення в блоці
+    temps = {}          # Номер значення → слот службової змінної
+    last_end = {}       # Номер значення → кінець останнього обчислення
+    replaced_until = 0
+
+    # Зовнішні вирази раніше за вкладені
+    for occ in sorted(occurrences, key=lambda occ: (occ.start, -occ.end)):
+        if occ.start < replaced_until:
+            continue
+        vn = occ.vn
+        if last_end.get(vn) == occ.start:
+            replacement = [(_DUP, 0)]
+        elif occ.holder is not None:
+            replacement = [(_LOAD, occ.holder)]
+        elif vn in first and occ.end - occ.start > 2:
+            # Службова змінна коштує dup + =cse$N, тож для виразів
+            # з двох інструкцій (x unary-) вона не вигідна
+            slot = temps.get(vn)
+            if slot is None:
+                slot = owner.new_temp('cse', 'logical' if occ.logical else 'numeric')
+                temps[vn] = slot
+                inserts.setdefault(first[vn].end, []).extend(((_DUP, 0), (_STORE, slot)))
+            replacement = [(_LOAD, slot)]
+        else:
+            first[vn] = occ
+            last_end[vn] = occ.end
+            continue
+        replaced[occ.start] = (occ.end, replacement)
+        replaced_until = occ.end
+        last_end[vn] = occ.end
+
+    if not replaced:
+        return instrs
+    out = []
+    i = 0
+    while i < len(instrs):
+        out.extend(inserts.get(i, ()))
+        if i in replaced:
+            end, replacement = replaced[i]
+            out.extend(replacement)
+            i = end
+        else:
+            out.append(instrs[i])
+            i += 1
+    out.extend(inserts.get(len(instrs), ()))
+    return out
+
+
+def common_subexpression_elimination(program, ctx):
+    """
+    Прохід CSE
+
+    Args:
+        program: скомпонована постфікс-програма
+        ctx: контекст проходу (PassContext)
+
+    Returns:
+        PostfixProgram: програма без повторних обчислень (або та сама програма)
+    """
+    graph = ControlFlowGraph(program)
+    owner = program.derive()
+    owner.variable_table = dict(program.variable_table)
+    graph.program = owner
+    consts = program.consts
+    tree = graph.dominator_tree()
+    counter = [0]
+    changed = False
+
+    # Обхід дерева домінаторів; таблиці успадковує лише блок,
+    # єдиний попередник якого - його безпосередній домінатор
+    stack = [(graph.entry, _Numbering(counter))]
+    while stack:
+        ctx.check()
+        block_id, numbering = stack.pop()
+        block = graph.blocks[block_id]
+        occurrences = _number_block(block.instrs, numbering, consts)
+        instrs = _rewrite_block(block.instrs, occurrences, owner)
+        if instrs is not block.instrs:
+            block.instrs = instrs
+            changed = True
+        for child in tree[block_id]:
+            if graph.blocks[child].preds == [block_id]:
+                stack.append((child, numbering.copy()))
+            else:
+                stack.append((child, _Numbering(counter)))
+
+    return graph.linearize() if changed else program
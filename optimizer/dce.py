@@ -0,0 +1,168 @@
+"""
+Видалення мертвого коду на основі аналізу живучості змінних
+
+Змінна жива в точці програми, якщо її значення може бути прочитане
+на якомусь шляху далі до наступного присвоєння. Присвоєння (=x) мертвої
+змінної видаляється разом з виразом, що обчислює значення, якщо вираз
+не має побічних ефектів (не містить scan). Також видаляються недосяжні
+блоки та змінні, які більше ніде не використовуються.
+"""
+
+from cfg import ControlFlowGraph
+from optimizer.simplify_cfg import prune_unreachable
+from postfix_ir import Op, PURE_OPS, expr_start
+
+_LOAD = int(Op.LOAD)
+_STORE = int(Op.STORE)
+
+
+def _use_def(instrs):
+    """Змінні, що читаються до присвоєння (use), і ті, що присвоюються (def)"""
+    use = 0
+    defs = 0
+    for op, arg in reversed(instrs):
+        if op == _STORE:
+            bit = 1 << arg
+            defs |= bit
+            use &= ~bit
+        elif op == _LOAD:
+            use |= 1 << arg
+    return use, defs
+
+
+def liveness(graph, ctx=None):
+    """
+    Обчислює множини живих на виході з блоків змінних
+
+    Множини представлені бітовими масками (біт = слот змінної).
+
+    Args:
+        graph: ControlFlowGraph
+        ctx: контекст проходу для перевірки бюджету часу
+
+    Returns:
+        dict: {номер блоку: бітова маска змінних, живих на виході}
+    """
+    order = graph.reverse_postorder()
+    order.reverse()
+    use_def = {block_id: _use_def(graph.blocks[block_id].instrs) for block_id in order}
+    live_in = dict.fromkeys(order, 0)
+    live_out = dict.fromkeys(order, 0)
+    changed = True
+    while changed:
+        if ctx is not None:
+            ctx.check()
+        changed = False
+        for block_id in order:
+            out = 0
+            for succ in graph.blocks[block_id].succs:
+                out |= live_in.get(succ, 0)
+            use, defs = use_def[block_id]
+            new_in = use | (out & ~defs)
+            live_out[block_id] = out
+            if new_in != live_in[block_id]:
+                live_in[block_id] = new_in
+                changed = True
+    return live_out
+
+
+def _remove_dead_stores(instrs, live):
+    """
+    Видаляє мертві присвоєння в блоці (прохід знизу вгору)
+
+    Args:
+        instrs: інструкції блоку
+        live: маска змінних, живих на виході з блоку
+
+    Returns:
+        list: нові інструкції (або той самий список, якщо змін немає)
+    """
+    removed = None
+    i = len(instrs) - 1
+    while i >= 0:
+        op, arg = instrs[i]
+        if op == _STORE:
+            bit = 1 << arg
+            if not live & bit:
+                start = expr_start(instrs, i)
+                if start is not None and all(instrs[j][0] in PURE_OPS
+                                             for j in range(start, i)):
+                    if removed is None:
+                        removed = bytearray(len(instrs))
+                    for j in range(start, i + 1):
+                        removed[j] = 1
+                    i = start - 1
+                    continue
+            live &= ~bit
+        elif op == _LOAD:
+            live |= 1 << arg
+        i -= 1
+    if removed is None:
+        return instrs
+    return [instr for instr, dead in zip(instrs, removed) if not dead]
+
+
+def _drop_unused_vars(program):
+    """
+    Видаляє з таблиці змінних ті, що не використовуються в коді
+
+    Слоти решти змінних стискаються, тож у CIL зменшується .locals.
+
+    Returns:
+        PostfixProgram: програма з новою таблицею змінних (або та сама)
+    """
+    used = set()
+    for op, arg in zip(program.ops, program.args):
+        if op == _LOAD or op == _STORE:
+            used.add(arg)
+    if len(used) == len(program.variable_table):
+        return program
+
+    slot_map = {}
+    variable_table = {}
+    for ident, (index, var_type, initialized) in sorted(
+            program.variable_table.items(), key=lambda item: item[1][0]):
+        if index - 1 in used:
+            slot_map[index - 1] = len(variable_table)
+            variable_table[ident] = (len(variable_table) + 1, var_type, initialized)
+
+    result = program.derive()
+    result.variable_table = variable_table
+    for op, arg in zip(program.ops, program.args):
+        result.emit(op, slot_map[arg] if op == _LOAD or op == _STORE else arg)
+    result.labels = dict(program.labels)
+    result.linked = True
+    return result
+
+
+def dead_code_elimination(program, ctx):
+    """
+    Прохід видалення мертвого коду та мертвих присвоєнь
+
+    Args:
+        program: скомпонована постфікс-програма
+        ctx: контекст проходу (PassContext)
+
+    Returns:
+        PostfixProgram: програма без мертвого коду (або та сама програма)
+    """
+    graph = ControlFlowGraph(program)
+    changed = prune_unreachable(graph)
+
+    # Видалення присвоєння може зробити мертвими інші - повторюємо
+    while True:
+        live_out = liveness(graph, ctx)
+        removed = False
+        for block_id in graph.layout:
+            block = graph.blocks[block_id]
+            instrs = _remove_dead_stores(block.instrs, live_out.get(block_id, 0))
+            if instrs is not block.instrs:
+                block.instrs = instrs
+                removed = True
+        if not removed:
+            break
+        changed = True
+
+    if changed:
+        program = graph.linearize()
+    return _drop_unused_vars(program)
@@ -0,0 +1,53 @@
+"""
+Цілі типи змінних (integer types)
+
+Змінні, для яких виведення типів (type_inference) доводить, що вони
+містять лише цілі значення в межах 2^24, отримують у таблиці змінних
+тип 'int': генератор CIL оголошує їх як int32 і виконує над ними цілу
+арифметику, а постфікс-машина - арифметику над int Python. Перетворення
+у float32 лишаються лише на межах (змішані операції, виведення, ділення).
+
+Код програми не змінюється - лише таблиця змінних, тому прохід стоїть
+останнім у конвеєрі: будь-яка зміна коду після нього могла б зробити
+типи неузгодженими. Типи значень зберігаються в програмі (value_types),
+тож бекенди не виводять їх повторно.
+"""
+
+from type_inference import infer_types
+
+
+def integer_types(program, ctx):
+    """
+    Прохід визначення цілих змінних
+
+    Args:
+        program: скомпонована постфікс-програма
+        ctx: контекст проходу (PassContext)
+
+    Returns:
+        PostfixProgram: програма з новою таблицею змінних (або та сама)
+    """
+    ctx.check()
+    types = infer_types(program, ctx)
+    int_vars = 0 if types is None else types.int_vars
+
+    variable_table = {}
+    changed = False
+    for ident, (index, var_type, initialized) in program.variable_table.items():
+        if var_type in ('numeric', 'int'):
+            new_type = 'int' if int_vars >> (index - 1) & 1 else 'numeric'
+            changed |= new_type != var_type
+            var_type = new_type
+        variable_table[ident] = (index, var_type, initialized)
+    if not changed:
+        program.value_types = types
+        return program
+
+    result = program.derive()
+    result.variable_table = variable_table
+    for op, arg in zip(program.ops, program.args):
+        result.emit(op, arg)
+    result.labels = dict(program.labels)
+    result.linked = True
+    result.value_types = types
+    return result
@@ -0,0 +1,311 @@
+"""
+Винесення інваріантного коду з циклів (LICM)
+
+Вираз інваріантний у циклі, якщо всі його змінні не змінюються в жодному
+блоці циклу. Максимальні інваріантні вирази (з хоча б однією операцією)
+обчислюються один раз у новому блоці перед циклом (preheader) і
+зберігаються у службових змінних licm$N, а в циклі замінюються їх
+завантаженням.
+
+Вирази із заголовка циклу (умова while) виконуються щонайменше один раз,
+тож виносяться завжди. Вирази з тіла циклу можуть не виконатися жодного
+разу, тому виносяться лише ті, що не можуть завершитися помилкою в
+постфікс-машині: змінні гарантовано присвоєні до циклу, ділення лише на
+ненульову сталу, без степенів ^, powi і sqrt (1e200 ^ 3 дає
+OverflowError), порівняння <, <=, >, >= лише над значеннями, що не можуть
+бути комплексними (x ^ 0.5 при x < 0 дає complex, і його порівняння -
+TypeError).
+"""
+
+from cfg import ControlFlowGraph
+from postfix_ir import Op, BINARY_OPS, UNARY_OPS, RELATIONAL_OPS, STACK_EFFECT
+
+_CONST = int(Op.CONST)
+_LOAD = int(Op.LOAD)
+_STORE = int(Op.STORE)
+_DIV = int(Op.DIV)
+_DUP = int(Op.DUP)
+
+# Операції, що не завершуються помилкою для будь-яких чисел
+# (степені sqrt і powi, як і ^, з тіла не виносяться)
+SAFE_OPS = frozenset((Op.NEG, Op.ADD, Op.SUB, Op.MUL, Op.EQ, Op.NE))
+# Операції, що завершуються TypeError для комплексного операнда
+REAL_OPS = frozenset((Op.LT, Op.LE, Op.GT, Op.GE, Op.FLOOR))
+# Операції, що можуть дати комплексне значення з дійсних операндів
+_COMPLEX_SOURCES = frozenset((Op.POW, Op.SQRT))
+# Операції з дійсним результатом для будь-яких операндів
+_REAL_RESULT_OPS = RELATIONAL_OPS | {Op.FLOOR}
+
+
+class _Value:
+    """Значення на абстрактному стеку: інструкції instrs[start:end]"""
+
+    __slots__ = ('start', 'end', 'invariant', 'has_op', 'safe', 'real')
+
+    def __init__(self, start, end, invariant, has_op, safe, real):
+        self.start = start
+        self.end = end
+        self.invariant = invariant
+        self.has_op = has_op
+        self.safe = safe
+        self.real = real
+
+
+def stored_vars(instrs):
+    """Бітова маска змінних, що присвоюються в інструкціях"""
+    mask = 0
+    for op, arg in instrs:
+        if op == _STORE:
+            mask |= 1 << arg
+    return mask
+
+
+def real_result(op, operands_real):
+    """
+    Чи не може результат операції бути комплексним
+
+    Args:
+        op: код операції (не LOAD і не CONST)
+        operands_real: True для кожного операнда, що не може бути комплексним
+    """
+    if op in _REAL_RESULT_OPS:
+        return True
+    return op not in _COMPLEX_SOURCES and all(operands_real)
+
+
+def complex_vars(graph):
+    """
+    Змінні, що можуть містити комплексне значення
+
+    Аналіз нечутливий до потоку: присвоєння комплексне, якщо значення
+    обчислене операцією з _COMPLEX_SOURCES, прийшло з іншого блоку
+    (невідоме) або залежить від комплексної змінної. Залежності між
+    змінними обходяться один раз, тож час лінійний.
+
+    Returns:
+        int: бітова маска змінних
+    """
+    result = 0
+    flows = {}
+    for block_id in graph.layout:
+        # Значення на стеку: маска змінних, від яких воно залежить,
+        # або None - може бути комплексним незалежно від змінних
+        stack = []
+        for op, arg in graph.blocks[block_id].instrs:
+            if op == _CONST:
+                stack.append(0)
+            elif op == _LOAD:
+                stack.append(1 << arg)
+            elif op == _DUP:
+                stack.append(stack[-1] if stack else None)
+            elif op == _STORE:
+                deps = stack.pop() if stack else None
+                if deps is None:
+                    result |= 1 << arg
+                while deps:
+                    low = deps & -deps
+                    flows.setdefault(low.bit_length() - 1, []).append(arg)
+                    deps ^= low
+            else:
+                pops, pushes = STACK_EFFECT[op]
+                if pops > len(stack):
+                    operands = [None]
+                    stack.clear()
+                else:
+                    operands = stack[len(stack) - pops:]
+                    del stack[len(stack) - pops:]
+                if not pushes:
+                    continue
+                if op not in BINARY_OPS and op not in UNARY_OPS or op in _REAL_RESULT_OPS:
+                    deps = 0
+                elif op in _COMPLEX_SOURCES or None in operands:
+                    deps = None
+                else:
+                    deps = 0
+                    for value in operands:
+                        deps |= value
+                stack.append(deps)
+
+    pending = [slot for slot in range(result.bit_length()) if result >> slot & 1]
+    while pending:
+        slot = pending.pop()
+        for target in flows.get(slot, ()):
+            if not result >> target & 1:
+                result |= 1 << target
+                pending.append(target)
+    return result
+
+
+def _safe_operator(op, operands, consts, instrs):
+    """Чи не може операція над безпечними операндами завершитися помилкою"""
+    if op in SAFE_OPS:
+        return True
+    if op in REAL_OPS:
+        return all(value.real for value in operands)
+    if op != _DIV:
+        return False
+    divisor = operands[-1]
+    if divisor.end - divisor.start != 1 or instrs[divisor.start][0] != _CONST:
+        return False
+    value = consts[instrs[divisor.start][1]]
+    return not isinstance(value, bool) and value != 0
+
+
+def _invariant_exprs(instrs, variant, assigned, complex_mask, consts, in_header):
+    """
+    Знаходить максимальні інваріантні вирази в блоці
+
+    Args:
+        instrs: інструкції блоку
+        variant: маска змінних, що змінюються в циклі
+        assigned: маска змінних, гарантовано присвоєних до циклу
+        complex_mask: маска змінних, що можуть бути комплексними
+        consts: пул констант
+        in_header: True для заголовка циклу (вирази виконуються завжди)
+
+    Returns:
+        list: [(start, end, real)] - діапазони інструкцій, які можна
+              винести, і чи не може значення бути комплексним
+    """
+    found = []
+    stack = []
+
+    def consume(count):
+        operands = stack[-count:] if count <= len(stack) else None
+        if operands is None:
+            stack.clear()
+            return None
+        del stack[-count:]
+        return operands
+
+    def collect(operands):
+        for value in operands:
+            if value.invariant and value.has_op and (in_header or value.safe):
+                found.append((value.start, value.end, value.real))
+
+    for i, (op, arg) in enumerate(instrs):
+        if op == _CONST:
+            stack.append(_Value(i, i + 1, True, False, True, True))
+        elif op == _LOAD:
+            bit = 1 << arg
+            stack.append(_Value(i, i + 1, not variant & bit, False, bool(assigned & bit),
+                                not complex_mask & bit))
+        elif op in BINARY_OPS or op in UNARY_OPS:
+            operands = consume(1 if op in UNARY_OPS else 2)
+            if operands is None:
+                stack.append(_Value(i, i + 1, False, True, False, False))
+                continue
+            invariant = all(value.invariant for value in operands)
+            safe = (all(value.safe for value in operands)
+                    and _safe_operator(op, operands, consts, instrs))
+            if invariant and not (in_header or safe):
+                # Вираз не можна винести цілком - лише його безпечні частини
+                invariant = False
+            if not invariant:
+                collect(operands)
+            real = real_result(op, [value.real for value in operands])
+            stack.append(_Value(operands[0].start, i + 1, invariant, True, safe, real))
+        else:
+            pops, pushes = STACK_EFFECT[op]
+            operands = consume(pops) if pops else []
+            if operands:
+                collect(operands)
+            for _ in range(pushes):
+                stack.append(_Value(i, i + 1, False, False, False, False))
+    found.sort()
+    return found
+
+
+def assigned_before(graph, stores_mask):
+    """
+    Змінні, присвоєні в блоках, що строго домінують над кожним блоком
+
+    Маски будуються вздовж дерева домінаторів за один прохід у зворотному
+    post-order (безпосередній домінатор іде раніше за блок).
+
+    Returns:
+        dict: {досяжний блок: бітова маска змінних}
+    """
+    idom = graph.dominators()
+    before = {}
+    for block_id in graph.reverse_postorder():
+        if block_id == graph.entry:
+            before[block_id] = 0
+        else:
+            parent = idom[block_id]
+            before[block_id] = before[parent] | stores_mask.get(parent, 0)
+    return before
+
+
+def loop_invariant_code_motion(program, ctx):
+    """
+    Прохід LICM
+
+    Args:
+        program: скомпонована постфікс-програма
+        ctx: контекст проходу (PassContext)
+
+    Returns:
+        PostfixProgram: програма з винесеними з циклів виразами (або та сама)
+    """
+    graph = ControlFlowGraph(program)
+    loops = graph.loops()
+    if not loops:
+        return program
+
+    # Службові змінні додаються до копії таблиці змінних
+    owner = program.derive()
+    owner.variable_table = dict(program.variable_table)
+    graph.program = owner
+    consts = program.consts
+
+    # Усе, що залежить від домінаторів, обчислюється до зміни графа
+    stores_mask = {block_id: stored_vars(graph.blocks[block_id].instrs)
+                   for block_id in graph.layout}
+    before = assigned_before(graph, stores_mask)
+    assigned = {loop.header: before[loop.header] for loop in loops}
+    complex_mask = complex_vars(graph)
+    temps_mask = 0
+    changed = False
+
+    # Від зовнішніх циклів до внутрішніх
+    for loop in reversed(loops):
+        ctx.check()
+        variant = 0
+        for block_id in loop.blocks:
+            variant |= stored_vars(graph.blocks[block_id].instrs)
+        loop_assigned = assigned[loop.header] | temps_mask
+
+        temps = {}
+        hoisted = []
+        for block_id in sorted(loop.blocks):
+            block = graph.blocks[block_id]
+            found = _invariant_exprs(block.instrs, variant, loop_assigned, complex_mask,
+                                     consts, block_id == loop.header)
+            if not found:
+                continue
+            instrs = []
+            pos = 0
+            for start, end, real in found:
+                expr = tuple(block.instrs[start:end])
+                slot = temps.get(expr)
+                if slot is None:
+                    var_type = 'logical' if expr[-1][0] in RELATIONAL_OPS else 'numeric'
+                    slot = owner.new_temp('licm', var_type)
+                    temps[expr] = slot
+                    temps_mask |= 1 << slot
+                    if not real:
+                        complex_mask |= 1 << slot
+                    hoisted.extend(expr)
+                    hoisted.append((_STORE, slot))
+                instrs.extend(block.instrs[pos:start])
+                instrs.append((_LOAD, slot))
+                pos = end
+            instrs.extend(block.instrs[pos:])
+            block.instrs = instrs
+
+        if hoisted:
+            graph.insert_preheader(loop, hoisted)
+            changed = True
+
+    return graph.linearize() if changed else program
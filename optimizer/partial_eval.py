@@ -0,0 +1,155 @@
+"""
+Часткове обчислення програми (partial evaluation)
+
+Програма виконується під час компіляції від входу, доки її поведінка
+не залежить від введення: на першому scan(), на операції, яку не можна
+обчислити точно (ділення на нуль, inf/NaN, арифметика над TRUE/FALSE),
+або на читанні неініціалізованої змінної обчислення зупиняється.
+
+    - Програма без scan(), що завершилась, замінюється послідовністю
+      виведень сталих (CONST v PRINT).
+    - Інакше виконаний префікс замінюється новим вхідним блоком:
+      виведення сталих, присвоєння сталих значень змінним, сталі на стеку
+      і решта блоку, на якому зупинилось обчислення. Код, недосяжний з
+      нового входу, видаляється.
+
+Обчислення повторює семантику CIL (float32), як і згортання констант:
+вбудована постфікс-машина рахує в double, тож її результати не можна
+переносити у згенерований код. Кількість виконаних інструкцій обмежує
+параметр 'pe-fuel', а кількість виведень у залишковому коді -
+'pe-max-output' (але не менше половини довжини програми: такий
+залишковий код не довший за початковий); якщо ліміт вичерпано, програма
+не змінюється.
+"""
+
+from cfg import ControlFlowGraph
+from optimizer.constant_folding import fold_binary, fold_unary
+from optimizer.simplify_cfg import prune_unreachable
+from postfix_ir import Op, BINARY_OPS, UNARY_OPS
+
+_CONST = int(Op.CONST)
+_LOAD = int(Op.LOAD)
+_STORE = int(Op.STORE)
+_PRINT = int(Op.PRINT)
+_DUP = int(Op.DUP)
+_JMP = int(Op.JMP)
+_JF = int(Op.JF)
+_JT = int(Op.JT)
+
+# Параметри за замовчуванням
+DEFAULT_FUEL = 100000           # Найбільша кількість виконаних інструкцій
+DEFAULT_MAX_OUTPUT = 256        # Найбільша кількість виведень у залишковому коді
+
+
+class _Residual:
+    """Стан обчислення в точці зупинки"""
+
+    def __init__(self, block_id, pos, variables, stack, output, left_entry):
+        self.block_id = block_id    # Блок зупинки (блок виходу - програма завершилась)
+        self.pos = pos              # Індекс першої невиконаної інструкції блоку
+        self.variables = variables  # {слот: значення}
+        self.stack = stack
+        self.output = output        # Виведені значення
+        self.left_entry = left_entry
+
+
+def _evaluate(graph, consts, fuel, max_output, ctx):
+    """
+    Виконує програму від входу до першої залежної від введення інструкції
+
+    Returns:
+        _Residual або None (вичерпано fuel чи ліміт виведень)
+    """
+    variables = {}
+    stack = []
+    output = []
+    block_id = graph.entry
+    left_entry = False
+    while block_id != graph.exit:
+        ctx.check()
+        block = graph.blocks[block_id]
+        next_id = block.fallthrough
+        for pos, (op, arg) in enumerate(block.instrs):
+            fuel -= 1
+            if fuel < 0:
+                return None
+            if op == _CONST:
+                stack.append(consts[arg])
+            elif op == _LOAD:
+                if arg not in variables:
+                    return _Residual(block_id, pos, variables, stack, output, left_entry)
+                stack.append(variables[arg])
+            elif op == _STORE and stack:
+                variables[arg] = stack.pop()
+            elif op == _DUP and stack:
+                stack.append(stack[-1])
+            elif op in BINARY_OPS and len(stack) >= 2:
+                value = fold_binary(op, stack[-2], stack[-1])
+                if value is None:
+                    return _Residual(block_id, pos, variables, stack, output, left_entry)
+                del stack[-2:]
+                stack.append(value)
+            elif op in UNARY_OPS and stack:
+                value = fold_unary(op, stack[-1], arg)
+                if value is None:
+                    return _Residual(block_id, pos, variables, stack, output, left_entry)
+                stack[-1] = value
+            elif op == _PRINT and stack:
+                output.append(stack.pop())
+                if len(output) > max_output:
+                    return None
+            elif op == _JMP:
+                next_id = arg
+            elif op in (_JF, _JT) and stack and isinstance(stack[-1], bool):
+                if stack.pop() == (op == _JT):
+                    next_id = arg
+            else:
+                # SCAN, помилка виконання або невідома операція
+                return _Residual(block_id, pos, variables, stack, output, left_entry)
+        block_id = next_id
+        left_entry = True
+    return _Residual(block_id, 0, variables, stack, output, left_entry)
+
+
+def partial_evaluation(program, ctx):
+    """
+    Прохід часткового обчислення програми
+
+    Args:
+        program: скомпонована постфікс-програма
+        ctx: контекст проходу (PassContext)
+
+    Returns:
+        PostfixProgram: залишкова програма (або та сама)
+    """
+    graph = ControlFlowGraph(program)
+    if graph.entry == graph.exit:
+        return program
+    max_output = max(ctx.option('pe-max-output', DEFAULT_MAX_OUTPUT), len(program) // 2)
+    state = _evaluate(graph, program.consts,
+                      ctx.option('pe-fuel', DEFAULT_FUEL), max_output, ctx)
+    # Зупинка ще у вхідному блоці - обчислювати нічого
+    if state is None or not state.left_entry:
+        return program
+
+    const = program.add_const
+    instrs = []
+    for value in state.output:
+        instrs += [(_CONST, const(value)), (_PRINT, 0)]
+    if state.block_id == graph.exit:
+        fallthrough = graph.exit
+    else:
+        # Значення змінних у точці зупинки (непотрібні присвоєння видалить DCE)
+        for slot in sorted(state.variables):
+            instrs += [(_CONST, const(state.variables[slot])), (_STORE, slot)]
+        instrs += [(_CONST, const(value)) for value in state.stack]
+        block = graph.blocks[state.block_id]
+        instrs += block.instrs[state.pos:]
+        fallthrough = block.fallthrough
+
+    entry = graph.new_block(instrs, fallthrough)
+    graph.entry = entry.id
+    graph.layout.insert(0, entry.id)
+    graph.compute_edges()
+    prune_unreachable(graph)
+    return graph.linearize()
@@ -0,0 +1,244 @@
+"""
+Менеджер проходів оптимізації постфікс-коду
+
+Стоїть між фронтендом (Lab5 parser / Lab6 visitor) та бекендами
+(PostfixMachine і CILGenerator): обидва отримують один і той самий
+оптимізований код. Проходи іменовані та впорядковані, набір залежить
+від рівня оптимізації (-O0, -O1, -O2).
+
+Кожен прохід - функція pass_fn(program, ctx) → PostfixProgram, яка отримує
+скомпоновану програму та повертає нову (або ту саму) скомпоновану програму.
+"""
+
+import time
+
+from optimizer.constant_folding import constant_folding
+from optimizer.partial_eval import partial_evaluation
+from optimizer.copy_propagation import copy_propagation
+from optimizer.cse import common_subexpression_elimination
+from optimizer.sccp import sccp
+from optimizer.strength_reduction import strength_reduction
+from optimizer.dce import dead_code_elimination
+from optimizer.licm import loop_invariant_code_motion
+from optimizer.unswitch import loop_unswitching
+from optimizer.scev import scalar_evolution
+from optimizer.unroll import loop_unrolling
+from optimizer.peephole import peephole
+from optimizer.simplify_cfg import thread_jumps
+from optimizer.tail_merge import tail_merge
+from optimizer.block_layout import block_layout
+from optimizer.integer_types import integer_types
+
+
+# ========== КОНВЕЄР ПРОХОДІВ ==========
+# (ім'я, функція, мінімальний рівень оптимізації) - у порядку виконання
+PIPELINE = [
+    ('partial-evaluation', partial_evaluation, 2),
+    ('constant-folding', constant_folding, 1),
+    ('sccp', sccp, 1),
+    ('licm', loop_invariant_code_motion, 2),
+    ('unswitch', loop_unswitching, 2),
+    ('scev', scalar_evolution, 2),
+    ('unroll', loop_unrolling, 2),
+    ('cse', common_subexpression_elimination, 2),
+    ('strength-reduction', strength_reduction, 1),
+    ('copy-propagation', copy_propagation, 1),
+    ('tail-merge', tail_merge, 2),
+    ('jump-threading', thread_jumps, 1),
+    ('peephole', peephole, 1),
+    ('dce', dead_code_elimination, 1),
+    ('block-layout', block_layout, 2),
+    ('integer-types', integer_types, 2),
+]
+
+# Бюджет часу одного проходу за замовчуванням (секунди)
+DEFAULT_PASS_BUDGET = 5.0
+
+
+class PassTimeout(Exception):
+    """Прохід перевищив свій бюджет часу"""
+
+
+class PassContext:
+    """
+    Контекст виконання проходу
+
+    Атрибути:
+        level: рівень оптимізації
+        options: додаткові параметри проходів {ім'я: значення}
+    """
+
+    def __init__(self, level, options, budget):
+        self.level = level
+        self.options = options
+        self.deadline = None if budget is None else time.perf_counter() + budget
+
+    def check(self):
+        """
+        Перевіряє бюджет часу; проходи викликають її у зовнішніх циклах
+
+        Raises:
+            PassTimeout: якщо бюджет вичерпано (результат проходу відкидається)
+        """
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise PassTimeout()
+
+    def option(self, name, default):
+        """Повертає параметр проходу або значення за замовчуванням"""
+        return self.options.get(name, default)
+
+
+class PassStats:
+    """Статистика одного запуску проходу"""
+
+    def __init__(self, name, iteration, before, after, elapsed, status):
+        self.name = name
+        self.iteration = iteration
+        self.before = before        # Кількість інструкцій до проходу
+        self.after = after          # Кількість інструкцій після проходу
+        self.elapsed = elapsed      # Час виконання (секунди)
+        self.status = status        # 'змінено', 'без змін' або 'таймаут'
+
+
+class PassManager:
+    """Запускає конвеєр проходів і збирає статистику"""
+
+    def __init__(self, level=1, fixpoint=False, max_iterations=10,
+                 pass_budget=DEFAULT_PASS_BUDGET, options=None):
+        """
+        Args:
+            level: рівень оптимізації (0 - без оптимізацій)
+            fixpoint: повторювати конвеєр, доки код змінюється
+            max_iterations: максимальна кількість повторень при fixpoint
+            pass_budget: бюджет часу одного проходу в секундах (None - без ліміту)
+            options: параметри окремих проходів
+        """
+        self.level = level
+        self.fixpoint = fixpoint
+        self.max_iterations = max_iterations
+        self.pass_budget = pass_budget
+        self.options = options or {}
+        self.passes = [(name, pass_fn) for name, pass_fn, min_level in PIPELINE
+                       if level >= min_level]
+        self.stats = []
+
+    def run(self, program):
+        """
+        Виконує конвеєр проходів
+
+        Args:
+            program: скомпонована постфікс-програма
+
+        Returns:
+            PostfixProgram: оптимізована програма
+        """
+        iterations = self.max_iterations if self.fixpoint else 1
+        for iteration in range(1, iterations + 1):
+            changed = False
+            for name, pass_fn in self.passes:
+                program, pass_changed = self._run_pass(name, pass_fn, program, iteration)
+                changed = changed or pass_changed
+            if not changed:
+                break
+        return program
+
+    def _run_pass(self, name, pass_fn, program, iteration):
+        """Запускає один прохід; при таймауті залишає програму без змін"""
+        ctx = PassContext(self.level, self.options, self.pass_budget)
+        before = len(program)
+        start = time.perf_counter()
+        try:
+            result = pass_fn(program, ctx)
+        except PassTimeout:
+            elapsed = time.perf_counter() - start
+            self.stats.append(PassStats(name, iteration, before, before, elapsed, 'таймаут'))
+            return program, False
+        elapsed = time.perf_counter() - start
+
+        changed = not _same_code(program, result)
+        status = 'змінено' if changed else 'без змін'
+        self.stats.append(PassStats(name, iteration, before, len(result), elapsed, status))
+        return result, changed
+
+    def print_report(self):
+        """Виводить статистику проходів: час та кількість інструкцій"""
+        print(f'Рівень оптимізації: -O{self.level}'
+              + (' (до нерухомої точки)' if self.fixpoint else ''))
+        if not self.stats:
+            print('  (немає проходів)')
+            return
+        print(f"  {'#':>2}  {'прохід':<22} {'час, мс':>9}  {'до':>7} → {'після':<7} статус")
+        for stat in self.stats:
+            print(f"  {stat.iteration:>2}  {stat.name:<22} {stat.elapsed * 1000:>9.2f}"
+                  f"  {stat.before:>7} → {stat.after:<7} {stat.status}")
+
+
+def _same_code(a, b):
+    """True якщо дві програми мають однаковий код і таблицю змінних"""
+    return (a is b) or (len(a) == len(b) and bytes(a.ops) == bytes(b.ops)
+                        and a.args.tobytes() == b.args.tobytes()
+                        and a.consts is b.consts
+                        and a.variable_table == b.variable_table)
+
+
+def optimize(program, level=1, fixpoint=False, pass_budget=DEFAULT_PASS_BUDGET,
+             options=None, report=True):
+    """
+    Оптимізує скомпоновану програму конвеєром проходів
+
+    Args:
+        program: постфікс-програма з розв'язаними мітками
+        level: рівень оптимізації (0, 1 або 2)
+        fixpoint: повторювати конвеєр до нерухомої точки
+        pass_budget: бюджет часу одного проходу (секунди)
+        options: параметри окремих проходів
+        report: виводити статистику проходів
+
+    Returns:
+        PostfixProgram: оптимізована програма
+    """
+    manager = PassManager(level, fixpoint, pass_budget=pass_budget, options=options)
+    result = manager.run(program)
+    if report:
+        manager.print_report()
+    return result
+
+
+def parse_opt_flags(argv):
+    """
+    Виділяє з аргументів командного рядка прапорці оптимізації
+
+    Підтримуються: -O0, -O1, -O2, --fixpoint, --pass-budget=СЕКУНДИ,
+    --opt-ПАРАМЕТР=ЗНАЧЕННЯ (параметр проходу, напр. --opt-unswitch-budget=100)
+
+    Returns:
+        tuple: (інші аргументи, рівень, fixpoint, бюджет проходу, параметри проходів)
+    """
+    rest = []
+    level = 0
+    fixpoint = False
+    budget = DEFAULT_PASS_BUDGET
+    options = {}
+    for arg in argv:
+        if arg in ('-O0', '-O1', '-O2'):
+            level = int(arg[2])
+        elif arg == '--fixpoint':
+            fixpoint = True
+        elif arg.startswith('--pass-budget='):
+            budget = float(arg.split('=', 1)[1])
+        elif arg.startswith('--opt-') and '=' in arg:
+            name, value = arg[len('--opt-'):].split('=', 1)
+            options[name] = _parse_option_value(value)
+        else:
+            rest.append(arg)
+    return rest, level, fixpoint, budget, options
+
+
+def _parse_option_value(value):
+    """Значення параметра проходу: ціле, дробове або рядок"""
+    for convert in (int, float):
+        try:
+            return convert(value)
+        except ValueError:
+            pass
+    return value
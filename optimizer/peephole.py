@@ -0,0 +1,190 @@
+"""
+Віконна (peephole) оптимізація постфікс-коду
+
+Правила задаються таблицею: шаблон - коротка послідовність інструкцій,
+заміна - інструкції, що ставляться замість неї. Правила індексуються за
+кодом першої інструкції шаблону, а вікно ковзає по кожному базовому блоку
+до нерухомої точки (після заміни вікно повертається назад, щоб нова
+послідовність теж перевірялась).
+
+Правила точні для float32 і для чисел постфікс-машини:
+    x unary- unary- → x
+    x 1 *, 1 x *    → x     (x * 1 == x навіть для NaN і -0.0)
+    x -1 *          → x unary-
+    x 0 -           → x     (-0.0 - 0 == -0.0)
+    TRUE JF m       → (нічого, перехід ніколи не виконується)
+    FALSE JF m      → JMP m
+    TRUE JT m       → JMP m
+    FALSE JT m      → (нічого)
+Правила x 0 + → x та x 0 * → 0 навмисно відсутні: -0.0 + 0 == +0.0,
+а NaN * 0 == NaN. Сталі 1, 0, -1 мають бути цілими: множення цілого
+на 1.0 у постфікс-машині дає float і змінює вивід.
+
+Окремо від вікна обробляються переходи з урахуванням розміщення блоків:
+JMP на наступний блок видаляється, а JF/JT, обидві дуги якого ведуть в один
+блок, видаляється разом з чистим виразом умови.
+"""
+
+from cfg import ControlFlowGraph
+from optimizer.simplify_cfg import prune_unreachable
+from postfix_ir import Op, PURE_OPS, expr_start
+
+_CONST = int(Op.CONST)
+_LOAD = int(Op.LOAD)
+_SUB = int(Op.SUB)
+_MUL = int(Op.MUL)
+_NEG = int(Op.NEG)
+_JMP = int(Op.JMP)
+_JF = int(Op.JF)
+_JT = int(Op.JT)
+
+
+class _Const:
+    """Елемент шаблону: CONST із заданим значенням (з урахуванням типу)"""
+
+    op = _CONST
+
+    def __init__(self, value):
+        self.value = value
+
+    def matches(self, arg, consts):
+        value = consts[arg]
+        return type(value) is type(self.value) and value == self.value
+
+
+# ========== ТАБЛИЦЯ ПРАВИЛ ==========
+# (шаблон, заміна): елемент шаблону - код операції або _Const;
+# елемент заміни - (код операції, i), де i - номер інструкції шаблону,
+# операнд якої переноситься (None - операнд 0)
+RULES = [
+    ((_NEG, _NEG), ()),
+    ((_Const(1), _MUL), ()),
+    ((_Const(1), _LOAD, _MUL), ((_LOAD, 1),)),
+    ((_Const(-1), _MUL), ((_NEG, None),)),
+    ((_Const(0), _SUB), ()),
+    ((_Const(True), _JF), ()),
+    ((_Const(False), _JF), ((_JMP, 1),)),
+    ((_Const(True), _JT), ((_JMP, 1),)),
+    ((_Const(False), _JT), ()),
+]
+
+
+def _index_rules(rules):
+    """Групує правила за кодом першої інструкції шаблону"""
+    index = {}
+    for pattern, replacement in rules:
+        first = pattern[0]
+        op = first.op if isinstance(first, _Const) else first
+        index.setdefault(op, []).append((pattern, replacement))
+    return index
+
+
+_RULE_INDEX = _index_rules(RULES)
+_MAX_PATTERN = max(len(pattern) for pattern, _ in RULES)
+
+
+def _match(pattern, instrs, pos, consts):
+    """Чи збігається шаблон з інструкціями, що починаються з pos"""
+    if pos + len(pattern) > len(instrs):
+        return False
+    for element, (op, arg) in zip(pattern, instrs[pos:pos + len(pattern)]):
+        if isinstance(element, _Const):
+            if op != _CONST or not element.matches(arg, consts):
+                return False
+        elif op != element:
+            return False
+    return True
+
+
+def rewrite_block(instrs, consts, index=_RULE_INDEX):
+    """
+    Застосовує правила до інструкцій блоку до нерухомої точки
+
+    Args:
+        instrs: інструкції блоку
+        consts: пул констант
+        index: правила, згруповані за першим кодом операції
+
+    Returns:
+        list: нові інструкції (або той самий список, якщо змін немає)
+    """
+    out = None
+    pos = 0
+    while pos < len(instrs):
+        for pattern, replacement in index.get(instrs[pos][0], ()):
+            if _match(pattern, instrs, pos, consts):
+                matched = instrs[pos:pos + len(pattern)]
+                new = [(op, 0 if i is None else matched[i][1]) for op, i in replacement]
+                if out is None:
+                    out = instrs = list(instrs)
+                instrs[pos:pos + len(pattern)] = new
+                # Заміна могла утворити шаблон з попередніми інструкціями
+                pos = max(0, pos - _MAX_PATTERN + 1)
+                break
+        else:
+            pos += 1
+    return instrs
+
+
+def _simplify_jumps(graph):
+    """
+    Прибирає переходи, зайві при поточному розміщенні блоків
+
+    Returns:
+        bool: True якщо граф змінено
+    """
+    changed = False
+    layout = graph.layout
+    for i, block_id in enumerate(layout):
+        block = graph.blocks[block_id]
+        terminator = block.terminator
+        if terminator is None:
+            continue
+        op, target = terminator
+        if op == _JMP:
+            if i + 1 < len(layout) and layout[i + 1] == target:
+                block.instrs = block.instrs[:-1]
+                block.fallthrough = target
+                changed = True
+        elif target == block.fallthrough:
+            # Обидві дуги JF ведуть в один блок - умова не потрібна,
+            # якщо її обчислення не має побічних ефектів
+            end = len(block.instrs) - 1
+            start = expr_start(block.instrs, end)
+            if start is not None and all(op in PURE_OPS for op, _ in block.instrs[start:end]):
+                block.instrs = block.instrs[:start]
+                changed = True
+    return changed
+
+
+def peephole(program, ctx):
+    """
+    Прохід віконної оптимізації
+
+    Args:
+        program: скомпонована постфікс-програма
+        ctx: контекст проходу (PassContext)
+
+    Returns:
+        PostfixProgram: спрощена програма (або та сама програма)
+    """
+    graph = ControlFlowGraph(program)
+    consts = program.consts
+    changed = False
+    for block_id in graph.layout:
+        ctx.check()
+        block = graph.blocks[block_id]
+        instrs = rewrite_block(block.instrs, consts)
+        if instrs is block.instrs:
+            continue
+        if instrs and instrs[-1][0] == _JMP:
+            block.fallthrough = None
+        block.instrs = instrs
+        changed = True
+
+    if changed:
+        graph.compute_edges()
+        prune_unreachable(graph)
+    if _simplify_jumps(graph):
+        changed = True
+    return graph.linearize() if changed else program
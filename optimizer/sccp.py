@@ -0,0 +1,237 @@
+"""
+Розріджене умовне поширення констант (SCCP)
+
+Для кожної змінної з таблиці змінних відстежується значення решітки:
+    TOP     - значення ще невідоме (шлях, що його визначає, не виконувався)
+    стала   - на всіх виконуваних шляхах змінна має одне й те саме значення
+    BOTTOM  - значення змінюється або залежить від введення (scan)
+
+Аналіз іде лише виконуваними дугами CFG: якщо умова JF стала, виконується
+тільки одна з двох дуг, тож блоки за іншою дугою не впливають на значення
+і видаляються як недосяжні. Після аналізу завантаження сталих змінних
+замінюються літералами, вирази згортаються, а JF зі сталою умовою
+перетворюються на JMP або зникають.
+"""
+
+from cfg import ControlFlowGraph
+from optimizer.constant_folding import fold_binary, fold_unary, fold_block
+from postfix_ir import Op, BINARY_OPS, UNARY_OPS
+
+_CONST = int(Op.CONST)
+_LOAD = int(Op.LOAD)
+_STORE = int(Op.STORE)
+_PRINT = int(Op.PRINT)
+_SCAN = int(Op.SCAN)
+_DUP = int(Op.DUP)
+_JMP = int(Op.JMP)
+_JF = int(Op.JF)
+_JT = int(Op.JT)
+
+
+class _Lattice:
+    """Спеціальне значення решітки (TOP або BOTTOM)"""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return self.name
+
+
+TOP = _Lattice('TOP')
+BOTTOM = _Lattice('BOTTOM')
+
+
+def _same(a, b):
+    """Рівність значень решітки (1, 1.0 і TRUE - різні сталі)"""
+    if a is b:
+        return True
+    if isinstance(a, _Lattice) or isinstance(b, _Lattice):
+        return False
+    return type(a) is type(b) and repr(a) == repr(b)
+
+
+def _meet(a, b):
+    """Перетин двох значень решітки"""
+    if a is TOP:
+        return b
+    if b is TOP:
+        return a
+    return a if _same(a, b) else BOTTOM
+
+
+def _is_const(value):
+    return not isinstance(value, _Lattice)
+
+
+def _binary(op, a, b):
+    """Абстрактне обчислення бінарної операції"""
+    if a is BOTTOM or b is BOTTOM:
+        return BOTTOM
+    if a is TOP or b is TOP:
+        return TOP
+    result = fold_binary(op, a, b)
+    return BOTTOM if result is None else result
+
+
+def _unary(op, a, arg):
+    """Абстрактне обчислення унарної операції"""
+    if isinstance(a, _Lattice):
+        return a
+    result = fold_unary(op, a, arg)
+    return BOTTOM if result is None else result
+
+
+def _simulate(instrs, state, consts, rewrite=None):
+    """
+    Абстрактно виконує інструкції блоку
+
+    Args:
+        instrs: інструкції блоку
+        state: значення змінних на вході (змінюється на місці)
+        consts: пул констант
+        rewrite: функція value → індекс константи; якщо задана,
+                 повертається також новий список інструкцій
+
+    Returns:
+        tuple: (значення умови JF/JT або None, нові інструкції або None)
+    """
+    stack = []
+    out = [] if rewrite is not None else None
+    condition = None
+    for op, arg in instrs:
+        if op == _CONST:
+            stack.append(consts[arg])
+        elif op == _LOAD:
+            value = state[arg]
+            stack.append(value)
+            if out is not None and _is_const(value):
+                out.append((_CONST, rewrite(value)))
+                continue
+        elif op == _STORE:
+            state[arg] = stack.pop() if stack else BOTTOM
+        elif op in BINARY_OPS:
+            b = stack.pop() if stack else BOTTOM
+            a = stack.pop() if stack else BOTTOM
+            stack.append(_binary(op, a, b))
+        elif op in UNARY_OPS:
+            stack.append(_unary(op, stack.pop() if stack else BOTTOM, arg))
+        elif op == _PRINT:
+            if stack:
+                stack.pop()
+        elif op == _SCAN:
+            stack.append(BOTTOM)
+        elif op == _DUP:
+            stack.append(stack[-1] if stack else BOTTOM)
+        elif op == _JF or op == _JT:
+            condition = stack.pop() if stack else BOTTOM
+        if out is not None:
+            out.append((op, arg))
+    return condition, out
+
+
+def _successors(block, condition):
+    """Виконувані наступники блоку при заданому значенні умови JF/JT"""
+    terminator = block.terminator
+    if terminator is None or terminator[0] == _JMP or condition is BOTTOM:
+        return block.succs
+    if condition is TOP:
+        return []
+    # Умова - логічна стала (числові умови не згортаються)
+    if not isinstance(condition, bool):
+        return block.succs
+    if condition == (terminator[0] == _JT):
+        return [terminator[1]]
+    return [] if block.fallthrough is None else [block.fallthrough]
+
+
+def _in_state(graph, block_id, out_states, edges, n_vars):
+    """Значення змінних на вході в блок - перетин по виконуваних дугах"""
+    if block_id == graph.entry:
+        # На вході в програму змінні не ініціалізовані
+        state = [BOTTOM] * n_vars
+    else:
+        state = [TOP] * n_vars
+    for pred in graph.blocks[block_id].preds:
+        if (pred, block_id) not in edges:
+            continue
+        pred_state = out_states[pred]
+        for slot in range(n_vars):
+            state[slot] = _meet(state[slot], pred_state[slot])
+    return state
+
+
+def sccp(program, ctx):
+    """
+    Прохід SCCP
+
+    Args:
+        program: скомпонована постфікс-програма
+        ctx: контекст проходу (PassContext)
+
+    Returns:
+        PostfixProgram: програма з поширеними сталими (або та сама програма)
+    """
+    graph = ControlFlowGraph(program)
+    n_vars = len(program.variable_table)
+    consts = program.consts
+
+    # ========== АНАЛІЗ ==========
+    out_states = {}
+    conditions = {}
+    edges = set()
+    worklist = [graph.entry]
+    queued = {graph.entry}
+    while worklist:
+        ctx.check()
+        block_id = worklist.pop()
+        queued.discard(block_id)
+        block = graph.blocks[block_id]
+        state = _in_state(graph, block_id, out_states, edges, n_vars)
+        condition, _ = _simulate(block.instrs, state, consts)
+        old = out_states.get(block_id)
+        changed = old is None or not all(map(_same, old, state))
+        out_states[block_id] = state
+        conditions[block_id] = condition
+        for succ in _successors(block, condition):
+            if (block_id, succ) not in edges:
+                edges.add((block_id, succ))
+            elif not changed:
+                continue
+            if succ not in queued:
+                queued.add(succ)
+                worklist.append(succ)
+
+    # ========== ПЕРЕПИСУВАННЯ ==========
+    changed = False
+    for block_id in graph.layout:
+        if block_id not in out_states:
+            continue
+        ctx.check()
+        block = graph.blocks[block_id]
+        state = _in_state(graph, block_id, out_states, edges, n_vars)
+        _, instrs = _simulate(block.instrs, state, consts, program.add_const)
+        instrs = fold_block(instrs, program)
+
+        # Умовний перехід зі сталою умовою
+        condition = conditions[block_id]
+        if (isinstance(condition, bool) and len(instrs) >= 2
+                and instrs[-1][0] in (_JF, _JT) and instrs[-2][0] == _CONST):
+            op, target = instrs[-1]
+            del instrs[-2:]
+            if condition == (op == _JT):
+                instrs.append((_JMP, target))
+                block.fallthrough = None
+
+        if instrs != block.instrs:
+            block.instrs = instrs
+            changed = True
+
+    # ========== НЕДОСЯЖНІ БЛОКИ ==========
+    layout = [block_id for block_id in graph.layout
+              if block_id in out_states or block_id == graph.exit]
+    if len(layout) != len(graph.layout):
+        graph.layout = layout
+        changed = True
+
+    return graph.linearize() if changed else program
@@ -0,0 +1,394 @@
+"""
+Заміна циклів-накопичувачів замкненою формою (scalar evolution)
+
+Розпізнається цикл з індукційною змінною i (крок +1 або -1) з єдиним
+блоком тіла, в якому, крім i <- i ± 1, є лише накопичення
+
+    acc <- acc + f(i)       (або acc - f(i)),
+
+де f - многочлен степеня не вище 2 від i з цілими коефіцієнтами.
+Після підстановки i = c + s*k сума за k = 0..T-1 обчислюється формулами
+
+    Σ 1 = T,   Σ k = T(T-1)/2,   Σ k^2 = T(T-1)(2T-1)/6,
+
+а T - з межі циклу через floor: для i <= n це floor(n) - c + 1.
+
+Заміна точна лише тоді, коли всі значення в циклі й у формулі - цілі
+числа не більші за 2^24 (їх float32 і double зберігають без округлення).
+Тому початкові значення i та acc мають бути цілими сталими, а перед
+формулою перевіряється, що межа не виходить за обчислений під час
+компіляції діапазон; інакше виконується початковий цикл. Для сталої межі
+перевірки і сама формула обчислюються під час компіляції.
+"""
+
+from cfg import ControlFlowGraph
+from optimizer.constant_folding import fold_block
+from optimizer.simplify_cfg import prune_unreachable
+from optimizer.unroll import find_induction, innermost_loops, constant_on_entry
+from postfix_ir import Op
+
+_CONST = int(Op.CONST)
+_LOAD = int(Op.LOAD)
+_STORE = int(Op.STORE)
+_ADD = int(Op.ADD)
+_SUB = int(Op.SUB)
+_MUL = int(Op.MUL)
+_DIV = int(Op.DIV)
+_NEG = int(Op.NEG)
+_DUP = int(Op.DUP)
+_FLOOR = int(Op.FLOOR)
+_JMP = int(Op.JMP)
+_JF = int(Op.JF)
+
+# Найбільше ціле, яке float32 представляє разом з усіма меншими
+_EXACT_LIMIT = 1 << 24
+
+# Найбільший степінь многочлена f(i)
+_MAX_DEGREE = 2
+
+
+# ========== МНОГОЧЛЕНИ {степінь: коефіцієнт} ==========
+
+def _padd(a, b, sign=1):
+    result = dict(a)
+    for power, coef in b.items():
+        result[power] = result.get(power, 0) + sign * coef
+    return {power: coef for power, coef in result.items() if coef}
+
+
+def _pmul(a, b):
+    result = {}
+    for pa, ca in a.items():
+        for pb, cb in b.items():
+            result[pa + pb] = result.get(pa + pb, 0) + ca * cb
+    return {power: coef for power, coef in result.items() if coef}
+
+
+def _peval(poly, x):
+    return sum(coef * x ** power for power, coef in poly.items())
+
+
+def _poly_bound(poly):
+    """Обмеження |f(i)| многочленом від X >= |i| (модулі коефіцієнтів)"""
+    return {power: abs(coef) for power, coef in poly.items()}
+
+
+class _Value:
+    """Значення на стеку: acc (слот накопичувача або None) + poly(i)"""
+
+    __slots__ = ('acc', 'poly', 'bound')
+
+    def __init__(self, acc, poly, bound):
+        self.acc = acc
+        self.poly = poly
+        self.bound = bound      # Многочлен від X = |c| + T + 1, що обмежує |poly(i)|
+
+
+def _parse_body(instrs, var, step, consts):
+    """
+    Розбирає тіло циклу на накопичення
+
+    Returns:
+        tuple або None: ({слот acc: f(i)}, [многочлени-обмеження проміжних значень])
+    """
+    stack = []
+    checks = []
+    updates = {}
+    incremented = False
+    for op, arg in instrs:
+        if op == _CONST:
+            value = consts[arg]
+            if isinstance(value, bool) or not isinstance(value, int):
+                return None
+            stack.append(_Value(None, {0: value} if value else {}, {0: abs(value)}))
+        elif op == _LOAD:
+            if arg != var:
+                stack.append(_Value(arg, {}, {}))
+            elif incremented:
+                stack.append(_Value(None, {0: step, 1: 1}, {0: 1, 1: 1}))
+            else:
+                stack.append(_Value(None, {1: 1}, {1: 1}))
+        elif op == _DUP:
+            if not stack:
+                return None
+            stack.append(stack[-1])
+        elif op in (_ADD, _SUB, _MUL):
+            if len(stack) < 2:
+                return None
+            b = stack.pop()
+            a = stack.pop()
+            if op == _MUL:
+                if a.acc is not None or b.acc is not None:
+                    return None
+                value = _Value(None, _pmul(a.poly, b.poly), _pmul(a.bound, b.bound))
+                if value.poly and max(value.poly) > _MAX_DEGREE:
+                    return None
+            elif b.acc is not None and (op == _SUB or a.acc is not None):
+                return None
+            else:
+                value = _Value(a.acc if a.acc is not None else b.acc,
+                               _padd(a.poly, b.poly, 1 if op == _ADD else -1),
+                               _padd(a.bound, b.bound))
+            stack.append(value)
+        elif op == _NEG:
+            if not stack or stack[-1].acc is not None:
+                return None
+            a = stack.pop()
+            stack.append(_Value(None, {p: -c for p, c in a.poly.items()}, a.bound))
+        elif op == _STORE:
+            if len(stack) != 1:
+                return None
+            value = stack.pop()
+            if arg == var:
+                if incremented or value.acc is not None or value.poly != {0: step, 1: 1}:
+                    return None
+                incremented = True
+            elif value.acc != arg or arg in updates:
+                return None
+            else:
+                # Після збільшення i завантаження вже дає i + step, тож
+                # poly - многочлен від значення i на початку ітерації
+                updates[arg] = value.poly
+            continue
+        else:
+            return None
+        checks.append(stack[-1].bound)
+    if stack or not incremented or not updates:
+        return None
+    return updates, checks
+
+
+def _sum_coefficients(poly, init, step):
+    """Коефіцієнти f(c + s*k) за степенями k: [e0, e1, e2]"""
+    result = {}
+    for power, coef in poly.items():
+        term = {0: coef}
+        for _ in range(power):
+            term = _pmul(term, {0: init, 1: step})
+        result = _padd(result, term)
+    return [result.get(power, 0) for power in range(_MAX_DEGREE + 1)]
+
+
+def _fits(trips, init, checks, accs):
+    """Чи всі значення циклу та формули - цілі, не більші за 2^24, для T = trips"""
+    x = abs(init) + trips + 1
+    if x > _EXACT_LIMIT:
+        return False
+    if any(_peval(check, x) > _EXACT_LIMIT for check in checks):
+        return False
+    for acc0, coeffs, bound in accs:
+        e0, e1, e2 = (abs(e) for e in coeffs)
+        # Часткові суми в циклі
+        if abs(acc0) + trips * _peval(bound, x) > _EXACT_LIMIT:
+            return False
+        # Проміжні значення формули
+        if (e1 or e2) and trips * trips > _EXACT_LIMIT:
+            return False
+        if e2 and 2 * trips ** 3 > _EXACT_LIMIT:
+            return False
+        if abs(acc0) + e0 * trips + e1 * trips * trips + e2 * trips ** 3 > _EXACT_LIMIT:
+            return False
+    return True
+
+
+def _max_trips(init, checks, accs):
+    """Найбільша кількість ітерацій, для якої заміна точна"""
+    low, high = 0, _EXACT_LIMIT
+    while low < high:
+        middle = (low + high + 1) // 2
+        if _fits(middle, init, checks, accs):
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _trip_instrs(program, info):
+    """Обчислення кількості ітерацій T з межі циклу (див. docstring модуля)"""
+    c = info.init
+    const = program.add_const
+    if info.rel == Op.LE:
+        return info.bound + [(_FLOOR, 0), (_CONST, const(1 - c)), (_ADD, 0)]
+    if info.rel == Op.LT:
+        return [(_CONST, const(-c))] + info.bound + [(_NEG, 0), (_FLOOR, 0), (_SUB, 0)]
+    if info.rel == Op.GE:
+        return info.bound + [(_NEG, 0), (_FLOOR, 0), (_CONST, const(c + 1)), (_ADD, 0)]
+    return [(_CONST, const(c))] + info.bound + [(_FLOOR, 0), (_SUB, 0)]
+
+
+def _range_guard(program, info, max_trips):
+    """Умова T <= max_trips, виражена через межу циклу"""
+    c = info.init
+    limit, rel = {
+        Op.LE: (c + max_trips, Op.LT),
+        Op.LT: (c + max_trips, Op.LE),
+        Op.GE: (c - max_trips, Op.GT),
+        Op.GT: (c - max_trips, Op.GE),
+    }[info.rel]
+    return info.bound + [(_CONST, program.add_const(limit)), (int(rel), 0)]
+
+
+def _closed_form(program, info, load_trips, accs):
+    """Інструкції, що присвоюють кінцеві значення i та накопичувачам"""
+    const = program.add_const
+    instrs = [(_CONST, const(info.init))] + load_trips
+    instrs += [(_ADD if info.step > 0 else _SUB, 0), (_STORE, info.var)]
+    for slot, acc0, (e0, e1, e2) in accs:
+        instrs.append((_CONST, const(acc0)))
+        if e0:
+            instrs += load_trips
+            if e0 != 1:
+                instrs += [(_CONST, const(e0)), (_MUL, 0)]
+            instrs.append((_ADD, 0))
+        if e1:
+            # T(T-1)/2
+            instrs += load_trips + load_trips + [
+                (_CONST, const(1)), (_SUB, 0), (_MUL, 0), (_CONST, const(2)), (_DIV, 0)]
+            if e1 != 1:
+                instrs += [(_CONST, const(e1)), (_MUL, 0)]
+            instrs.append((_ADD, 0))
+        if e2:
+            # T(T-1)(2T-1)/6
+            instrs += load_trips + load_trips + [(_CONST, const(1)), (_SUB, 0), (_MUL, 0)]
+            instrs += load_trips + [(_CONST, const(2)), (_MUL, 0), (_CONST, const(1)),
+                                    (_SUB, 0), (_MUL, 0), (_CONST, const(6)), (_DIV, 0)]
+            if e2 != 1:
+                instrs += [(_CONST, const(e2)), (_MUL, 0)]
+            instrs.append((_ADD, 0))
+        instrs.append((_STORE, slot))
+    return instrs
+
+
+def _static_check(program, instrs):
+    """Значення сталої умови (інструкції без змінних) або None"""
+    folded = fold_block(list(instrs), program)
+    if len(folded) == 1 and folded[0][0] == _CONST:
+        value = program.consts[folded[0][1]]
+        if isinstance(value, bool):
+            return value
+    return None
+
+
+def _static_trips(program, info):
+    """Кількість ітерацій для сталої межі (за тією ж формулою, що й під час виконання)"""
+    folded = fold_block(_trip_instrs(program, info), program)
+    if len(folded) == 1 and folded[0][0] == _CONST:
+        value = program.consts[folded[0][1]]
+        if not isinstance(value, bool) and float(value).is_integer():
+            return int(value)
+    return None
+
+
+def _replace_loop(graph, owner, info, accs, max_trips):
+    """
+    Ставить перед циклом обчислення замкненої форми
+
+    Returns:
+        list або None: номери нових блоків (None - заміна не потрібна)
+    """
+    loop = info.loop
+    exit_target = graph.blocks[loop.header].instrs[-1][1]
+    rel = int(info.rel)
+    enter = [(_CONST, owner.add_const(info.init))] + info.bound + [(rel, 0)]
+    in_range = _range_guard(owner, info, max_trips)
+
+    static = len(info.bound) == 1 and info.bound[0][0] == _CONST
+    if static:
+        # Межа стала: перевірки і формула обчислюються під час компіляції
+        if _static_check(owner, enter) is not True or _static_check(owner, in_range) is not True:
+            return None
+        trips = _static_trips(owner, info)
+        if trips is None:
+            return None
+        instrs = fold_block(_closed_form(owner, info, [(_CONST, owner.add_const(trips))], accs),
+                            owner)
+        pre = graph.insert_preheader(loop, instrs + [(_JMP, exit_target)])
+        pre.fallthrough = None
+        graph.update_edges([pre.id])
+        return [pre.id]
+
+    temp = owner.new_temp('scev')
+    pre = graph.insert_preheader(loop, enter + [(_JF, loop.header)])
+    body = graph.new_block(_trip_instrs(owner, info) + [(_STORE, temp)]
+                           + _closed_form(owner, info, [(_LOAD, temp)], accs)
+                           + [(_JMP, exit_target)])
+    check = graph.new_block(in_range + [(_JF, loop.header)], fallthrough=body.id)
+    pre.fallthrough = check.id
+    graph.place_before(loop.header, [check.id, body.id])
+    graph.update_edges([pre.id, check.id, body.id])
+    return [pre.id, check.id, body.id]
+
+
+def scalar_evolution(program, ctx):
+    """
+    Прохід заміни циклів-накопичувачів замкненою формою
+
+    Args:
+        program: скомпонована постфікс-програма
+        ctx: контекст проходу (PassContext)
+
+    Returns:
+        PostfixProgram: програма без циклів-накопичувачів (або та сама)
+    """
+    graph = ControlFlowGraph(program)
+    loops = graph.loops()
+    if not loops:
+        return program
+    owner = program.derive()
+    owner.variable_table = dict(program.variable_table)
+    graph.program = owner
+    consts = program.consts
+
+    # Аналіз усіх циклів до зміни графа (домінатори)
+    innermost = innermost_loops(loops)
+    candidates = []
+    for loop in loops:
+        ctx.check()
+        if len(loop.blocks) != 2:
+            continue
+        info = find_induction(graph, loop, innermost, consts)
+        if info is None or abs(info.step) != 1:
+            continue
+        body = graph.blocks[loop.latches[0]]
+        parsed = _parse_body(body.instrs[:-1], info.var, info.step, consts)
+        if parsed is None:
+            continue
+        updates, checks = parsed
+        accs = []
+        for slot, poly in sorted(updates.items()):
+            acc0 = constant_on_entry(graph, loop.header, loop, slot, consts)
+            if acc0 is None:
+                break
+            accs.append((slot, acc0, _sum_coefficients(poly, info.init, info.step), poly))
+        else:
+            candidates.append((info, accs, checks))
+
+    modified = set()
+    changed = False
+    for info, accs, checks in candidates:
+        ctx.check()
+        loop = info.loop
+        if loop.blocks & modified:
+            continue
+        bounds = [(acc0, coeffs, _poly_bound(poly)) for _, acc0, coeffs, poly in accs]
+        max_trips = _max_trips(info.init, checks, bounds)
+        if max_trips < 1:
+            continue
+        new_blocks = _replace_loop(graph, owner, info,
+                                   [(slot, acc0, coeffs) for slot, acc0, coeffs, _ in accs],
+                                   max_trips)
+        if new_blocks is None:
+            continue
+        outer = loop.parent
+        while outer is not None:
+            outer.blocks.update(new_blocks)
+            outer = outer.parent
+        modified.update(loop.blocks)
+        modified.update(new_blocks)
+        changed = True
+
+    if not changed:
+        return program
+    prune_unreachable(graph)
+    return graph.linearize()
+
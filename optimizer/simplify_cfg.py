@@ -0,0 +1,139 @@
+"""
+Спрощення графа потоку керування
+
+Видалення блоків, недосяжних з входу програми (наприклад, код після
+умови, що завжди хибна, або тіло циклу з константною умовою FALSE).
+
+Протягування переходів (jump threading): перехід на блок, що лише
+передає керування далі (JMP m або порожній блок), одразу ведеться до
+кінцевого блоку ланцюжка. Мітки, на які більше немає переходів, не
+потрапляють у зібраний код, а блок з єдиним наступником, для якого він
+єдиний попередник, зливається з ним в один лінійний блок.
+"""
+
+from cfg import ControlFlowGraph
+from postfix_ir import Op
+
+_JMP = int(Op.JMP)
+_JF = int(Op.JF)
+_JT = int(Op.JT)
+
+
+def prune_unreachable(graph):
+    """
+    Прибирає з розміщення графа блоки, недосяжні з входу
+
+    Returns:
+        bool: True якщо хоча б один блок видалено
+    """
+    reachable = graph.reachable()
+    reachable.add(graph.exit)
+    layout = [block_id for block_id in graph.layout if block_id in reachable]
+    if len(layout) == len(graph.layout):
+        return False
+    graph.layout = layout
+    return True
+
+
+def _forwarding_target(graph, block_id):
+    """
+    Блок, в який блок block_id лише передає керування, або None
+
+    (блок з єдиною інструкцією JMP або порожній блок з fallthrough)
+    """
+    if block_id == graph.exit:
+        return None
+    block = graph.blocks[block_id]
+    if not block.instrs:
+        return block.fallthrough
+    if len(block.instrs) == 1 and block.instrs[0][0] == _JMP:
+        return block.instrs[0][1]
+    return None
+
+
+def _final_target(graph, block_id):
+    """Кінцевий блок ланцюжка передач керування (цикли з переходів зупиняють пошук)"""
+    seen = {block_id}
+    while True:
+        target = _forwarding_target(graph, block_id)
+        if target is None or target in seen:
+            return block_id
+        seen.add(target)
+        block_id = target
+
+
+def _merge_blocks(graph):
+    """
+    Зливає блок з єдиним наступником, якщо він - єдиний попередник наступника
+
+    Returns:
+        bool: True якщо хоча б одну пару блоків злито
+    """
+    removed = set()
+    for block_id in graph.layout:
+        if block_id in removed:
+            continue
+        block = graph.blocks[block_id]
+        while True:
+            terminator = block.terminator
+            if terminator is not None and terminator[0] in (_JF, _JT):
+                break
+            succ = terminator[1] if terminator is not None else block.fallthrough
+            if (succ is None or succ in (block_id, graph.entry, graph.exit)
+                    or graph.blocks[succ].preds != [block_id]):
+                break
+            other = graph.blocks[succ]
+            instrs = block.instrs[:-1] if terminator is not None else block.instrs
+            block.instrs = instrs + other.instrs
+            block.fallthrough = other.fallthrough
+            block.succs = other.succs
+            for next_id in other.succs:
+                preds = graph.blocks[next_id].preds
+                preds[preds.index(succ)] = block_id
+            removed.add(succ)
+    if not removed:
+        return False
+    graph.layout = [block_id for block_id in graph.layout if block_id not in removed]
+    graph.compute_edges()
+    return True
+
+
+def thread_jumps(program, ctx):
+    """
+    Протягує переходи до кінцевих блоків і зливає лінійні ланцюжки блоків
+
+    Args:
+        program: скомпонована постфікс-програма
+        ctx: контекст проходу (PassContext)
+
+    Returns:
+        PostfixProgram: програма з меншою кількістю переходів (або та сама)
+    """
+    graph = ControlFlowGraph(program)
+    changed = False
+    for block_id in graph.layout:
+        ctx.check()
+        block = graph.blocks[block_id]
+        terminator = block.terminator
+        if terminator is not None:
+            op, target = terminator
+            final = _final_target(graph, target)
+            if final != target:
+                block.instrs = block.instrs[:-1] + [(op, final)]
+                changed = True
+        # fallthrough перенаправляється лише з блоку-переходу JMP m:
+        # на місці пропущеного порожнього блоку довелося б додати JMP
+        if block.fallthrough is not None:
+            target = block.fallthrough
+            if graph.blocks[target].instrs and _forwarding_target(graph, target) is not None:
+                final = _final_target(graph, target)
+                if final != target:
+                    block.fallthrough = final
+                    changed = True
+
+    if changed:
+        graph.compute_edges()
+        prune_unreachable(graph)
+    if _merge_blocks(graph):
+        changed = True
+    return graph.linearize() if changed else program
@@ -0,0 +1,89 @@
+"""
+Зниження вартості операції степеня (strength reduction)
+
+Кожне ^ у CIL - це виклик Math::Pow, а в постфікс-машині - оператор **.
+Для сталого показника степінь замінюється дешевшими операціями:
+    x ^ 1           → x
+    x ^ 2           → x dup *       (x*x округлюється так само, як Pow)
+    x ^ n, 3..32    → x powi n      (множення за схемою square-and-multiply)
+    x ^ 0.5         → x sqrt        (Math::Sqrt)
+
+У CIL powi множить у float64 і округлює до float32 один раз у кінці.
+Кожне множення округлює double, тож збіг з conv.r4(Math::Pow(x, n))
+не гарантований (розбіжність можлива в останньому біті float32).
+Постфікс-машина виконує powi оператором **, як і POW: її вивід
+(повний double) не змінюється.
+Степені зі змінним показником (2 ^ k) не змінюються.
+
+sqrt зберігає результати Math::Pow(x, 0.5) для особливих значень:
+Pow(-0.0, 0.5) = +0.0 і Pow(-inf, 0.5) = +inf, тоді як Math::Sqrt дає
+-0.0 і NaN. Генератор CIL додає +0.0 перед Math::Sqrt і обробляє -inf
+окремою гілкою; постфікс-машина для x <= 0 обчислює x ** 0.5.
+"""
+
+from cfg import ControlFlowGraph
+from postfix_ir import Op
+
+_CONST = int(Op.CONST)
+_POW = int(Op.POW)
+_MUL = int(Op.MUL)
+_DUP = int(Op.DUP)
+_SQRT = int(Op.SQRT)
+_POWI = int(Op.POWI)
+
+# Найбільший показник, що замінюється множеннями
+MAX_POWI_EXPONENT = 32
+
+
+def _reduce(exponent):
+    """
+    Повертає інструкції, що замінюють "exponent ^", або None
+
+    Args:
+        exponent: значення сталого показника
+    """
+    if isinstance(exponent, bool):
+        return None
+    if exponent == 0.5:
+        return [(_SQRT, 0)]
+    if float(exponent).is_integer():
+        n = int(exponent)
+        if n == 1:
+            return []
+        if n == 2:
+            return [(_DUP, 0), (_MUL, 0)]
+        if 3 <= n <= MAX_POWI_EXPONENT:
+            return [(_POWI, n)]
+    return None
+
+
+def strength_reduction(program, ctx):
+    """
+    Прохід зниження вартості степеня
+
+    Args:
+        program: скомпонована постфікс-програма
+        ctx: контекст проходу (PassContext)
+
+    Returns:
+        PostfixProgram: програма без викликів Pow для сталих показників (або та сама)
+    """
+    graph = ControlFlowGraph(program)
+    consts = program.consts
+    changed = False
+    for block_id in graph.layout:
+        ctx.check()
+        block = graph.blocks[block_id]
+        out = []
+        for op, arg in block.instrs:
+            if op == _POW and out and out[-1][0] == _CONST:
+                replacement = _reduce(consts[out[-1][1]])
+                if replacement is not None:
+                    out.pop()
+                    out.extend(replacement)
+                    continue
+            out.append((op, arg))
+        if out != block.instrs:
+            block.instrs = out
+            changed = True
+    return graph.linearize() if changed else program
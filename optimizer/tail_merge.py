@@ -0,0 +1,155 @@
+"""
+Злиття однакових кінців блоків (tail merging, cross jumping)
+
+Гілки if/else часто закінчуються однаковими операторами:
+
+    m1: ... s print i 1 + =i JMP m3  m2: ... s print i 1 + =i  m3:
+        →  m1: ... JMP m4  m2: ...  m4: s print i 1 + =i  m3:
+
+Для кожного блоку S беруться попередники, що безумовно переходять у S
+(JMP S або fallthrough). Їх однакові кінцеві послідовності інструкцій
+виносяться в новий блок T, розміщений перед S; попередники переходять
+у T замість S. Якщо кілька підмножин попередників мають різні спільні
+кінці, обирається злиття з найбільшою економією інструкцій, і пошук
+повторюється.
+
+Кінець, що зливається, має бути самодостатнім: він не знімає зі стеку
+значень, обчислених до нього (починається на межі операторів), тож між
+блоками не з'являється нових значень на стеку. Заголовки циклів і вхід
+програми не обробляються: злиття переходів у заголовок змінило б форму
+циклу. Кількість виконуваних переходів не зростає: попередник, що йшов
+у S без переходу, лежить одразу перед T.
+"""
+
+from cfg import ControlFlowGraph
+from postfix_ir import Op, STACK_EFFECT
+
+_JMP = int(Op.JMP)
+
+
+def _body(block):
+    """Інструкції блоку без завершального JMP"""
+    if block.instrs and block.instrs[-1][0] == _JMP:
+        return block.instrs[:-1]
+    return block.instrs
+
+
+def _self_contained(instrs, length):
+    """True якщо останні length інструкцій не знімають зі стеку значень, обчислених до них"""
+    need = 0
+    for op, _ in reversed(instrs[len(instrs) - length:]):
+        pops, pushes = STACK_EFFECT[op]
+        need = pops + max(0, need - pushes)
+    return need == 0
+
+
+def _unconditional_preds(graph, block_id):
+    """Попередники, що переходять лише в block_id (JMP або fallthrough)"""
+    preds = []
+    for pred in dict.fromkeys(graph.blocks[block_id].preds):
+        block = graph.blocks[pred]
+        if pred != block_id and block.succs == [block_id] and _body(block):
+            preds.append(pred)
+    return preds
+
+
+def _best_merge(graph, block_id, preds, previous):
+    """
+    Найвигідніше злиття кінців попередників блоку
+
+    Попередники розбиваються за останньою інструкцією, далі - за
+    передостанньою тощо; кожна група з двох і більше блоків на глибині d
+    означає спільний кінець довжини d.
+
+    Args:
+        graph: граф потоку керування
+        block_id: спільний наступник S
+        preds: попередники, що безумовно переходять у S
+        previous: блок, розміщений перед S (None для першого)
+
+    Returns:
+        tuple: (економія, попередники, довжина кінця) або None
+    """
+    # Вставка T між S і попереднім блоком, що потрапляє в S без переходу,
+    # коштує йому одного JMP
+    falls_into = (previous is not None and previous.fallthrough == block_id
+                  and not (previous.instrs and previous.instrs[-1][0] == _JMP))
+
+    bodies = {pred: _body(graph.blocks[pred]) for pred in preds}
+    best = None
+    pending = [(preds, 0)]
+    while pending:
+        group, depth = pending.pop()
+        subgroups = {}
+        for pred in group:
+            body = bodies[pred]
+            if len(body) > depth:
+                subgroups.setdefault(body[-depth - 1], []).append(pred)
+        for members in subgroups.values():
+            if len(members) < 2:
+                continue
+            length = depth + 1
+            pending.append((members, length))
+            if not _self_contained(bodies[members[0]], length):
+                continue
+            saving = (len(members) - 1) * length
+            if falls_into and previous.id not in members:
+                saving -= 1
+            if saving > 0 and (best is None or saving > best[0]):
+                best = (saving, members, length)
+    return best
+
+
+def tail_merge(program, ctx):
+    """
+    Прохід злиття однакових кінців блоків
+
+    Args:
+        program: скомпонована постфікс-програма
+        ctx: контекст проходу (PassContext)
+
+    Returns:
+        PostfixProgram: коротша програма (або та сама)
+    """
+    graph = ControlFlowGraph(program)
+    headers = {loop.header for loop in graph.loops()}
+    # Блок, розміщений перед кожним блоком (нові блоки T стають перед S)
+    layout = graph.layout
+    previous_of = {block_id: prev for prev, block_id in zip(layout, layout[1:])}
+    changed = False
+    worklist = list(layout)
+    while worklist:
+        ctx.check()
+        block_id = worklist.pop()
+        if block_id == graph.entry or block_id in headers:
+            continue
+        previous = previous_of.get(block_id)
+        best = _best_merge(graph, block_id, _unconditional_preds(graph, block_id),
+                           None if previous is None else graph.blocks[previous])
+        if best is None:
+            continue
+        _, members, length = best
+
+        first = graph.blocks[members[0]]
+        body = _body(first)
+        tail = graph.new_block(body[len(body) - length:], block_id)
+        for pred in members:
+            block = graph.blocks[pred]
+            body = _body(block)
+            # Попередник, що лежить одразу перед S, потрапить у T без переходу
+            block.instrs = body[:len(body) - length] + [(_JMP, tail.id)]
+            block.fallthrough = None
+        graph.place_before(block_id, [tail.id])
+        if previous is not None:
+            previous_of[tail.id] = previous
+        previous_of[block_id] = tail.id
+        if previous in members:
+            block = graph.blocks[previous]
+            block.instrs = block.instrs[:-1]
+            block.fallthrough = tail.id
+        graph.update_edges(members + [tail.id])
+        changed = True
+        # Інші попередники S і попередники T можуть мати ще спільні кінці
+        worklist += [block_id, tail.id]
+
+    return graph.linearize() if changed else program
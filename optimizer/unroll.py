@@ -0,0 +1,344 @@
+"""
+Розгортання циклів з індукційною змінною (loop unrolling)
+
+Розгортається цикл виду
+
+    i <- c
+    while (i <= bound) { ...; i <- i + step }
+
+де c і step - цілі сталі, i змінюється в циклі лише цим присвоєнням
+(у блоці, що виконується в кожній ітерації), а bound не змінюється.
+
+    - Повне розгортання: якщо bound - стала, кількість ітерацій T
+      обчислюється під час компіляції (за правилами float32), і цикл
+      замінюється T копіями тіла без перевірок і переходів.
+    - Часткове розгортання на N: перед циклом додається новий заголовок
+      з перевіркою i + (N-1)*step <= bound - якщо вона істинна, всі N
+      наступних ітерацій гарантовано виконуються, тож N копій тіла йдуть
+      підряд без проміжних перевірок. Решта ітерацій виконується
+      початковим циклом (remainder loop).
+
+Значення i - цілі числа, тож i + (N-1)*step обчислюється точно
+(до 2^24 у float32). Розмір коду обмежують параметри проходу
+'unroll-max-trip', 'unroll-factor' і 'unroll-max-size'.
+"""
+
+from cfg import ControlFlowGraph
+from optimizer.constant_folding import fold_binary
+from optimizer.licm import stored_vars
+from optimizer.simplify_cfg import prune_unreachable
+from postfix_ir import Op, PURE_OPS, expr_start
+
+_CONST = int(Op.CONST)
+_LOAD = int(Op.LOAD)
+_STORE = int(Op.STORE)
+_ADD = int(Op.ADD)
+_SUB = int(Op.SUB)
+_JMP = int(Op.JMP)
+_JF = int(Op.JF)
+
+# Параметри за замовчуванням
+DEFAULT_MAX_TRIP = 16       # Найбільша кількість ітерацій для повного розгортання
+DEFAULT_FACTOR = 4          # Коефіцієнт часткового розгортання
+DEFAULT_MAX_SIZE = 128      # Найбільша кількість скопійованих інструкцій на цикл
+
+# Напрям кроку, для якого умова колись стане хибною
+_INCREASING = (Op.LT, Op.LE)
+_DECREASING = (Op.GT, Op.GE)
+
+
+class InductionLoop:
+    """Цикл з індукційною змінною: умова var rel bound, крок step, початок init"""
+
+    def __init__(self, loop, var, rel, bound, step, init):
+        self.loop = loop
+        self.var = var
+        self.rel = rel
+        self.bound = bound      # Інструкції виразу межі
+        self.step = step
+        self.init = init
+
+
+def int_const(consts, instr):
+    """Значення цілої сталої інструкції CONST або None"""
+    op, arg = instr
+    if op != _CONST:
+        return None
+    value = consts[arg]
+    if isinstance(value, bool) or not isinstance(value, int):
+        return None
+    return value
+
+
+def _increment(instrs, pos, var, consts):
+    """
+    Крок присвоєння instrs[pos] = (STORE var), якщо це var <- var ± стала
+
+    Returns:
+        int або None: крок (зі знаком)
+    """
+    if pos < 3:
+        return None
+    a, b, (op, _) = instrs[pos - 3:pos]
+    if op == _ADD and a == (_LOAD, var):
+        step = int_const(consts, b)
+    elif op == _ADD and b == (_LOAD, var):
+        step = int_const(consts, a)
+    elif op == _SUB and a == (_LOAD, var):
+        step = int_const(consts, b)
+        step = None if step is None else -step
+    else:
+        return None
+    return step or None
+
+
+def constant_on_entry(graph, header, loop, var, consts):
+    """
+    Стале ціле значення var на вході в цикл або None
+
+    Шукає останнє присвоєння var у ланцюжку блоків з єдиним попередником,
+    що веде до заголовка ззовні циклу.
+    """
+    outside = [pred for pred in graph.blocks[header].preds if pred not in loop.blocks]
+    if len(outside) != 1:
+        return None
+    block_id = outside[0]
+    seen = set()
+    while block_id not in seen:
+        seen.add(block_id)
+        instrs = graph.blocks[block_id].instrs
+        for pos in range(len(instrs) - 1, -1, -1):
+            if instrs[pos] == (_STORE, var):
+                return int_const(consts, instrs[pos - 1]) if pos > 0 else None
+        preds = graph.blocks[block_id].preds
+        if len(preds) != 1:
+            return None
+        block_id = preds[0]
+    return None
+
+
+def innermost_loops(loops):
+    """
+    Найменший цикл, що містить кожен блок
+
+    Args:
+        loops: цикли від внутрішніх до зовнішніх (ControlFlowGraph.loops)
+
+    Returns:
+        dict: {номер блоку: Loop}
+    """
+    innermost = {}
+    for loop in reversed(loops):
+        for block_id in loop.blocks:
+            innermost[block_id] = loop
+    return innermost
+
+
+def find_induction(graph, loop, innermost, consts):
+    """
+    Перевіряє, чи має цикл придатну для розгортання форму
+
+    Args:
+        graph: граф потоку керування
+        loop: цикл-кандидат
+        innermost: найменший цикл кожного блоку (innermost_loops)
+        consts: таблиця констант програми
+
+    Returns:
+        InductionLoop або None
+    """
+    header = graph.blocks[loop.header]
+    if len(loop.latches) != 1 or any(src != loop.header for src, _ in loop.exits):
+        return None
+    latch = loop.latches[0]
+    if latch == loop.header or graph.blocks[latch].terminator != (_JMP, loop.header):
+        return None
+
+    # ========== ЗАГОЛОВОК: var bound rel JF ==========
+    instrs = header.instrs
+    if len(instrs) < 4 or instrs[-1][0] != _JF or header.fallthrough not in loop.blocks:
+        return None
+    rel = instrs[-2][0]
+    if rel not in _INCREASING and rel not in _DECREASING:
+        return None
+    if expr_start(instrs, len(instrs) - 1) != 0 or instrs[0][0] != _LOAD:
+        return None
+    var = instrs[0][1]
+    bound = instrs[1:-2]
+    if expr_start(instrs, len(instrs) - 2) != 1:
+        return None
+    variant = 0
+    for block_id in loop.blocks:
+        variant |= stored_vars(graph.blocks[block_id].instrs)
+    for op, arg in bound:
+        if op not in PURE_OPS or (op == _LOAD and variant >> arg & 1):
+            return None
+
+    # ========== ЄДИНЕ ПРИСВОЄННЯ var У ЦИКЛІ ==========
+    found = None
+    for block_id in loop.blocks:
+        for pos, instr in enumerate(graph.blocks[block_id].instrs):
+            if instr == (_STORE, var):
+                if found is not None:
+                    return None
+                found = (block_id, pos)
+    if found is None:
+        return None
+    inc_block, pos = found
+    # Присвоєння виконується рівно раз за ітерацію (і не у вкладеному циклі)
+    if not graph.dominates(inc_block, latch) or innermost[inc_block] is not loop:
+        return None
+    step = _increment(graph.blocks[inc_block].instrs, pos, var, consts)
+    if step is None or (step > 0) != (rel in _INCREASING):
+        return None
+
+    init = constant_on_entry(graph, loop.header, loop, var, consts)
+    if init is None:
+        return None
+    return InductionLoop(loop, var, rel, bound, step, init)
+
+
+def _trip_count(info, consts, limit):
+    """
+    Кількість ітерацій для сталої межі (або None, якщо вона невідома чи > limit)
+    """
+    if len(info.bound) != 1 or info.bound[0][0] != _CONST:
+        return None
+    bound = consts[info.bound[0][1]]
+    value = info.init
+    count = 0
+    while True:
+        condition = fold_binary(info.rel, value, bound)
+        if condition is not True:
+            return count if condition is False else None
+        count += 1
+        if count > limit:
+            return None
+        value = fold_binary(_ADD, value, info.step)
+        if value is None:
+            return None
+
+
+def _copy_body(graph, body, entry, back_target):
+    """
+    Копіює блоки тіла циклу; переходи на заголовок ведуть у back_target
+
+    Returns:
+        tuple: (номер копії вхідного блоку тіла, номери нових блоків)
+    """
+    clone = {block_id: graph.new_block().id for block_id in body}
+    for block_id in body:
+        src = graph.blocks[block_id]
+        copy = graph.blocks[clone[block_id]]
+        copy.instrs = list(src.instrs)
+        if src.fallthrough is not None:
+            copy.fallthrough = clone.get(src.fallthrough, back_target)
+        terminator = src.terminator
+        if terminator is not None:
+            copy.instrs[-1] = (terminator[0], clone.get(terminator[1], back_target))
+    return clone[entry], [clone[block_id] for block_id in body]
+
+
+def _unroll(graph, info, copies, position, guard=None):
+    """
+    Замінює вхід у цикл ланцюжком з copies копій тіла
+
+    Args:
+        graph: граф потоку керування
+        info: InductionLoop
+        copies: кількість копій тіла
+        position: {блок: індекс у початковому layout} (цикл складається
+                  лише з початкових блоків - змінені цикли пропускаються)
+        guard: інструкції перевірки (часткове розгортання, перехід JF на
+               початковий цикл додається тут) або None (повне розгортання)
+
+    Returns:
+        list: номери нових блоків
+    """
+    loop = info.loop
+    header = graph.blocks[loop.header]
+    exit_target = header.instrs[-1][1]
+    entry = header.fallthrough
+    body = sorted((block_id for block_id in loop.blocks if block_id != loop.header),
+                  key=position.__getitem__)
+
+    if guard is None:
+        pre = graph.insert_preheader(loop)
+        back_target = exit_target
+    else:
+        pre = graph.insert_preheader(loop, guard + [(_JF, loop.header)])
+        back_target = pre.id
+
+    # Копії будуються з кінця: кожна повертається у вхід наступної
+    new_blocks = []
+    for _ in range(copies):
+        back_target, blocks = _copy_body(graph, body, entry, back_target)
+        new_blocks[:0] = blocks
+    pre.fallthrough = back_target
+
+    graph.place_before(loop.header, new_blocks)
+    outer = loop.parent
+    while outer is not None:
+        outer.blocks.update(new_blocks)
+        outer = outer.parent
+    graph.update_edges(new_blocks + [pre.id])
+    return new_blocks + [pre.id]
+
+
+def loop_unrolling(program, ctx):
+    """
+    Прохід розгортання циклів
+
+    Args:
+        program: скомпонована постфікс-програма
+        ctx: контекст проходу (PassContext)
+
+    Returns:
+        PostfixProgram: програма з розгорнутими циклами (або та сама)
+    """
+    graph = ControlFlowGraph(program)
+    loops = graph.loops()
+    if not loops:
+        return program
+    consts = program.consts
+    max_trip = ctx.option('unroll-max-trip', DEFAULT_MAX_TRIP)
+    factor = ctx.option('unroll-factor', DEFAULT_FACTOR)
+    max_size = ctx.option('unroll-max-size', DEFAULT_MAX_SIZE)
+
+    # Аналіз усіх циклів до зміни графа (домінатори)
+    innermost = innermost_loops(loops)
+    candidates = []
+    for loop in loops:
+        ctx.check()
+        info = find_induction(graph, loop, innermost, consts)
+        if info is not None:
+            candidates.append(info)
+
+    position = {block_id: i for i, block_id in enumerate(graph.layout)}
+    modified = set()
+    changed = False
+    for info in candidates:
+        ctx.check()
+        loop = info.loop
+        if loop.blocks & modified:
+            continue
+        body_size = sum(len(graph.blocks[block_id].instrs)
+                        for block_id in loop.blocks if block_id != loop.header)
+        trips = _trip_count(info, consts, max_trip)
+        if trips is not None and trips * body_size <= max_size:
+            new_blocks = _unroll(graph, info, trips, position)
+        elif factor >= 2 and factor * body_size <= max_size:
+            offset = program.add_const(info.step * (factor - 1))
+            guard = ([(_LOAD, info.var), (_CONST, offset), (_ADD, 0)]
+                     + info.bound + [(info.rel, 0)])
+            new_blocks = _unroll(graph, info, factor, position, guard)
+        else:
+            continue
+        modified.update(loop.blocks)
+        modified.update(new_blocks)
+        changed = True
+
+    if not changed:
+        return program
+    prune_unreachable(graph)
+    return graph.linearize()
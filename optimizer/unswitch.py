@@ -0,0 +1,190 @@
+"""
+Розгалуження циклів за інваріантною умовою (loop unswitching)
+
+Якщо в тілі циклу є if, умова якого не змінюється в циклі
+(while (i < n) { if (mode == 1) {...} else {...} ... }), цикл
+дублюється у дві спеціалізовані версії, а умова перевіряється один раз
+перед ними:
+
+    if (mode == 1) { while (i < n) { ...then...  } }
+    else           { while (i < n) { ...else...  } }
+
+У версії для істинної умови залишається лише гілка then, у версії для
+хибної - лише гілка else, тож у кожній ітерації зникають порівняння і
+перехід. Умова обчислюється до циклу, тому вона не повинна завершуватися
+помилкою, якщо цикл не виконається жодного разу: дозволені лише сталі,
+змінні, присвоєні до циклу, і операції без ділення та степенів (^, powi
+і sqrt); порівняння <, <=, >, >= - лише над значеннями, що не можуть
+бути комплексними (x ^ 0.5 при x < 0).
+
+Ріст коду обмежений бюджетом - сумарною кількістю скопійованих
+інструкцій за один запуск проходу (параметр 'unswitch-budget').
+"""
+
+from cfg import ControlFlowGraph
+from optimizer.licm import (stored_vars, assigned_before, complex_vars, real_result,
+                            SAFE_OPS, REAL_OPS)
+from optimizer.simplify_cfg import prune_unreachable
+from postfix_ir import Op, STACK_EFFECT, expr_start
+
+_CONST = int(Op.CONST)
+_LOAD = int(Op.LOAD)
+_DUP = int(Op.DUP)
+_JMP = int(Op.JMP)
+_JF = int(Op.JF)
+
+# Бюджет росту коду за замовчуванням (інструкцій за запуск проходу)
+DEFAULT_UNSWITCH_BUDGET = 64
+
+
+def _invariant_condition(instrs, variant, assigned, complex_mask):
+    """
+    Чи можна обчислити умову один раз перед циклом
+
+    Args:
+        instrs: інструкції виразу умови
+        variant: маска змінних, що змінюються в циклі
+        assigned: маска змінних, гарантовано присвоєних до циклу
+        complex_mask: маска змінних, що можуть бути комплексними
+    """
+    # Для кожного значення на стеку: чи не може воно бути комплексним
+    real = []
+    for op, arg in instrs:
+        if op == _CONST:
+            real.append(True)
+        elif op == _LOAD:
+            if variant >> arg & 1 or not assigned >> arg & 1:
+                return False
+            real.append(not complex_mask >> arg & 1)
+        elif op == _DUP:
+            real.append(real[-1])
+        else:
+            pops = STACK_EFFECT[op][0]
+            operands = real[len(real) - pops:]
+            del real[len(real) - pops:]
+            if op in REAL_OPS:
+                if not all(operands):
+                    return False
+            elif op not in SAFE_OPS:
+                return False
+            real.append(real_result(op, operands))
+    return True
+
+
+def _find_condition(graph, loop, variant, assigned, complex_mask):
+    """
+    Шукає в тілі циклу умовний перехід з інваріантною умовою
+
+    Returns:
+        tuple або None: (номер блоку з JF, індекс початку виразу умови)
+    """
+    for block_id in sorted(loop.blocks):
+        if block_id == loop.header:
+            continue
+        block = graph.blocks[block_id]
+        terminator = block.terminator
+        if (terminator is None or terminator[0] != _JF
+                or block.fallthrough is None or block.fallthrough == terminator[1]):
+            continue
+        end = len(block.instrs) - 1
+        start = expr_start(block.instrs, end)
+        if start is not None and _invariant_condition(block.instrs[start:end],
+                                                      variant, assigned, complex_mask):
+            return block_id, start
+    return None
+
+
+def _unswitch(graph, loop, cond_id, start):
+    """
+    Дублює цикл і спеціалізує обидві копії за значенням умови
+
+    Returns:
+        list: номери нових блоків (копії циклу)
+    """
+    block = graph.blocks[cond_id]
+    condition = block.instrs[start:-1]
+    false_target = block.instrs[-1][1]
+    ordered = [block_id for block_id in graph.layout if block_id in loop.blocks]
+
+    # ========== КОПІЯ ЦИКЛУ ==========
+    clone = {}
+    for block_id in ordered:
+        src = graph.blocks[block_id]
+        clone[block_id] = graph.new_block(list(src.instrs), src.fallthrough).id
+    for copy_id in clone.values():
+        copy = graph.blocks[copy_id]
+        if copy.fallthrough is not None:
+            copy.fallthrough = clone.get(copy.fallthrough, copy.fallthrough)
+        terminator = copy.terminator
+        if terminator is not None:
+            copy.instrs[-1] = (terminator[0], clone.get(terminator[1], terminator[1]))
+
+    # Оригінал - умова істинна, копія - умова хибна
+    block.instrs = block.instrs[:start]
+    copy = graph.blocks[clone[cond_id]]
+    copy.instrs = copy.instrs[:start] + [(_JMP, clone.get(false_target, false_target))]
+    copy.fallthrough = None
+
+    # ========== ПЕРЕВІРКА ПЕРЕД ЦИКЛОМ ==========
+    graph.insert_preheader(loop, condition + [(_JF, clone[loop.header])])
+    last = max(graph.layout.index(block_id) for block_id in ordered)
+    copies = [clone[block_id] for block_id in ordered]
+    graph.layout[last + 1:last + 1] = copies
+    outer = loop.parent
+    while outer is not None:
+        outer.blocks.update(copies)
+        outer = outer.parent
+    graph.compute_edges()
+    return copies
+
+
+def loop_unswitching(program, ctx):
+    """
+    Прохід розгалуження циклів
+
+    Args:
+        program: скомпонована постфікс-програма
+        ctx: контекст проходу (PassContext)
+
+    Returns:
+        PostfixProgram: програма зі спеціалізованими циклами (або та сама)
+    """
+    graph = ControlFlowGraph(program)
+    loops = graph.loops()
+    if not loops:
+        return program
+
+    # Усе, що залежить від домінаторів, обчислюється до зміни графа
+    stores_mask = {block_id: stored_vars(graph.blocks[block_id].instrs)
+                   for block_id in graph.layout}
+    before = assigned_before(graph, stores_mask)
+    assigned = {loop.header: before[loop.header] for loop in loops}
+    complex_mask = complex_vars(graph)
+    budget = ctx.option('unswitch-budget', DEFAULT_UNSWITCH_BUDGET)
+    modified = set()
+    changed = False
+
+    # Від внутрішніх циклів до зовнішніх; цикл, що містить уже змінений,
+    # у цьому запуску не обробляється (його блоки вже інші)
+    for loop in loops:
+        ctx.check()
+        if loop.blocks & modified:
+            continue
+        size = sum(len(graph.blocks[block_id].instrs) for block_id in loop.blocks)
+        if size > budget:
+            continue
+        variant = 0
+        for block_id in loop.blocks:
+            variant |= stores_mask[block_id]
+        found = _find_condition(graph, loop, variant, assigned[loop.header], complex_mask)
+        if found is None:
+            continue
+        modified.update(loop.blocks)
+        modified.update(_unswitch(graph, loop, *found))
+        budget -= size
+        changed = True
+
+    if not changed:
+        return program
+    prune_unreachable(graph)
+    return graph.linearize()
@@ -0,0 +1,339 @@
+"""
+Типізоване проміжне представлення (IR) постфікс-коду
+
+Кожна інструкція - це пара (код операції, цілий операнд). Замість списку
+рядків ('=x', 'm3:', '3.14', ...) програма зберігається у двох паралельних
+компактних масивах: ops (коди операцій) та args (операнди).
+Класифікація елементів відбувається один раз - під час генерації коду
+фронтендом (Lab5 parser / Lab6 visitor), а не при кожному проході.
+"""
+
+from array import array
+from collections import namedtuple
+from enum import IntEnum
+
+
+class Op(IntEnum):
+    """Коди операцій постфікс-машини"""
+    CONST = 0     # Завантажити константу, arg = індекс у пулі констант
+    LOAD = 1      # Завантажити змінну, arg = слот змінної (індекс - 1)
+    STORE = 2     # Зберегти вершину стеку у змінну, arg = слот змінної
+    ADD = 3       # a + b
+    SUB = 4       # a - b
+    MUL = 5       # a * b
+    DIV = 6       # a / b
+    POW = 7       # a ^ b
+    NEG = 8       # -a
+    LT = 9        # a < b
+    LE = 10       # a <= b
+    GT = 11       # a > b
+    GE = 12       # a >= b
+    EQ = 13       # a == b
+    NE = 14       # a != b
+    PRINT = 15    # Вивести вершину стеку
+    SCAN = 16     # Прочитати число з клавіатури
+    JMP = 17      # Безумовний перехід, arg = мітка (після компонування - адреса)
+    JF = 18       # Перехід якщо хибно, arg = мітка (після компонування - адреса)
+    LABEL = 19    # Псевдоінструкція: позначає позицію мітки, arg = мітка
+                  # (існує лише до компонування, див. resolve_labels)
+    DUP = 20      # Дублювати вершину стеку (генерують лише оптимізації)
+    SQRT = 21     # Квадратний корінь (a ^ 0.5 після оптимізації)
+    POWI = 22     # a ^ arg для малого цілого arg (множенням, після оптимізації)
+    FLOOR = 23    # Округлення вниз до цілого (генерують лише оптимізації)
+    JT = 24       # Перехід якщо істинно, arg = мітка (генерує розміщення блоків)
+
+
+# Інструкція IR: код операції + цілий операнд
+Instr = namedtuple('Instr', ['op', 'arg'])
+
+
+# ========== ВІДПОВІДНІСТЬ ОПЕРАТОРІВ МОВИ КОДАМ ОПЕРАЦІЙ ==========
+# Використовується фронтендами при генерації коду
+OPERATOR_OPS = {
+    '+': Op.ADD, '-': Op.SUB, '*': Op.MUL, '/': Op.DIV, '^': Op.POW,
+    '<': Op.LT, '<=': Op.LE, '>': Op.GT, '>=': Op.GE, '==': Op.EQ, '!=': Op.NE,
+}
+
+# Текстові імена операцій (для виведення на екран)
+OP_SYMBOLS = {
+    Op.ADD: '+', Op.SUB: '-', Op.MUL: '*', Op.DIV: '/', Op.POW: '^',
+    Op.NEG: 'unary-',
+    Op.LT: '<', Op.LE: '<=', Op.GT: '>', Op.GE: '>=', Op.EQ: '==', Op.NE: '!=',
+    Op.PRINT: 'print', Op.SCAN: 'scan', Op.JMP: 'JMP', Op.JF: 'JF',
+    Op.JT: 'JT', Op.DUP: 'dup', Op.SQRT: 'sqrt', Op.POWI: 'powi', Op.FLOOR: 'floor',
+}
+
+# Групи операцій
+ARITHMETIC_OPS = frozenset((Op.ADD, Op.SUB, Op.MUL, Op.DIV, Op.POW))
+RELATIONAL_OPS = frozenset((Op.LT, Op.LE, Op.GT, Op.GE, Op.EQ, Op.NE))
+BINARY_OPS = ARITHMETIC_OPS | RELATIONAL_OPS
+BRANCH_OPS = frozenset((Op.JMP, Op.JF, Op.JT))
+# Унарні операції: знімають один операнд і кладуть результат
+UNARY_OPS = frozenset((Op.NEG, Op.SQRT, Op.POWI, Op.FLOOR))
+# Операції без побічних ефектів (результат залежить лише від операндів)
+PURE_OPS = frozenset((Op.CONST, Op.LOAD, Op.DUP)) | UNARY_OPS | BINARY_OPS
+
+# Вплив інструкції на стек: (скільки значень знімає, скільки кладе)
+STACK_EFFECT = {
+    Op.CONST: (0, 1), Op.LOAD: (0, 1), Op.STORE: (1, 0),
+    Op.PRINT: (1, 0), Op.SCAN: (0, 1), Op.JMP: (0, 0), Op.JF: (1, 0),
+    Op.JT: (1, 0), Op.LABEL: (0, 0), Op.DUP: (1, 2),
+}
+STACK_EFFECT.update((op, (2, 1)) for op in BINARY_OPS)
+STACK_EFFECT.update((op, (1, 1)) for op in UNARY_OPS)
+
+
+def expr_start(instrs, end):
+    """
+    Знаходить початок виразу, що обчислює операнд інструкції instrs[end]
+
+    Args:
+        instrs: послідовність інструкцій (op, arg)
+        end: індекс інструкції, яка знімає значення зі стеку
+
+    Returns:
+        int або None: індекс першої інструкції виразу (вираз - instrs[start:end]),
+                      None якщо вираз починається раніше instrs
+    """
+    need = 1
+    i = end
+    while i > 0:
+        i -= 1
+        pops, pushes = STACK_EFFECT[instrs[i][0]]
+        if pushes == 0:
+            return None
+        need += pops - pushes
+        if need == 0:
+            return i
+    return None
+
+
+class PostfixProgram:
+    """
+    Постфікс-програма у вигляді паралельних масивів
+
+    Атрибути:
+        ops: коди операцій (array('B'))
+        args: операнди (array('i'))
+        consts: пул констант (int, float або bool)
+        variable_table: таблиця змінних {ім'я: (індекс, тип, ініціалізована)}
+        label_count: кількість виділених міток (мітка N має ім'я "mN")
+        labels: таблиця міток {ім'я: адреса} (заповнюється resolve_labels)
+        linked: True якщо мітки вже розв'язані в абсолютні адреси
+        value_types: типи значень (ValueTypes), обчислені проходом
+                     integer-types для цього коду, або None
+    """
+
+    def __init__(self, variable_table=None):
+        """
+        Args:
+            variable_table: таблиця змінних фронтенду (спільна, не копіюється)
+        """
+        self.ops = array('B')
+        self.args = array('i')
+        self.consts = []
+        self.variable_table = variable_table if variable_table is not None else {}
+        self.label_count = 0
+        self.labels = {}
+        self.linked = False
+        self.value_types = None
+        # Індекс пулу констант для повторного використання однакових значень
+        self._const_index = {}
+
+    def __len__(self):
+        return len(self.ops)
+
+    def __getitem__(self, pc):
+        return Instr(Op(self.ops[pc]), self.args[pc])
+
+    def __iter__(self):
+        for op, arg in zip(self.ops, self.args):
+            yield Instr(Op(op), arg)
+
+    # ========== ГЕНЕРАЦІЯ КОДУ ==========
+
+    def emit(self, op, arg=0):
+        """Додає інструкцію в кінець програми"""
+        self.ops.append(op)
+        self.args.append(arg)
+
+    def add_const(self, value):
+        """
+        Додає константу до пулу (або знаходить вже існуючу)
+
+        Args:
+            value: int (ціле), float (дробове) або bool (TRUE/FALSE)
+
+        Returns:
+            int: індекс константи в пулі
+        """
+        # bool є підкласом int, тому тип входить у ключ
+        key = (type(value), repr(value))
+        index = self._const_index.get(key)
+        if index is None:
+            index = len(self.consts)
+            self.consts.append(value)
+            self._const_index[key] = index
+        return index
+
+    def new_label(self):
+        """Виділяє нову мітку і повертає її номер"""
+        self.label_count += 1
+        return self.label_count
+
+    def new_temp(self, prefix, var_type='numeric'):
+        """
+        Додає службову змінну компілятора до таблиці змінних
+
+        Ім'я містить '$', тож не може збігтися з ідентифікатором мови.
+
+        Args:
+            prefix: префікс імені (наприклад, 'licm')
+            var_type: тип змінної ('numeric' або 'logical')
+
+        Returns:
+            int: слот нової змінної
+        """
+        index = len(self.variable_table) + 1
+        number = index
+        while f"{prefix}${number}" in self.variable_table:
+            number += 1
+        self.variable_table[f"{prefix}${number}"] = (index, var_type, True)
+        return index - 1
+
+    def derive(self):
+        """
+        Створює порожню програму зі спільними пулом констант і таблицею змінних
+
+        Використовується перетвореннями коду, які будують нову програму
+        замість зміни існуючої.
+        """
+        program = PostfixProgram(self.variable_table)
+        program.consts = self.consts
+        program._const_index = self._const_index
+        program.label_count = self.label_count
+        return program
+
+    # ========== КОМПОНУВАННЯ МІТОК ==========
+
+    def resolve_labels(self):
+        """
+        Розв'язує мітки в абсолютні адреси переходів
+
+        Псевдоінструкції LABEL видаляються з коду, а операнди переходів
+        замінюються на адресу (індекс) цільової інструкції. Імена міток
+        зберігаються лише в таблиці labels - для налагодження та генерації CIL.
+        Виконується один раз, після завершення генерації коду фронтендом.
+        """
+        if self.linked:
+            return
+
+        # ========== ПЕРШИЙ ПРОХІД: АДРЕСИ МІТОК ==========
+        # Адреса мітки = кількість справжніх інструкцій перед нею
+        targets = {}
+        pc = 0
+        for op, arg in zip(self.ops, self.args):
+            if op == Op.LABEL:
+                targets[arg] = pc
+                self.labels[self.label_name(arg)] = pc
+            else:
+                pc += 1
+
+        # ========== ДРУГИЙ ПРОХІД: ПЕРЕЗАПИС КОДУ ==========
+        ops = array('B')
+        args = array('i')
+        for op, arg in zip(self.ops, self.args):
+            if op == Op.LABEL:
+                continue
+            if op in BRANCH_OPS:
+                if arg not in targets:
+                    raise ValueError(f"Мітка {self.label_name(arg)} не знайдена")
+                arg = targets[arg]
+            ops.append(op)
+            args.append(arg)
+
+        self.ops = ops
+        self.args = args
+        self.linked = True
+
+    def labels_by_address(self):
+        """Повертає {адреса: [імена міток]} у порядку появи міток"""
+        by_address = {}
+        for name, address in self.labels.items():
+            by_address.setdefault(address, []).append(name)
+        return by_address
+
+    # ========== ДОПОМІЖНІ МЕТОДИ ==========
+
+    def var_names(self):
+        """Повертає список імен змінних, впорядкований за слотами"""
+        names = [None] * len(self.variable_table)
+        for ident, (index, _, _) in self.variable_table.items():
+            names[index - 1] = ident
+        return names
+
+    def label_name(self, label):
+        """Повертає ім'я мітки за її номером"""
+        return f"m{label}"
+
+    def target_name(self, arg, by_address=None):
+        """
+        Повертає ім'я мітки, на яку вказує операнд переходу
+
+        Args:
+            arg: операнд переходу (номер мітки або адреса після компонування)
+            by_address: результат labels_by_address() (щоб не будувати щоразу)
+        """
+        if not self.linked:
+            return self.label_name(arg)
+        if by_address is None:
+            by_address = self.labels_by_address()
+        return by_address[arg][0]
+
+    def format_instr(self, op, arg, var_names=None, by_address=None):
+        """
+        Форматує інструкцію у текстовому вигляді (для виведення на екран)
+
+        Args:
+            op, arg: інструкція
+            var_names: список імен змінних (щоб не будувати його щоразу)
+            by_address: таблиця міток за адресами (щоб не будувати щоразу)
+
+        Returns:
+            str: текстове представлення інструкції
+        """
+        if var_names is None:
+            var_names = self.var_names()
+        if op == Op.CONST:
+            return format_const(self.consts[arg])
+        if op == Op.LOAD:
+            return var_names[arg]
+        if op == Op.STORE:
+            return f"={var_names[arg]}"
+        if op == Op.LABEL:
+            return f"{self.label_name(arg)}:"
+        if op in BRANCH_OPS:
+            return f"{OP_SYMBOLS[op]} {self.target_name(arg, by_address)}"
+        if op == Op.POWI:
+            return f"{OP_SYMBOLS[op]} {arg}"
+        return OP_SYMBOLS[op]
+
+    def format_code(self):
+        """Повертає список текстових представлень усіх інструкцій (і міток)"""
+        var_names = self.var_names()
+        by_address = self.labels_by_address()
+        lines = []
+        for pc, (op, arg) in enumerate(zip(self.ops, self.args)):
+            lines.extend(f"{name}:" for name in by_address.get(pc, ()))
+            lines.append(self.format_instr(op, arg, var_names, by_address))
+        lines.extend(f"{name}:" for name in by_address.get(len(self.ops), ()))
+        return lines
+
+
+def format_const(value):
+    """Текстове представлення константи у стилі вихідної мови"""
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, int):
+        return str(value)
+    return repr(value)
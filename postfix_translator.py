@@ -3,6 +3,18 @@
 Містить функції для збереження постфікс-коду у файл та віртуальну машину для його виконання
 """
 
+import math
+import mmap
+import operator
+import struct
+import sys
+from array import array
+
+from definite_assignment import definite_assignment
+from postfix_ir import (Op, OP_SYMBOLS, ARITHMETIC_OPS, RELATIONAL_OPS,
+                        BRANCH_OPS, PostfixProgram, format_const)
+from type_inference import infer_types
+
 
 def save_postfix_to_file(postfix_code, variable_table, filename):
     """
@@ -15,10 +27,12 @@ def save_postfix_to_file(postfix_code, variable_table, filename):
     - .code - послідовність інструкцій
 
     Args:
-        postfix_code: список постфікс-інструкцій
+        postfix_code: постфікс-програма (PostfixProgram)
         variable_table: таблиця змінних {ident: (index, type, initialized)}
         filename: ім'я файлу для збереження
     """
+    var_names = postfix_code.var_names()
+
     with open(filename, 'w', encoding='utf-8') as f:
         # ========== ЗАГОЛОВОК ФАЙЛУ ==========
         f.write('.target: Postfix Machine\n')
@@ -33,18 +47,26 @@ def save_postfix_to_file(postfix_code, variable_table, filename):
                 psm_type = 'int'  # Числовий тип
             elif varType == 'logical':
                 psm_type = 'bool'  # Логічний тип
+            elif varType == 'int':
+                psm_type = 'int32'  # Ціла змінна (прохід integer-types)
             else:
                 psm_type = varType  # Інші типи без змін
             f.write(f'\t{ident}\t{psm_type}\n')
         f.write(')\n')
 
         # ========== ЗБІР МІТОК ==========
-        # Проходимо по коду і знаходимо всі мітки (рядки що закінчуються на ':')
+        # Мітки зберігаються в окремій таблиці за адресами інструкцій.
+        # Позиція мітки рахується так, ніби мітки та переходи є елементами
+        # коду (ім'я мітки + JF/JT/JMP), як у текстовому представленні
+        by_address = postfix_code.labels_by_address()
         labels_dict = {}
-        for i, item in enumerate(postfix_code):
-            if isinstance(item, str) and item.endswith(':'):
-                label_name = item[:-1]  # Видаляємо ':' з кінця
-                labels_dict[label_name] = i + 1  # Зберігаємо позицію
+        position = 0
+        for pc in range(len(postfix_code) + 1):
+            for name in by_address.get(pc, ()):
+                labels_dict[name] = position + 1
+                position += 1
+            if pc < len(postfix_code):
+                position += 2 if postfix_code.ops[pc] in BRANCH_OPS else 1
 
         # ========== СЕКЦІЯ МІТОК ==========
         # Формат: ім'я_мітки    позиція
@@ -57,76 +79,434 @@ def save_postfix_to_file(postfix_code, variable_table, filename):
         # ========== СЕКЦІЯ КОДУ ==========
         # Формат: інструкція    тип_інструкції
         f.write('.code(\n')
-        for item in postfix_code:
-            if isinstance(item, str):
-                # Визначаємо тип інструкції та записуємо у відповідному форматі
-
-                if item.endswith(':'):
-                    # Мітка (наприклад, "m1:")
-                    label_name = item[:-1]
-                    f.write(f'\t{label_name}\tlabel\n')
-                    f.write(f'\t:\tcolon\n')
-
-                elif item.startswith('='):
-                    # Присвоювання (наприклад, "=x")
-                    var_name = item[1:]
-                    f.write(f'\t={var_name}\tassign_op\n')
-
-                elif item == 'print':
-                    # Виведення
-                    f.write(f'\tOUT\tout_op\n')
-
-                elif item == 'scan':
-                    # Введення
-                    f.write(f'\tINP\tinp_op\n')
-
-                elif item == 'JF':
-                    # Умовний перехід (Jump if False)
-                    f.write(f'\tJF\tjf\n')
-
-                elif item == 'JMP':
-                    # Безумовний перехід
-                    f.write(f'\tJUMP\tjump\n')
-
-                elif item == 'unary-':
-                    # Унарний мінус
-                    f.write(f'\tNEG\tmath_op\n')
-
-                elif item in ('+', '-', '*', '/', '^'):
-                    # Арифметичні операції
-                    f.write(f'\t{item}\tmath_op\n')
-
-                elif item in ('<', '<=', '>', '>=', '==', '!='):
-                    # Оператори порівняння
-                    f.write(f'\t{item}\trel_op\n')
-
-                elif item in ('TRUE', 'FALSE'):
-                    # Булеві константи
-                    f.write(f'\t{item}\tbool\n')
-
-                elif item in variable_table:
-                    # Завантаження значення змінної
-                    f.write(f'\t{item}\tr-val\n')
-
-                else:
-                    # Спробуємо визначити чи це числова константа
-                    try:
-                        if '.' in item:
-                            # Дробове число
-                            float(item)
-                            f.write(f'\t{item}\tfloat\n')
-                        else:
-                            # Ціле число
-                            int(item)
-                            f.write(f'\t{item}\tint\n')
-                    except:
-                        # Невідомий елемент - записуємо як є
-                        f.write(f'\t{item}\n')
+        for pc, (op, arg) in enumerate(zip(postfix_code.ops, postfix_code.args)):
+            for name in by_address.get(pc, ()):
+                f.write(f'\t{name}\tlabel\n\t:\tcolon\n')
+            if op in BRANCH_OPS:
+                arg = by_address[arg][0]
+            f.write(_PSM_WRITERS[op](postfix_code, arg, var_names))
+        for name in by_address.get(len(postfix_code), ()):
+            f.write(f'\t{name}\tlabel\n\t:\tcolon\n')
         f.write(')\n')
 
     print(f"✓ Постфікс-код збережено у файл (формат PSM): {filename}")
 
 
+def _psm_const(program, arg, var_names):
+    """Рядок PSM для константи"""
+    value = program.consts[arg]
+    if isinstance(value, bool):
+        # Булеві константи
+        return f'\t{format_const(value)}\tbool\n'
+    if isinstance(value, int):
+        # Ціле число
+        return f'\t{value}\tint\n'
+    # Дробове число
+    return f'\t{format_const(value)}\tfloat\n'
+
+
+def _psm_branch(mnemonic, kind):
+    """Створює функцію запису переходу: ім'я мітки + команда переходу"""
+    def write(program, label, var_names):
+        return f'\t{label}\n\t{mnemonic}\t{kind}\n'
+    return write
+
+
+def _psm_simple(text):
+    """Створює функцію запису інструкції без операнда"""
+    line = f'\t{text}\n'
+    return lambda program, arg, var_names: line
+
+
+# Таблиця запису інструкцій у формат PSM: код операції → функція
+_PSM_WRITERS = {
+    Op.CONST: _psm_const,
+    Op.LOAD: lambda program, arg, var_names: f'\t{var_names[arg]}\tr-val\n',
+    Op.STORE: lambda program, arg, var_names: f'\t={var_names[arg]}\tassign_op\n',
+    Op.PRINT: _psm_simple('OUT\tout_op'),
+    Op.SCAN: _psm_simple('INP\tinp_op'),
+    Op.JF: _psm_branch('JF', 'jf'),
+    Op.JT: _psm_branch('JT', 'jt'),
+    Op.JMP: _psm_branch('JUMP', 'jump'),
+    Op.NEG: _psm_simple('NEG\tmath_op'),
+    Op.DUP: _psm_simple('DUP\tstack_op'),
+    Op.SQRT: _psm_simple('SQRT\tmath_op'),
+    Op.FLOOR: _psm_simple('FLOOR\tmath_op'),
+    Op.POWI: lambda program, arg, var_names: f'\t^{arg}\tpowi_op\n',
+}
+for _op in ARITHMETIC_OPS:
+    _PSM_WRITERS[_op] = _psm_simple(f'{OP_SYMBOLS[_op]}\tmath_op')
+for _op in RELATIONAL_OPS:
+    _PSM_WRITERS[_op] = _psm_simple(f'{OP_SYMBOLS[_op]}\trel_op')
+
+
+# ========== ЗАВАНТАЖЕННЯ ФОРМАТУ PSM ==========
+
+# Типи змінних PSM → RSimple (обернення перетворення з save_postfix_to_file)
+_PSM_VAR_TYPES = {'int': 'numeric', 'bool': 'logical', 'int32': 'int'}
+
+# Рядки .code без операнда: (лексема, тип) → код операції
+_PSM_SIMPLE_OPS = {
+    ('OUT', 'out_op'): Op.PRINT,
+    ('INP', 'inp_op'): Op.SCAN,
+    ('NEG', 'math_op'): Op.NEG,
+    ('DUP', 'stack_op'): Op.DUP,
+    ('SQRT', 'math_op'): Op.SQRT,
+    ('FLOOR', 'math_op'): Op.FLOOR,
+}
+for _op in ARITHMETIC_OPS:
+    _PSM_SIMPLE_OPS[(OP_SYMBOLS[_op], 'math_op')] = _op
+for _op in RELATIONAL_OPS:
+    _PSM_SIMPLE_OPS[(OP_SYMBOLS[_op], 'rel_op')] = _op
+
+# Команди переходів PSM
+_PSM_BRANCH_OPS = {('JF', 'jf'): Op.JF, ('JT', 'jt'): Op.JT, ('JUMP', 'jump'): Op.JMP}
+
+
+def load_psm(filename):
+    """
+    Завантажує постфікс-програму з файлу PSM v0.3 (див. save_postfix_to_file)
+
+    Файл розбирається одним лінійним проходом: секція .vars відновлює
+    таблицю змінних, секція .code - інструкції IR. Секція .labels не
+    потрібна, бо позиції міток відновлюються з .code.
+
+    Args:
+        filename: ім'я файлу .postfix
+
+    Returns:
+        PostfixProgram: скомпонована програма, готова для PostfixMachine
+    """
+    with open(filename, 'r', encoding='utf-8') as f:
+        lines = f.read().split('\n')
+
+    variable_table = {}
+    program = PostfixProgram(variable_table)
+    label_numbers = {}      # {ім'я мітки у файлі: номер мітки в програмі}
+    defined_labels = []     # Імена міток у порядку визначення
+    section = None          # Поточна секція: '.vars', '.labels', '.code'
+    pending_label = None    # Мітка-операнд перед JF/JT/JUMP
+    pending_def = None      # Мітка, що чекає рядка ':' colon
+
+    def label_number(name):
+        if name not in label_numbers:
+            label_numbers[name] = program.new_label()
+        return label_numbers[name]
+
+    def fail(line_no, message):
+        raise ValueError(f"{filename}:{line_no}: {message}")
+
+    for line_no, line in enumerate(lines, 1):
+        stripped = line.strip()
+        if not stripped:
+            continue
+
+        # ========== ЗАГОЛОВОК ТА МЕЖІ СЕКЦІЙ ==========
+        if section is None or stripped.startswith('.'):
+            if stripped.startswith('.version:'):
+                version = stripped.split(':', 1)[1].strip()
+                if version != '0.3':
+                    fail(line_no, f"непідтримувана версія PSM {version}")
+            elif stripped.endswith('('):
+                section = stripped[:-1]
+            elif not stripped.startswith('.target:'):
+                fail(line_no, f"неочікуваний рядок '{stripped}'")
+            continue
+        if stripped == ')':
+            section = None
+            continue
+
+        fields = stripped.split('\t')
+
+        # ========== СЕКЦІЯ ЗМІННИХ ==========
+        if section == '.vars':
+            ident, psm_type = fields[0], fields[-1]
+            var_type = _PSM_VAR_TYPES.get(psm_type, psm_type)
+            variable_table[ident] = (len(variable_table) + 1, var_type, True)
+            continue
+        if section != '.code':
+            continue
+
+        # ========== СЕКЦІЯ КОДУ ==========
+        lexeme = fields[0]
+        kind = fields[1] if len(fields) > 1 else None
+
+        if pending_def is not None:
+            # Після "mN label" очікується ": colon"
+            if (lexeme, kind) != (':', 'colon'):
+                fail(line_no, f"очікувалось ':' після мітки {pending_def}")
+            program.emit(Op.LABEL, label_number(pending_def))
+            defined_labels.append(pending_def)
+            pending_def = None
+        elif kind is None:
+            # Операнд переходу - ім'я мітки
+            pending_label = lexeme
+        elif (lexeme, kind) in _PSM_BRANCH_OPS:
+            if pending_label is None:
+                fail(line_no, f"перехід {lexeme} без мітки")
+            program.emit(_PSM_BRANCH_OPS[(lexeme, kind)], label_number(pending_label))
+            pending_label = None
+        elif kind == 'label':
+            pending_def = lexeme
+        elif kind == 'r-val':
+            if lexeme not in variable_table:
+                fail(line_no, f"невідома змінна {lexeme}")
+            program.emit(Op.LOAD, variable_table[lexeme][0] - 1)
+        elif kind == 'assign_op':
+            if lexeme[1:] not in variable_table:
+                fail(line_no, f"невідома змінна {lexeme[1:]}")
+            program.emit(Op.STORE, variable_table[lexeme[1:]][0] - 1)
+        elif kind == 'int':
+            program.emit(Op.CONST, program.add_const(int(lexeme)))
+        elif kind == 'float':
+            program.emit(Op.CONST, program.add_const(float(lexeme)))
+        elif kind == 'bool':
+            program.emit(Op.CONST, program.add_const(lexeme == 'TRUE'))
+        elif kind == 'powi_op':
+            program.emit(Op.POWI, int(lexeme[1:]))
+        elif (lexeme, kind) in _PSM_SIMPLE_OPS:
+            program.emit(_PSM_SIMPLE_OPS[(lexeme, kind)])
+        else:
+            fail(line_no, f"невідома інструкція '{stripped}'")
+
+    if pending_label is not None or pending_def is not None:
+        raise ValueError(f"{filename}: незавершена інструкція в кінці секції .code")
+
+    # ========== КОМПОНУВАННЯ ==========
+    # Мітки отримують адреси, а таблиця міток - імена з файлу
+    program.resolve_labels()
+    program.labels = {name: program.labels[program.label_name(label_numbers[name])]
+                      for name in defined_labels}
+    return program
+
+
+# ========== БІНАРНИЙ ФОРМАТ PSMB ==========
+# Скомпільована програма, яку можна завантажити без лексичного та
+# синтаксичного аналізу. Усі числа - little-endian.
+#
+#   Заголовок:   magic 'PSMB', u16 версія, u16 прапорці (0),
+#                u32 кількість змінних, констант, міток та інструкцій,
+#                u32 зміщення секції коду
+#   Змінні:      u32 індекс, u16 довжина + ім'я (UTF-8),
+#                u16 довжина + тип (UTF-8), u8 ініціалізована
+#   Константи:   u8 тег (0 - int, 1 - float, 2 - bool) + i64 / f64 / u8
+#   Мітки:       u16 довжина + ім'я (UTF-8), u32 адреса
+#   Код:         вирівняний на 4 байти масив i32 операндів,
+#                за ним масив u8 кодів операцій
+
+PSMB_MAGIC = b'PSMB'
+PSMB_VERSION = 1
+
+_PSMB_HEADER = struct.Struct('<4sHHIIIII')
+_PSMB_CONST_INT = 0
+_PSMB_CONST_FLOAT = 1
+_PSMB_CONST_BOOL = 2
+
+
+def _pack_string(text):
+    """Рядок у форматі PSMB: u16 довжина + UTF-8"""
+    data = text.encode('utf-8')
+    return struct.pack('<H', len(data)) + data
+
+
+def _unpack_string(buffer, offset):
+    """Читає рядок PSMB, повертає (рядок, нове зміщення)"""
+    (length,) = struct.unpack_from('<H', buffer, offset)
+    offset += 2
+    return str(buffer[offset:offset + length], 'utf-8'), offset + length
+
+
+def save_postfix_binary(postfix_code, variable_table, filename):
+    """
+    Зберігає скомпоновану постфікс-програму у бінарному форматі PSMB
+
+    Args:
+        postfix_code: постфікс-програма (PostfixProgram) з розв'язаними мітками
+        variable_table: таблиця змінних {ident: (index, type, initialized)}
+        filename: ім'я файлу для збереження (зазвичай .psmb)
+    """
+    tables = bytearray()
+
+    # ========== СЕКЦІЯ ЗМІННИХ ==========
+    for ident, (index, var_type, initialized) in variable_table.items():
+        tables += struct.pack('<I', index)
+        tables += _pack_string(ident)
+        tables += _pack_string(var_type)
+        tables += struct.pack('<B', 1 if initialized else 0)
+
+    # ========== ПУЛ КОНСТАНТ ==========
+    for value in postfix_code.consts:
+        if isinstance(value, bool):
+            tables += struct.pack('<BB', _PSMB_CONST_BOOL, value)
+        elif isinstance(value, int):
+            tables += struct.pack('<Bq', _PSMB_CONST_INT, value)
+        else:
+            tables += struct.pack('<Bd', _PSMB_CONST_FLOAT, value)
+
+    # ========== СЕКЦІЯ МІТОК ==========
+    for name, address in postfix_code.labels.items():
+        tables += _pack_string(name)
+        tables += struct.pack('<I', address)
+
+    # ========== СЕКЦІЯ КОДУ ==========
+    # Операнди йдуть першими, щоб масив i32 був вирівняний
+    code_offset = _PSMB_HEADER.size + len(tables)
+    padding = -code_offset % 4
+    code_offset += padding
+
+    args = array('i', postfix_code.args)
+    if sys.byteorder != 'little':
+        args.byteswap()
+
+    header = _PSMB_HEADER.pack(PSMB_MAGIC, PSMB_VERSION, 0,
+                               len(variable_table), len(postfix_code.consts),
+                               len(postfix_code.labels), len(postfix_code),
+                               code_offset)
+
+    with open(filename, 'wb') as f:
+        f.write(header)
+        f.write(tables)
+        f.write(b'\0' * padding)
+        f.write(args.tobytes())
+        f.write(bytes(postfix_code.ops))
+
+    print(f"✓ Постфікс-код збережено у файл (формат PSMB): {filename}")
+
+
+def load_postfix_binary(filename):
+    """
+    Завантажує постфікс-програму з файлу PSMB
+
+    Файл відображається в пам'ять (mmap), а масиви кодів операцій та
+    операндів програми є memoryview цього відображення - без копіювання.
+    Час завантаження не залежить від складності вихідної програми.
+
+    Args:
+        filename: ім'я файлу .psmb
+
+    Returns:
+        PostfixProgram: скомпонована програма, готова для PostfixMachine
+    """
+    with open(filename, 'rb') as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    # ========== ЗАГОЛОВОК ==========
+    if len(mapping) < _PSMB_HEADER.size:
+        raise ValueError(f"{filename}: файл занадто короткий для PSMB")
+    (magic, version, _, n_vars, n_consts, n_labels, n_code,
+     code_offset) = _PSMB_HEADER.unpack_from(mapping, 0)
+    if magic != PSMB_MAGIC:
+        raise ValueError(f"{filename}: не є файлом PSMB")
+    if version != PSMB_VERSION:
+        raise ValueError(f"{filename}: непідтримувана версія PSMB {version}")
+    offset = _PSMB_HEADER.size
+
+    # ========== СЕКЦІЯ ЗМІННИХ ==========
+    variable_table = {}
+    for _ in range(n_vars):
+        (index,) = struct.unpack_from('<I', mapping, offset)
+        ident, offset = _unpack_string(mapping, offset + 4)
+        var_type, offset = _unpack_string(mapping, offset)
+        initialized = mapping[offset] == 1
+        offset += 1
+        variable_table[ident] = (index, var_type, initialized)
+
+    program = PostfixProgram(variable_table)
+
+    # ========== ПУЛ КОНСТАНТ ==========
+    for _ in range(n_consts):
+        tag = mapping[offset]
+        if tag == _PSMB_CONST_BOOL:
+            program.consts.append(mapping[offset + 1] == 1)
+            offset += 2
+        elif tag == _PSMB_CONST_INT:
+            program.consts.append(struct.unpack_from('<q', mapping, offset + 1)[0])
+            offset += 9
+        elif tag == _PSMB_CONST_FLOAT:
+            program.consts.append(struct.unpack_from('<d', mapping, offset + 1)[0])
+            offset += 9
+        else:
+            raise ValueError(f"{filename}: невідомий тег константи {tag}")
+
+    # ========== СЕКЦІЯ МІТОК ==========
+    for _ in range(n_labels):
+        name, offset = _unpack_string(mapping, offset)
+        (address,) = struct.unpack_from('<I', mapping, offset)
+        offset += 4
+        program.labels[name] = address
+
+    # ========== СЕКЦІЯ КОДУ ==========
+    ops_offset = code_offset + 4 * n_code
+    if ops_offset + n_code > len(mapping):
+        raise ValueError(f"{filename}: секція коду обрізана")
+    view = memoryview(mapping)
+    if sys.byteorder == 'little' and array('i').itemsize == 4:
+        # Без копіювання: операнди читаються прямо з відображення файлу
+        program.args = view[code_offset:ops_offset].cast('i')
+    else:
+        args = array('i')
+        args.frombytes(view[code_offset:ops_offset])
+        if sys.byteorder != 'little':
+            args.byteswap()
+        program.args = args
+    program.ops = view[ops_offset:ops_offset + n_code]
+    program.linked = True
+    return program
+
+
+# ========== ПРОФІЛЬ ПЕРЕХОДІВ ==========
+# Текстовий файл: рядок на умовний перехід - "адреса виконано не_виконано"
+# (записує PostfixMachine з profile=True, читає прохід block-layout)
+
+def save_branch_profile(profile, filename):
+    """
+    Зберігає лічильники умовних переходів
+
+    Args:
+        profile: {адреса: [виконано переходів, не виконано]}
+        filename: ім'я файлу
+    """
+    with open(filename, 'w', encoding='utf-8') as f:
+        for address in sorted(profile):
+            taken, not_taken = profile[address]
+            f.write(f'{address} {taken} {not_taken}\n')
+
+
+def load_branch_profile(filename):
+    """
+    Завантажує лічильники умовних переходів (див. save_branch_profile)
+
+    Returns:
+        dict: {адреса: (виконано переходів, не виконано)}
+
+    Raises:
+        ValueError: якщо рядок файлу має неправильний формат
+    """
+    profile = {}
+    with open(filename, encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            fields = line.split()
+            if not fields:
+                continue
+            if len(fields) != 3 or not all(field.isdigit() for field in fields):
+                raise ValueError(f"{filename}:{line_no}: очікується 'адреса виконано не_виконано'")
+            address, taken, not_taken = map(int, fields)
+            profile[address] = (taken, not_taken)
+    return profile
+
+
+# Значення ще не присвоєної змінної у слотах PostfixMachine
+_UNASSIGNED = object()
+
+# Бінарні операції постфікс-машини (арифметика в double, порівняння → bool)
+_BINARY_FUNCTIONS = {
+    Op.ADD: operator.add, Op.SUB: operator.sub, Op.MUL: operator.mul,
+    Op.DIV: operator.truediv, Op.POW: operator.pow,
+    Op.LT: operator.lt, Op.LE: operator.le, Op.GT: operator.gt,
+    Op.GE: operator.ge, Op.EQ: operator.eq, Op.NE: operator.ne,
+}
+
+
 class PostfixMachine:
     """
     Віртуальна стекова машина для виконання постфікс-коду
@@ -141,25 +521,45 @@ class PostfixMachine:
     3. ADD   → pop 4 і 3, push 7 → стек: [7]
     """
 
-    def __init__(self, code):
+    def __init__(self, code, profile=False):
         """
         Ініціалізація віртуальної машини
 
         Args:
-            code: список постфікс-інструкцій
+            code: постфікс-програма (PostfixProgram) з розв'язаними мітками
+            profile: рахувати виконання умовних переходів (branch_profile)
         """
         self.code = code              # Постфікс-код для виконання
         self.stack = []               # Стек для обчислень
-        self.variables = {}           # Змінні програми {ім'я: значення}
         self.pc = 0                   # Program Counter (лічильник команд)
-        self.labels = {}              # Таблиця міток {ім'я: позиція}
 
-        # ========== ПОБУДОВА ТАБЛИЦІ МІТОК ==========
-        # Проходимо по коду і запам'ятовуємо позиції всіх міток
-        for i, item in enumerate(code):
-            if isinstance(item, str) and item.endswith(':'):
-                label_name = item[:-1]  # Видаляємо ':' з кінця
-                self.labels[label_name] = i  # Зберігаємо позицію мітки
+        # Імена змінних за слотами
+        self.var_names = code.var_names()
+        # Значення змінних за слотами (_UNASSIGNED - ще не присвоєна)
+        self.slots = [_UNASSIGNED] * len(self.var_names)
+        # Числові константи завжди дробові, булеві - True/False
+        self.consts = [value if isinstance(value, bool) else float(value)
+                       for value in code.consts]
+        # Адреси завантажень, для яких присвоєння доведене аналізом
+        self.assigned_loads, _ = definite_assignment(code)
+        # Лічильники умовних переходів {адреса: [виконано, не виконано]}
+        self.branch_profile = {} if profile else None
+        # Цілі змінні (прохід integer-types) зберігають int Python;
+        # типи значень визначають, де потрібне перетворення у float
+        # (обчислені проходом або, для завантаженої з файлу програми, тут)
+        self.types = None
+        if any(var_type == 'int' for _, var_type, _ in code.variable_table.values()):
+            self.types = code.value_types or infer_types(code)
+        # Декодований код: обробник для кожної адреси; там, де починається
+        # типова коротка послідовність, - один обробник для всієї послідовності
+        self.handlers = [self._fuse(pc) or self._decode(pc, op, arg)
+                         for pc, (op, arg) in enumerate(zip(code.ops, code.args))]
+
+    @property
+    def variables(self):
+        """Присвоєні змінні {ім'я: значення} у порядку слотів (для виведення і налагодження)"""
+        return {name: value for name, value in zip(self.var_names, self.slots)
+                if value is not _UNASSIGNED}
 
     def execute(self):
         """
@@ -171,213 +571,373 @@ class PostfixMachine:
         print("="*70)
 
         # ========== ГОЛОВНИЙ ЦИКЛ ВИКОНАННЯ ==========
-        # Виконуємо інструкції поки не дійдемо до кінця коду
-        while self.pc < len(self.code):
-            item = self.code[self.pc]
-
-            # Пропускаємо мітки (вони не виконуються, лише позначають позиції)
-            if isinstance(item, str) and item.endswith(':'):
-                self.pc += 1
-                continue
-
-            # Виконуємо інструкцію
-            self.execute_instruction(item)
-            self.pc += 1  # Переходимо до наступної інструкції
+        # Кожен обробник виконує свою інструкцію і повертає адресу наступної
+        handlers = self.handlers
+        n = len(handlers)
+        pc = self.pc
+        try:
+            while pc < n:
+                pc = handlers[pc](pc)
+        finally:
+            # Адреса інструкції, на якій сталася помилка (або кінець коду)
+            self.pc = pc
 
         # ========== ВИВЕДЕННЯ РЕЗУЛЬТАТІВ ==========
         print("\n✓ Виконання завершено успішно")
         print("\nЗНАЧЕННЯ ЗМІННИХ:")
         for var, val in self.variables.items():
+            # Цілі змінні виводяться так само, як дробові
+            if type(val) is int:
+                val = float(val)
             print(f"  {var} = {val}")
 
-    def execute_instruction(self, instr):
+    def _decode(self, pc, op, arg):
         """
-        Виконує одну інструкцію постфікс-коду
+        Декодує одну інструкцію в обробник
+
+        Обробник - замикання з уже розв'язаними операндами (значення сталої,
+        слот змінної, адреса переходу): під час виконання не потрібні ні
+        розбір коду операції, ні звернення до таблиць програми.
 
         Args:
-            instr: інструкція для виконання (число, оператор, команда тощо)
-        """
+            pc: адреса інструкції
+            op: код операції (Op)
+            arg: операнд інструкції
 
-        # ========== ЧИСЛОВІ КОНСТАНТИ ==========
-        if self.is_number(instr):
-            # Кладемо число на стек
-            self.stack.append(float(instr))
-
-        # ========== ЛОГІЧНІ КОНСТАНТИ ==========
-        elif instr in ('TRUE', 'FALSE'):
-            # TRUE → True, FALSE → False
-            self.stack.append(instr == 'TRUE')
-
-        # ========== ІДЕНТИФІКАТОРИ (ЗМІННІ ТА МІТКИ) ==========
-        elif self.is_identifier(instr):
-            # Якщо це мітка (наприклад, "m1", "m2")
-            if instr.startswith('m') and instr[1:].isdigit():
-                self.stack.append(instr)
-            # Якщо це змінна
-            elif instr in self.variables:
-                # Завантажуємо значення змінної на стек
-                self.stack.append(self.variables[instr])
+        Returns:
+            function: handler(pc) → адреса наступної інструкції
+        """
+        stack = self.stack
+        push = stack.append
+        pop = stack.pop
+        slots = self.slots
+        types = self.types
+        next_pc = pc + 1
+
+        # ========== КОНСТАНТИ ==========
+        if op == Op.CONST:
+            if types is not None and types.int_op[pc]:
+                # Ціла стала цілої операції
+                value = self.code.consts[arg]
             else:
-                # Змінна не ініціалізована
-                raise RuntimeError(f"Змінна {instr} не ініціалізована")
-
-        # ========== АРИФМЕТИЧНІ ОПЕРАЦІЇ ==========
-        # Бінарні операції: беруть 2 операнди зі стеку, кладуть результат
-
-        elif instr == '+':
-            # Додавання: a + b
-            b, a = self.stack.pop(), self.stack.pop()
-            self.stack.append(a + b)
-
-        elif instr == '-':
-            # Віднімання: a - b
-            b, a = self.stack.pop(), self.stack.pop()
-            self.stack.append(a - b)
-
-        elif instr == '*':
-            # Множення: a * b
-            b, a = self.stack.pop(), self.stack.pop()
-            self.stack.append(a * b)
-
-        elif instr == '/':
-            # Ділення: a / b
-            b, a = self.stack.pop(), self.stack.pop()
-            self.stack.append(a / b)
-
-        elif instr == '^':
-            # Піднесення до степеня: a ^ b
-            b, a = self.stack.pop(), self.stack.pop()
-            self.stack.append(a ** b)
-
-        elif instr == 'unary-':
+                # Число (або булеве значення)
+                value = self.consts[arg]
+
+            def handler(pc):
+                push(value)
+                return next_pc
+
+        # ========== ЗМІННІ ==========
+        elif op == Op.LOAD:
+            if self.assigned_loads[pc]:
+                # Змінна присвоєна на всіх шляхах - без перевірки
+                def handler(pc):
+                    push(slots[arg])
+                    return next_pc
+            else:
+                name = self.var_names[arg]
+
+                def handler(pc):
+                    value = slots[arg]
+                    if value is _UNASSIGNED:
+                        # Змінна не ініціалізована
+                        raise RuntimeError(f"Змінна {name} не ініціалізована")
+                    push(value)
+                    return next_pc
+
+        elif op == Op.STORE:
+            # Присвоїти значення зі стеку змінній у слоті arg
+            def handler(pc):
+                slots[arg] = pop()
+                return next_pc
+
+        # ========== АРИФМЕТИКА ТА ПОРІВНЯННЯ ==========
+        # Беруть 2 операнди зі стеку, кладуть результат (число або True/False)
+        elif op in _BINARY_FUNCTIONS:
+            function = _BINARY_FUNCTIONS[op]
+
+            def handler(pc):
+                b = pop()
+                stack[-1] = function(stack[-1], b)
+                return next_pc
+
+        elif op == Op.NEG:
             # Унарний мінус: -a (змінює знак)
-            a = self.stack.pop()
-            self.stack.append(-a)
-
-        # ========== ОПЕРАТОРИ ПОРІВНЯННЯ ==========
-        # Беруть 2 операнди, повертають True або False
-
-        elif instr == '<':
-            b, a = self.stack.pop(), self.stack.pop()
-            self.stack.append(a < b)
-
-        elif instr == '<=':
-            b, a = self.stack.pop(), self.stack.pop()
-            self.stack.append(a <= b)
-
-        elif instr == '>':
-            b, a = self.stack.pop(), self.stack.pop()
-            self.stack.append(a > b)
-
-        elif instr == '>=':
-            b, a = self.stack.pop(), self.stack.pop()
-            self.stack.append(a >= b)
-
-        elif instr == '==':
-            b, a = self.stack.pop(), self.stack.pop()
-            self.stack.append(a == b)
-
-        elif instr == '!=':
-            b, a = self.stack.pop(), self.stack.pop()
-            self.stack.append(a != b)
-
-        # ========== ПРИСВОЮВАННЯ ==========
-        elif isinstance(instr, str) and instr.startswith('='):
-            # Формат: "=x" означає присвоїти значення зі стеку змінній x
-            var_name = instr[1:]  # Отримуємо ім'я змінної (видаляємо '=')
-            value = self.stack.pop()  # Беремо значення зі стеку
-            self.variables[var_name] = value  # Зберігаємо у змінній
-
-        # ========== ВВЕДЕННЯ ==========
-        elif instr == 'scan':
+            def handler(pc):
+                stack[-1] = -stack[-1]
+                return next_pc
+
+        elif op == Op.SQRT:
+            # Квадратний корінь: a ^ 0.5 (для a <= 0, цілих і комплексних
+            # значень - як оператор **)
+            def handler(pc):
+                a = stack[-1]
+                stack[-1] = math.sqrt(a) if type(a) is float and a > 0 else a ** 0.5
+                return next_pc
+
+        elif op == Op.FLOOR:
+            # Округлення вниз (±0.0, нескінченність і NaN залишаються як є)
+            def handler(pc):
+                a = stack[-1]
+                if math.isfinite(a) and a != 0:
+                    stack[-1] = float(math.floor(a))
+                return next_pc
+
+        elif op == Op.POWI:
+            # Ціла степінь a ^ arg - тим самим оператором **, що й POW
+            # (ланцюжок множень округлює кілька разів і дав би інший double)
+            def handler(pc):
+                stack[-1] = stack[-1] ** arg
+                return next_pc
+
+        elif op == Op.DUP:
+            # Дублювання вершини стеку (результат спільного підвиразу)
+            def handler(pc):
+                push(stack[-1])
+                return next_pc
+
+        # ========== ВВЕДЕННЯ / ВИВЕДЕННЯ ==========
+        elif op == Op.SCAN:
             # Читаємо число з клавіатури і кладемо на стек
-            value = float(input("Введіть число: "))
-            self.stack.append(value)
+            def handler(pc):
+                push(float(input("Введіть число: ")))
+                return next_pc
 
-        # ========== ВИВЕДЕННЯ ==========
-        elif instr == 'print':
+        elif op == Op.PRINT:
             # Беремо значення зі стеку і виводимо на екран
-            value = self.stack.pop()
-            print(f"OUTPUT: {value}")
+            def handler(pc):
+                print(f"OUTPUT: {pop()}")
+                return next_pc
 
         # ========== ПЕРЕХОДИ (JUMPS) ==========
-
-        elif instr == 'JMP':
-            # Безумовний перехід на мітку
-            label = self.stack.pop()  # Мітка на стеку (наприклад, "m1")
-            if label in self.labels:
-                # Встановлюємо PC на позицію мітки (-1 бо після виконання буде +1)
-                self.pc = self.labels[label] - 1
+        # Операнд переходу - абсолютна адреса цільової інструкції
+        elif op == Op.JMP:
+            # Безумовний перехід
+            def handler(pc):
+                return arg
+
+        elif op == Op.JF or op == Op.JT:
+            # Умовний перехід (Jump if False / Jump if True - після розміщення блоків)
+            if_true = op == Op.JT
+            if self.branch_profile is not None:
+                count = self._count_branch
+
+                def handler(pc):
+                    taken = bool(pop()) == if_true
+                    count(pc, taken)
+                    return arg if taken else next_pc
+            elif if_true:
+                def handler(pc):
+                    return arg if pop() else next_pc
             else:
-                raise RuntimeError(f"Мітка {label} не знайдена")
-
-        elif instr == 'JF':
-            # Умовний перехід (Jump if False)
-            label = self.stack.pop()      # Мітка
-            condition = self.stack.pop()  # Умова
-            # Якщо умова хибна (False) - переходимо
-            if not condition:
-                if label in self.labels:
-                    self.pc = self.labels[label] - 1
-                else:
-                    raise RuntimeError(f"Мітка {label} не знайдена")
-
-    def is_number(self, s):
+                def handler(pc):
+                    return next_pc if pop() else arg
+
+        else:
+            # LABEL та інші інструкції без дії
+            def handler(pc):
+                return next_pc
+
+        # Ті самі перетворення int → float, що й conv.r4 у CIL
+        if types is not None and (types.convert_before[pc] or types.convert_after[pc]):
+            handler = _converting(handler, stack, types.convert_before[pc],
+                                  types.convert_after[pc])
+        return handler
+
+    def _plain(self, pc):
+        """True якщо адреса в межах коду і інструкція не потребує перетворень int → float"""
+        if pc >= len(self.code.ops):
+            return False
+        types = self.types
+        return types is None or not (types.convert_before[pc] or types.convert_after[pc])
+
+    def _converts(self, pc):
+        """(перетворення перед, перетворення після) для інструкції pc"""
+        if self.types is None:
+            return False, False
+        return self.types.convert_before[pc], self.types.convert_after[pc]
+
+    def _operand(self, pc, to_float=False):
         """
-        Перевіряє чи є рядок числом
+        Джерело значення, яке кладе на стек інструкція pc
 
         Args:
-            s: рядок для перевірки
+            pc: адреса інструкції
+            to_float: значення перетворюється у float наступною інструкцією
 
         Returns:
-            bool: True якщо s - число, False інакше
+            tuple: (контейнер, ключ) для CONST і завантаження доведено
+                   присвоєної змінної, інакше None
         """
-        try:
-            float(s)
-            return True
-        except:
-            return False
-
-    def is_identifier(self, s):
+        if pc >= len(self.code.ops):
+            return None
+        before, after = self._converts(pc)
+        if before:
+            return None
+        to_float = to_float or after
+        op, arg = self.code.ops[pc], self.code.args[pc]
+        if op == Op.CONST:
+            if self.types is not None and self.types.int_op[pc]:
+                value = self.code.consts[arg]
+            else:
+                value = self.consts[arg]
+            # Перетворення сталої виконується один раз, під час декодування
+            return (float(value) if to_float else value,), 0
+        if op == Op.LOAD and self.assigned_loads[pc] and not to_float:
+            return self.slots, arg
+        return None
+
+    def _binary(self, pc):
+        """(функція, перетворити правий операнд) для бінарної операції pc без перетворення результату"""
+        if pc >= len(self.code.ops) or self.code.ops[pc] not in _BINARY_FUNCTIONS:
+            return None
+        before, after = self._converts(pc)
+        if after:
+            return None
+        return _BINARY_FUNCTIONS[self.code.ops[pc]], before
+
+    def _fuse(self, pc):
         """
-        Перевіряє чи є рядок ідентифікатором (змінною або міткою)
+        Суперінструкція для послідовності, що починається з адреси pc
 
-        Ідентифікатор - це:
-        - Змінна (починається з літери, містить літери, цифри, '_', '.')
-        - Мітка для переходів (формат: m1, m2, m3, ...)
-
-        Args:
-            s: рядок для перевірки
+        Послідовності (x, y - стала або доведено присвоєна змінна):
+            x y op, x y op =v, x y cmp JF/JT, x op, x op =v, x cmp JF/JT,
+            x =v, dup =v
+        Обробники окремих інструкцій послідовності лишаються на своїх
+        адресах, тож переходи всередину послідовності виконуються як раніше.
 
         Returns:
-            bool: True якщо s - ідентифікатор, False інакше
+            function або None: обробник, що виконує всю послідовність
         """
-        if not isinstance(s, str):
-            return False
+        ops, args = self.code.ops, self.code.args
+        stack = self.stack
+        push = stack.append
+        pop = stack.pop
+        slots = self.slots
+
+        if ops[pc] == Op.DUP and self._plain(pc):
+            if self._plain(pc + 1) and ops[pc + 1] == Op.STORE:
+                # ========== dup =v ==========
+                slot = args[pc + 1]
+                next_pc = pc + 2
+
+                def handler(pc):
+                    slots[slot] = stack[-1]
+                    return next_pc
+                return handler
+            return None
+
+        first = self._operand(pc)
+        if first is None:
+            return None
+        xs, xk = first
+
+        binary = self._binary(pc + 2)
+        second = binary and self._operand(pc + 1, binary[1])
+        if second:
+            # ========== x y op ==========
+            function = binary[0]
+            ys, yk = second
+            end = pc + 3
+            branch = self._branch(end)
+            if self._plain(end) and ops[end] == Op.STORE:
+                slot = args[end]
+                next_pc = end + 1
+
+                def handler(pc):
+                    slots[slot] = function(xs[xk], ys[yk])
+                    return next_pc
+            elif branch:
+                taken, not_taken = branch
+
+                def handler(pc):
+                    return taken if function(xs[xk], ys[yk]) else not_taken
+            else:
+                def handler(pc):
+                    push(function(xs[xk], ys[yk]))
+                    return end
+            return handler
+
+        binary = self._binary(pc + 1)
+        if binary:
+            # ========== x op: лівий операнд - на вершині стеку ==========
+            function, to_float = binary
+            if to_float:
+                first = self._operand(pc, True)
+                if first is None:
+                    return None
+                xs, xk = first
+            end = pc + 2
+            branch = self._branch(end)
+            if self._plain(end) and ops[end] == Op.STORE:
+                slot = args[end]
+                next_pc = end + 1
+
+                def handler(pc):
+                    slots[slot] = function(pop(), xs[xk])
+                    return next_pc
+            elif branch:
+                taken, not_taken = branch
+
+                def handler(pc):
+                    return taken if function(pop(), xs[xk]) else not_taken
+            else:
+                def handler(pc):
+                    stack[-1] = function(stack[-1], xs[xk])
+                    return end
+            return handler
+
+        if self._plain(pc + 1) and ops[pc + 1] == Op.STORE:
+            # ========== x =v ==========
+            slot = args[pc + 1]
+            next_pc = pc + 2
+
+            def handler(pc):
+                slots[slot] = xs[xk]
+                return next_pc
+            return handler
+        return None
+
+    def _branch(self, pc):
+        """
+        (адреса, якщо умова істинна; адреса, якщо хибна) для JF/JT за адресою pc
 
-        # Список зарезервованих слів (не можуть бути ідентифікаторами)
-        reserved = ['=', '+', '-', '*', '/', '^', 'unary-',
-                   '<', '<=', '>', '>=', '==', '!=',
-                   'print', 'scan', 'JMP', 'JF', 'TRUE', 'FALSE']
+        Returns:
+            tuple або None (не перехід, або переходи рахуються для профілю)
+        """
+        if (pc >= len(self.code.ops) or self.code.ops[pc] not in (Op.JF, Op.JT)
+                or self.branch_profile is not None):
+            return None
+        target, next_pc = self.code.args[pc], pc + 1
+        return (target, next_pc) if self.code.ops[pc] == Op.JT else (next_pc, target)
 
-        # Перевіряємо чи не є рядок зарезервованим словом
-        if s in reserved or s.endswith(':') or s.startswith('='):
-            return False
+    def _count_branch(self, pc, taken):
+        """Рахує виконання умовного переходу за адресою pc"""
+        counts = self.branch_profile.setdefault(pc, [0, 0])
+        counts[0 if taken else 1] += 1
 
-        # Перевіряємо чи це мітка (формат: m1, m2, ...)
-        if s.startswith('m') and len(s) > 1 and s[1:].isdigit():
-            return True
 
-        # Перевіряємо чи це правильний ідентифікатор змінної
-        if not s[0].isalpha():  # Повинен починатися з літери
-            return False
+def _converting(handler, stack, before, after):
+    """
+    Обгортає обробник перетвореннями вершини стеку у float
 
-        # Всі символи після першого повинні бути літерами, цифрами, '_' або '.'
-        for char in s[1:]:
-            if not (char.isalnum() or char in ('_', '.')):
-                return False
+    Args:
+        handler: обробник інструкції
+        stack: стек машини
+        before: перетворити операнд на вершині стеку перед інструкцією
+        after: перетворити результат інструкції
 
-        return True
+    Returns:
+        function: новий обробник
+    """
+    def converting(pc):
+        if before:
+            stack[-1] = float(stack[-1])
+        next_pc = handler(pc)
+        if after:
+            stack[-1] = float(stack[-1])
+        return next_pc
+    return converting
 
 
 def print_postfix_code(postfix_code):
@@ -385,11 +945,67 @@ def print_postfix_code(postfix_code):
     Виводить постфікс-код на екран у зручному форматі
 
     Args:
-        postfix_code: список постфікс-інструкцій
+        postfix_code: постфікс-програма (PostfixProgram)
     """
     print("\n" + "="*70)
     print("ПОСТФІКС-КОД:")
     print("-"*70)
-    for item in postfix_code:
+    for item in postfix_code.format_code():
         print(item)
     print("="*70)
+
+
+def load_program(filename):
+    """
+    Завантажує скомпільовану програму з файлу .postfix (PSM) або .psmb
+
+    Args:
+        filename: ім'я файлу
+
+    Returns:
+        PostfixProgram: скомпонована програма
+    """
+    if filename.endswith('.psmb'):
+        return load_postfix_binary(filename)
+    return load_psm(filename)
+
+
+def main():
+    """
+    Точка входу командного рядка:
+        python -m postfix_translator run <файл.postfix | файл.psmb> [--profile=ФАЙЛ]
+    Виконує збережену програму без повторної компіляції вихідного коду;
+    з --profile записує лічильники умовних переходів (для --opt-layout-profile)
+    """
+    args = []
+    profile_file = None
+    for arg in sys.argv[1:]:
+        if arg.startswith('--profile='):
+            profile_file = arg.split('=', 1)[1]
+        else:
+            args.append(arg)
+    if len(args) != 2 or args[0] != 'run':
+        print('Використання: python -m postfix_translator run <файл.postfix | файл.psmb> '
+              '[--profile=ФАЙЛ]')
+        sys.exit(1)
+
+    try:
+        program = load_program(args[1])
+    except (OSError, ValueError) as e:
+        print(f'✗ Помилка завантаження програми: {e}')
+        sys.exit(1)
+
+    machine = PostfixMachine(program, profile=profile_file is not None)
+    try:
+        machine.execute()
+    except Exception as e:
+        print(f'\n✗ Помилка виконання постфікс-коду: {e}')
+        sys.exit(1)
+    finally:
+        # Профіль потрібен і для програми, що завершилась помилкою
+        if profile_file is not None:
+            save_branch_profile(machine.branch_profile, profile_file)
+            print(f"✓ Профіль переходів збережено у файл: {profile_file}")
+
+if __name__ == '__main__':
+    main()
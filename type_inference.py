@@ -0,0 +1,525 @@
+"""
+Виведення цілих типів (integer type inference)
+
+Усі числа RSimple - float32, але змінна, яка гарантовано містить лише цілі
+значення з діапазону [-2^24, 2^24] (лічильник циклу зі сталою межею, сума
+кількох малих цілих), може зберігатися як int32: у цьому діапазоні
+арифметика float32 над цілими точна і збігається з цілою.
+
+    1. Аналіз інтервалів: прямий аналіз потоку даних над CFG, значення
+       змінної - інтервал цілих [lo, hi] або "не обов'язково ціле".
+       Умови переходів (i < 10, i + 3 < 10) звужують інтервал на кожній дузі;
+       блоки обробляються списком робіт (worklist): повторно аналізуються
+       лише наступники блоку, стан якого змінився. На заголовках циклів
+       після кількох оновлень інтервал розширюється до нескінченності
+       (widening), а потім уточнюється другим обходом (narrowing).
+    2. Типізація значень на стеку: операція виконується над int32, якщо
+       обидва операнди цілі, а інтервал результату в межах 2^24. Інакше
+       цілі операнди перетворюються у float32 (conv.r4) - одразу після
+       обчислення (операнд під вершиною стеку) або перед операцією
+       (вершина стеку). Змінна лишається цілою, лише якщо всі присвоєння
+       їй цілі; інакше вона стає дробовою і типізація повторюється.
+
+Значення -0.0 цілим числом не передати, тому унарний мінус і множення,
+що можуть його дати (0 * від'ємне), виконуються у float32. Ділення,
+степені, sqrt і введення завжди дробові.
+"""
+
+import heapq
+
+from cfg import ControlFlowGraph
+from optimizer.dce import liveness
+from postfix_ir import Op, RELATIONAL_OPS, STACK_EFFECT
+
+_CONST = int(Op.CONST)
+_LOAD = int(Op.LOAD)
+_STORE = int(Op.STORE)
+_ADD = int(Op.ADD)
+_SUB = int(Op.SUB)
+_MUL = int(Op.MUL)
+_NEG = int(Op.NEG)
+_DUP = int(Op.DUP)
+_JMP = int(Op.JMP)
+_JF = int(Op.JF)
+_JT = int(Op.JT)
+
+# Межа цілих значень, точних у float32
+INT_LIMIT = 1 << 24
+
+_INF = float('inf')
+_SAFE_BOUND = INT_LIMIT // 2    # Межа умов зі зсувом (змінна + стала)
+_ZERO = (0, 0)              # Значення змінної до присвоєння (.locals обнулені)
+_BOOL = 'bool'              # Логічне значення на стеку
+_WIDEN_AFTER = 3            # Кількість оновлень блоку до розширення інтервалів
+_NARROWING_PASSES = 3        # Кількість звужень стану блоку
+
+_INT_OPS = (_ADD, _SUB, _MUL)
+_RELATIONAL = frozenset(int(op) for op in RELATIONAL_OPS)
+_NEGATED = {Op.LT: Op.GE, Op.LE: Op.GT, Op.GT: Op.LE, Op.GE: Op.LT, Op.EQ: Op.NE, Op.NE: Op.EQ}
+_SWAPPED = {Op.LT: Op.GT, Op.LE: Op.GE, Op.GT: Op.LT, Op.GE: Op.LE, Op.EQ: Op.EQ, Op.NE: Op.NE}
+
+
+class _Unsupported(Exception):
+    """Значення на стеку переходить між блоками - аналіз не застосовується"""
+
+
+class ValueTypes:
+    """
+    Результат типізації програми
+
+    Атрибути:
+        int_vars: бітова маска змінних типу int32
+        int_op: bytearray - 1 для інструкцій, що виконуються над int32
+                (CONST без conv.r4, LOAD/арифметика/порівняння цілих)
+        convert_after: bytearray - conv.r4 після інструкції
+        convert_before: bytearray - conv.r4 вершини стеку перед інструкцією
+    """
+
+    def __init__(self, int_vars, int_op, convert_after, convert_before):
+        self.int_vars = int_vars
+        self.int_op = int_op
+        self.convert_after = convert_after
+        self.convert_before = convert_before
+
+
+# ========== ІНТЕРВАЛИ ==========
+# Значення: (lo, hi) - ціле з інтервалу (межі можуть бути ±inf),
+# None - не обов'язково ціле, _BOOL - логічне
+
+def _join(a, b):
+    if a is None or b is None or a is _BOOL or b is _BOOL:
+        return None
+    return (min(a[0], b[0]), max(a[1], b[1]))
+
+
+def _join_states(a, b):
+    """Об'єднання станів {слот: значення}; None - недосяжний стан"""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return {slot: _join(a.get(slot, _ZERO), b.get(slot, _ZERO)) for slot in a.keys() | b.keys()}
+
+
+def _widen(old, new):
+    """Розширення: межа, що зросла, стає нескінченною"""
+    result = {}
+    for slot in old.keys() | new.keys():
+        a = old.get(slot, _ZERO)
+        b = new.get(slot, _ZERO)
+        if a is None or b is None:
+            result[slot] = None
+        else:
+            result[slot] = (a[0] if b[0] >= a[0] else -_INF, a[1] if b[1] <= a[1] else _INF)
+    return result
+
+
+def _product(x, y):
+    """Добуток меж інтервалів (0 * inf = 0)"""
+    return 0 if x == 0 or y == 0 else x * y
+
+
+def _arithmetic(op, a, b):
+    if a is None or b is None or a is _BOOL or b is _BOOL:
+        return None
+    if op == _ADD:
+        return (a[0] + b[0], a[1] + b[1])
+    if op == _SUB:
+        return (a[0] - b[1], a[1] - b[0])
+    products = [_product(x, y) for x in a for y in b]
+    return (min(products), max(products))
+
+
+def _within_limit(value):
+    return (value is not None and value is not _BOOL
+            and -INT_LIMIT <= value[0] and value[1] <= INT_LIMIT)
+
+
+def _refine(state, condition, holds):
+    """
+    Звужує інтервали змінних умови на дузі, де умова істинна (holds)
+
+    Returns:
+        dict або None: новий стан (None - дуга неможлива)
+    """
+    rel, a, b = condition
+    if not holds:
+        rel = _NEGATED[rel]
+    state = dict(state)
+    for (x, x_var), (y, _), r in ((a, b, rel), (b, a, _SWAPPED[rel])):
+        if x_var is None or not isinstance(x, tuple) or not isinstance(y, tuple):
+            continue
+        # x = змінна + offset: x r y ⇔ змінна r (y - offset). Сума у float32
+        # точна лише до 2^24, тож межі y поза ±2^23 не використовуються
+        x_slot, offset = x_var
+        if offset:
+            if abs(offset) > _SAFE_BOUND:
+                continue
+            y = (y[0] - offset if y[0] >= -_SAFE_BOUND else -_INF,
+                 y[1] - offset if y[1] <= _SAFE_BOUND else _INF)
+        lo, hi = state.get(x_slot, _ZERO)
+        if r == Op.LT:
+            hi = min(hi, y[1] - 1)
+        elif r == Op.LE:
+            hi = min(hi, y[1])
+        elif r == Op.GT:
+            lo = max(lo, y[0] + 1)
+        elif r == Op.GE:
+            lo = max(lo, y[0])
+        elif r == Op.EQ:
+            lo, hi = max(lo, y[0]), min(hi, y[1])
+        elif y[0] == y[1]:
+            lo += lo == y[0]
+            hi -= hi == y[0]
+        if lo > hi:
+            return None
+        state[x_slot] = (lo, hi)
+    return state
+
+
+def _shifted(op, operands):
+    """(слот, зсув) для змінна ± стала або стала + змінна"""
+    (a, a_var, _, _), (b, b_var, _, _) = operands
+    if a_var is not None and isinstance(b, tuple) and b[0] == b[1]:
+        return (a_var[0], a_var[1] + b[0] if op == _ADD else a_var[1] - b[0])
+    if op == _ADD and b_var is not None and isinstance(a, tuple) and a[0] == a[1]:
+        return (b_var[0], b_var[1] + a[0])
+    return None
+
+
+def _simulate(instrs, state, consts, record=None, start=0):
+    """
+    Виконує блок над інтервалами
+
+    Args:
+        instrs: інструкції блоку
+        state: стан на вході {слот: значення} (не змінюється)
+        consts: пул констант
+        record: словник {адреса: (значення, адреси виробників операндів)}
+                для типізації або None
+        start: адреса першої інструкції блоку
+
+    Returns:
+        tuple: (стан на дузі fallthrough, стан на дузі переходу)
+    """
+    state = dict(state)
+    # (значення, (слот, зсув) для змінна + стала або None, адреса виробника, умова)
+    stack = []
+    for pc, (op, arg) in enumerate(instrs, start):
+        if op == _DUP:
+            # Копія - те саме значення того самого виробника
+            if not stack:
+                raise _Unsupported()
+            stack.append(stack[-1])
+            continue
+        if op == _JMP:
+            if stack:
+                raise _Unsupported()
+            return None, state
+        pops, pushes = STACK_EFFECT[op]
+        if len(stack) < pops:
+            raise _Unsupported()
+        operands = stack[len(stack) - pops:]
+        del stack[len(stack) - pops:]
+
+        value = None
+        slot = None
+        condition = None
+        if op == _CONST:
+            const = consts[arg]
+            if isinstance(const, bool):
+                value = _BOOL
+            elif isinstance(const, int):
+                value = (const, const)
+        elif op == _LOAD:
+            value = state.get(arg, _ZERO)
+            slot = (arg, 0)
+        elif op in _INT_OPS:
+            value = _arithmetic(op, operands[0][0], operands[1][0])
+            if op != _MUL:
+                slot = _shifted(op, operands)
+        elif op == _NEG and isinstance(operands[0][0], tuple):
+            value = (-operands[0][0][1], -operands[0][0][0])
+        elif op in _RELATIONAL:
+            value = _BOOL
+            condition = (Op(op), operands[0][:2], operands[1][:2])
+        if record is not None:
+            record[pc] = (value, tuple(operand[2] for operand in operands))
+
+        if op == _STORE:
+            stored = operands[0][0]
+            state[arg] = None if stored is _BOOL else stored
+            # Завантаження arg на стеку вже не збігаються зі змінною
+            stack = [(v, None if s is not None and s[0] == arg else s, p, c)
+                     for v, s, p, c in stack]
+        elif op == _JF or op == _JT:
+            if stack:
+                raise _Unsupported()
+            condition = operands[0][3]
+            if condition is None:
+                return state, state
+            # Дуга переходу JF - умова хибна, JT - істинна
+            fall = _refine(state, condition, op == _JF)
+            return fall, _refine(state, condition, op == _JT)
+        elif pushes:
+            stack.append((value, slot, pc, condition))
+    if stack:
+        raise _Unsupported()
+    return state, None
+
+
+def _edge_state(graph, pred, block_id, out):
+    """Стан на дузі pred → block_id"""
+    if pred not in out:
+        return None
+    fall, jump = out[pred]
+    block = graph.blocks[pred]
+    state = None
+    if block.fallthrough == block_id:
+        state = fall
+    terminator = block.terminator
+    if terminator is not None and terminator[1] == block_id:
+        state = _join_states(state, jump)
+    return state
+
+
+def _intervals(graph, consts, ctx=None):
+    """
+    Стани на вході блоків (нерухома точка з розширенням і звуженням)
+
+    Робочий список упорядкований за зворотним post-order: блок знову
+    обробляється лише тоді, коли змінився вихідний стан його попередника.
+    Інтервали розширюються в блоках, у які веде зворотна дуга (заголовки
+    циклів): кожен цикл графа проходить через такий блок. Розширюються
+    лише межі, що зросли через зворотні дуги, - ріст зі входу в цикл
+    (ітерації зовнішнього циклу) обмежує розширення в заголовку
+    зовнішнього. Стан на виході блоку містить лише живі змінні, тож стани
+    не ростуть з кількістю змінних програми.
+
+    Args:
+        graph: граф потоку керування
+        consts: пул констант
+        ctx: контекст проходу для перевірки бюджету часу
+
+    Returns:
+        dict: {номер блоку: стан або None для недосяжних}
+    """
+    order = graph.reverse_postorder()
+    rank = {block_id: i for i, block_id in enumerate(order)}
+    # Заголовок: попередники, що йдуть раніше в порядку (вхідні дуги)
+    entries = {}
+    for block_id in order:
+        preds = graph.blocks[block_id].preds
+        if any(rank.get(pred, -1) >= rank[block_id] for pred in preds):
+            entries[block_id] = [pred for pred in preds if rank.get(pred, -1) < rank[block_id]]
+    live_out = liveness(graph, ctx)
+    in_states = {}
+    out = {}
+    updates = dict.fromkeys(order, 0)
+
+    def simulate(block_id, state):
+        live = live_out[block_id]
+        return tuple(None if edge is None
+                     else {slot: value for slot, value in edge.items() if live >> slot & 1}
+                     for edge in _simulate(graph.blocks[block_id].instrs, state, consts))
+
+    def incoming(block_id, preds):
+        state = {} if block_id == graph.entry else None
+        for pred in preds:
+            state = _join_states(state, _edge_state(graph, pred, block_id, out))
+        return state
+
+    def solve(update):
+        """Обробляє блоки, доки update змінює їхні вихідні стани"""
+        pending = list(range(len(order)))
+        queued = set(order)
+        while pending:
+            if ctx is not None:
+                ctx.check()
+            block_id = order[heapq.heappop(pending)]
+            queued.discard(block_id)
+            state = update(block_id)
+            if state is False:
+                continue
+            in_states[block_id] = state
+            result = None if state is None else simulate(block_id, state)
+            if out.get(block_id) == result:
+                continue
+            if result is None:
+                del out[block_id]
+            else:
+                out[block_id] = result
+            for succ in graph.blocks[block_id].succs:
+                if succ not in queued:
+                    queued.add(succ)
+                    heapq.heappush(pending, rank[succ])
+
+    def ascend(block_id):
+        # Новий стан блоку або False, якщо він не змінився
+        state = incoming(block_id, graph.blocks[block_id].preds)
+        if state is None:
+            return False
+        old = in_states.get(block_id)
+        if old is not None:
+            if block_id in entries and updates[block_id] >= _WIDEN_AFTER:
+                base = _join_states(old, incoming(block_id, entries[block_id]))
+                state = _widen(base, _join_states(base, state))
+            else:
+                state = _join_states(old, state)
+            if state == old:
+                return False
+        updates[block_id] += 1
+        return state
+
+    # Звуження: стан перераховується з попередників без об'єднання зі
+    # старим (лишається надмножиною нерухомої точки); кожен блок
+    # звужується не більше _NARROWING_PASSES разів
+    narrowed = dict.fromkeys(order, 0)
+
+    def descend(block_id):
+        state = incoming(block_id, graph.blocks[block_id].preds)
+        if state == in_states.get(block_id) or narrowed[block_id] >= _NARROWING_PASSES:
+            return False
+        narrowed[block_id] += 1
+        return state
+
+    solve(ascend)
+    solve(descend)
+    return in_states
+
+
+# ========== ТИПІЗАЦІЯ ==========
+
+def _may_be_negative_zero(op, a, b=None):
+    """Чи може ціла операція в float32 дати -0.0"""
+    if op == _NEG:
+        return a[0] <= 0 <= a[1]
+    if op == _MUL:
+        return (a[0] <= 0 <= a[1] and b[0] < 0) or (b[0] <= 0 <= b[1] and a[0] < 0)
+    return False
+
+
+def _assign_types(code, consts, record, int_vars):
+    """
+    Типізує значення при заданих цілих змінних
+
+    Returns:
+        tuple: (int_op, out_int, демотовані змінні) - out_int: значення
+               після інструкції ціле (без conv.r4 після неї)
+    """
+    n = len(code)
+    demoted = set()
+    while True:
+        int_op = bytearray(n)
+        out_int = bytearray(n)
+        changed = False
+        for pc in sorted(record):
+            op = code[pc][0]
+            value, operands = record[pc]
+            if op == _CONST:
+                int_op[pc] = _within_limit(value)
+            elif op == _LOAD:
+                int_op[pc] = int_vars >> code[pc][1] & 1
+            elif op in _INT_OPS or op == _NEG or op in _RELATIONAL:
+                ints = all(out_int[p] for p in operands)
+                if op in _RELATIONAL:
+                    int_op[pc] = ints
+                else:
+                    int_op[pc] = (ints and _within_limit(value)
+                                  and not _may_be_negative_zero(
+                                      op, *(record[p][0] for p in operands)))
+                if not int_op[pc] and len(operands) == 2 and out_int[operands[0]]:
+                    # Операнд під вершиною стеку перетворюється одразу
+                    demoted.add(operands[0])
+                    changed = True
+            elif len(operands) == 2 and out_int[operands[0]]:
+                demoted.add(operands[0])
+                changed = True
+            if op not in _RELATIONAL and pc not in demoted:
+                out_int[pc] = int_op[pc]
+        if not changed:
+            break
+
+    bad = 0
+    for pc, (_, operands) in record.items():
+        op, arg = code[pc]
+        if op == _STORE and int_vars >> arg & 1 and not out_int[operands[0]]:
+            bad |= 1 << arg
+    return int_op, out_int, bad
+
+
+def infer_types(program, ctx=None):
+    """
+    Визначає цілі змінні та типи значень у програмі
+
+    Args:
+        program: скомпонована постфікс-програма
+        ctx: контекст проходу (PassContext) для перевірки бюджету часу
+             або None (без обмеження)
+
+    Returns:
+        ValueTypes або None (цілих змінних немає або аналіз не застосовний)
+    """
+    if not len(program):
+        return None
+    graph = ControlFlowGraph(program)
+    consts = program.consts
+    try:
+        in_states = _intervals(graph, consts, ctx)
+        # Адреси, значення й операнди всіх інструкцій (недосяжні для
+        # аналізу блоки - без інформації про інтервали)
+        record = {}
+        pc = 0
+        for block_id in graph.layout:
+            instrs = graph.blocks[block_id].instrs
+            state = in_states.get(block_id)
+            if state is None:
+                state = dict.fromkeys(range(len(program.variable_table)))
+            _simulate(instrs, state, consts, record, pc)
+            pc += len(instrs)
+    except _Unsupported:
+        return None
+
+    # ========== КАНДИДАТИ: УСІ ПРИСВОЄННЯ ЦІЛІ ==========
+    code = list(zip(program.ops, program.args))
+    numeric = 0
+    for index, var_type, _ in program.variable_table.values():
+        if var_type != 'logical':
+            numeric |= 1 << (index - 1)
+    stored = 0
+    not_int = 0
+    for pc, (_, operands) in record.items():
+        op, arg = code[pc]
+        if op == _STORE:
+            stored |= 1 << arg
+            if not _within_limit(record[operands[0]][0]):
+                not_int |= 1 << arg
+    int_vars = numeric & stored & ~not_int
+
+    # ========== УЗГОДЖЕННЯ ТИПІВ ==========
+    while True:
+        if ctx is not None:
+            ctx.check()
+        int_op, out_int, bad = _assign_types(code, consts, record, int_vars)
+        if not bad:
+            break
+        int_vars &= ~bad
+    if not int_vars:
+        return None
+
+    convert_after = bytearray(len(code))
+    convert_before = bytearray(len(code))
+    for pc, (_, operands) in record.items():
+        op, arg = code[pc]
+        if int_op[pc] and not out_int[pc] and op not in _RELATIONAL:
+            convert_after[pc] = 1
+        if not operands:
+            continue
+        top = operands[-1]
+        if not out_int[top]:
+            continue
+        if op == _STORE:
+            convert_before[pc] = not int_vars >> arg & 1
+        elif op != _JF and op != _JT and not int_op[pc]:
+            convert_before[pc] = 1
+    return ValueTypes(int_vars, int_op, convert_after, convert_before)